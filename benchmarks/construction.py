@@ -0,0 +1,58 @@
+"""
+Measures the cost of creating a DataFrame for every operation in a
+pipeline of many small operations.
+
+Usage
+-----
+python benchmarks/construction.py [number of rows] [number of columns]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import pandas_cub_final as pdc  # noqa: E402
+
+
+def make_df(nrows, ncols):
+    return pdc.DataFrame({f'c{i}': np.arange(nrows) * i for i in range(ncols)})
+
+
+def pipeline(df):
+    # 10 operations, each creating one DataFrame
+    df = df + 1
+    df = df[df['c1'] > 2]
+    df = df.head(8)
+    df = df.cumsum()
+    df = df.abs()
+    df = df[['c0', 'c1', 'c2']]
+    df = df.rename({'c2': 'x'})
+    df = df.sum()
+    df = df['c0']
+    return df.copy()
+
+
+def per_call(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    nrows = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    ncols = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    df = make_df(nrows, ncols)
+    number = 2_000
+
+    print(f'{nrows:,} rows, {ncols} columns')
+    init = per_call(lambda: pdc.DataFrame(df._data), number)
+    print(f'DataFrame(data):          {init:8.2f} us')
+    if hasattr(pdc.DataFrame, '_from_arrays'):
+        fast = per_call(lambda: pdc.DataFrame._from_arrays(df._data), number)
+        print(f'DataFrame._from_arrays:   {fast:8.2f} us')
+    total = per_call(lambda: pipeline(df), number // 10)
+    print(f'pipeline of 10 operations: {total:7.2f} us, {total / 10:.2f} us per operation')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares the ways read_csv can parse a copy of data/employee.csv that is
+scaled up to many millions of rows, or a file of random int columns.
+
+Usage
+-----
+python benchmarks/read_csv.py [number of rows] [employee or numeric]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas_cub_final as pdc
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'employee.csv')
+
+
+def make_csv(fn, nrows):
+    with open(DATA) as f:
+        header = f.readline()
+        lines = f.readlines()
+
+    block = ''.join(lines)
+    with open(fn, 'w') as f:
+        f.write(header)
+        for _ in range(nrows // len(lines)):
+            f.write(block)
+        f.write(''.join(lines[:nrows % len(lines)]))
+
+
+def make_numeric_csv(fn, nrows, ncols=7):
+    # ints of 1 to 13 digits, some of them negative
+    rng = np.random.RandomState(0)
+    highs = [10 ** 6, 100, 10 ** 9, 5, 2 ** 40, 1000, 10 ** 5]
+    data = np.column_stack([rng.randint(-high if i % 3 == 0 else 0, high, nrows)
+                            for i, high in zip(range(ncols), highs * ncols)])
+    with open(fn, 'w') as f:
+        f.write(','.join(f'c{i}' for i in range(ncols)) + '\n')
+        np.savetxt(f, data, fmt='%d', delimiter=',')
+
+
+OPTIONS = {'python': {'engine': 'python'},
+           'numpy': {'engine': 'numpy'},
+           'memory_map': {'memory_map': True},
+           'workers': {'memory_map': True, 'workers': os.cpu_count()}}
+
+
+def time_read(fn, **kwargs):
+    start = time.perf_counter()
+    df = pdc.read_csv(fn, **kwargs)
+    return time.perf_counter() - start, len(df)
+
+
+def main():
+    nrows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000_000
+    data = sys.argv[2] if len(sys.argv) > 2 else 'employee'
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, f'{data}_big.csv')
+        if data == 'numeric':
+            make_numeric_csv(fn, nrows)
+        else:
+            make_csv(fn, nrows)
+        size = os.path.getsize(fn) / 2 ** 20
+        print(f'{nrows:,} rows, {size:,.0f} MB')
+        for name, kwargs in OPTIONS.items():
+            seconds, n = time_read(fn, **kwargs)
+            print(f'{name:>10}: {seconds:8.2f} s  {n / seconds:14,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
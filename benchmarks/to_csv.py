@@ -0,0 +1,41 @@
+"""
+Compares writing a DataFrame with to_csv against reading the same file
+back with read_csv.
+
+Usage
+-----
+python benchmarks/to_csv.py [number of rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from read_csv import make_csv, pdc
+
+
+def main():
+    nrows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, 'employee_big.csv')
+        make_csv(fn, nrows)
+        df = pdc.read_csv(fn, engine='numpy')
+        df['ratio'] = df['salary'] / 7
+        df['high'] = df['salary'] > 80000
+
+        start = time.perf_counter()
+        df.to_csv(fn)
+        write = time.perf_counter() - start
+        size = os.path.getsize(fn) / 2 ** 20
+
+        start = time.perf_counter()
+        pdc.read_csv(fn, engine='numpy')
+        read = time.perf_counter() - start
+
+        print(f'{nrows:,} rows, {size:,.0f} MB')
+        print(f'  to_csv: {write:8.2f} s  {nrows / write:14,.0f} rows/s')
+        print(f'read_csv: {read:8.2f} s  {nrows / read:14,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,82 @@
+import asyncio
+import bz2
+import glob
+import gzip
+import json
+import lzma
+import mmap
+import os
+import sqlite3
+import sys
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime
+from functools import partial
+from itertools import islice
+from operator import eq, ge, gt, le, lt, ne
+
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 
 __version__ = '0.0.1'
 
+# byte values used when parsing raw csv buffers
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+COMMA = ord(',')
+
+# bytes that the unquoted string fields written by to_csv cannot hold
+CSV_UNSAFE_BYTES = (b',', b'"', b'\n', b'\r', b'\0')
+
+# data types inferred for csv columns in order of preference, the number of
+# values used to infer them and the strings read as booleans
+INFER_ORDER = ['int', 'float', 'O']
+INFER_ROWS = 1000
+TRUE_VALUES = ['True', 'true', 'TRUE', '1']
+FALSE_VALUES = ['False', 'false', 'FALSE', '0']
+
+# string columns are read as categorical when at most this share of their
+# first values are distinct
+CATEGORY_MAX_RATIO = 0.5
+
+# compressed files are recognized by their extension or first few bytes
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+COMPRESSION_MAGIC = {'gzip': b'\x1f\x8b', 'bz2': b'BZh', 'xz': b'\xfd7zXZ\x00'}
+
+# layout of the binary columnar files written by DataFrame.to_cub
+CUB_MAGIC = b'CUB1'
+CUB_VERSION = 2
+CUB_ALIGNMENT = 64
+
+# SQLite column types of each kind of array
+SQL_TYPES = {'b': 'INTEGER', 'i': 'INTEGER', 'u': 'INTEGER', 'f': 'REAL', 'O': 'TEXT',
+             'M': 'TEXT', 'm': 'INTEGER'}
+
+# ufuncs behind the arithmetic and comparison operators of NullableArrays
+OPERATOR_UFUNCS = {'add': np.add, 'sub': np.subtract, 'mul': np.multiply,
+                   'truediv': np.true_divide, 'floordiv': np.floor_divide,
+                   'pow': np.power, 'gt': np.greater, 'lt': np.less,
+                   'ge': np.greater_equal, 'le': np.less_equal,
+                   'ne': np.not_equal, 'eq': np.equal}
+
+# functions that DataFrame._non_agg applies to a whole block at once
+# mapped to whether they must be applied along each row
+BLOCK_FUNCS = {np.cumsum: True, np.minimum.accumulate: True,
+               np.maximum.accumulate: True, np.abs: False, np.clip: False,
+               np.round: False, np.copy: False}
+
+# ufuncs whose `reduceat` aggregates every group of a GroupBy at once
+GROUP_UFUNCS = {'sum': np.add, 'prod': np.multiply, 'min': np.minimum,
+                'max': np.maximum, 'any': np.logical_or, 'all': np.logical_and}
+
+# operators allowed in the row conditions of the readers
+COMPARISONS = {'<': lt, '<=': le, '>': gt, '>=': ge, '==': eq, '!=': ne}
+
 
 class DataFrame:
 
-    def __init__(self, data):
+    def __init__(self, data, downcast=False):
         """
         A DataFrame holds two-dimensional heterogeneous data. Create it by
         passing a dictionary of NumPy arrays to the values parameter
@@ -15,6 +86,12 @@ class DataFrame:
         data: dict
             A dictionary of strings mapped to NumPy arrays. The key will
             become the column name.
+        downcast: bool or 'float'
+            If True, int columns are stored in the smallest int data type
+            that holds all of their values. 'float' also stores float
+            columns as float32 when their values are in its range, which
+            keeps about 7 significant digits. Arithmetic on small ints can
+            overflow where int64 would not.
         """
         # check for correct input types
         self._check_input_types(data)
@@ -25,9 +102,38 @@ class DataFrame:
         # convert unicode arrays to object
         self._data = self._convert_unicode_to_object(data)
 
-        # Allow for special methods for strings
-        self.str = StringMethods(self)
-        self._add_docs()
+        # store numbers in the smallest data type that holds them
+        _check_downcast(downcast)
+        if downcast:
+            self._data = {col: _downcast(values, downcast)
+                          for col, values in self._data.items()}
+
+        # columns whose arrays were copied by this DataFrame and the
+        # DataFrames that may share its arrays, see `_writable`
+        self._owned = set()
+        self._family = None
+
+        # 2-D arrays holding several columns, see `consolidate`
+        self._blocks = None
+
+        # finds rows by the values of a column, see `set_index`
+        self._index = None
+
+    @classmethod
+    def _from_arrays(cls, data, blocks=None):
+        """
+        Creates a DataFrame for the result of an operation without checking
+        or converting `data`. It must be a dictionary of string column names
+        mapped to 1-D arrays of the same length, none of them unicode.
+        `blocks` are the blocks the arrays of some columns are rows of.
+        """
+        df = cls.__new__(cls)
+        df._data = data
+        df._owned = set()
+        df._family = None
+        df._blocks = blocks or None
+        df._index = None
+        return df
 
     def _check_input_types(self, data):
         if not isinstance(data, dict):
@@ -36,7 +142,7 @@ class DataFrame:
         for col_name, values in data.items():
             if not isinstance(col_name, str):
                 raise TypeError('All column names must be a string')
-            if not isinstance(values, np.ndarray):
+            if not isinstance(values, (np.ndarray, ColumnArray)):
                 raise TypeError('All values must be a 1-D NumPy array')
             else:
                 if values.ndim != 1:
@@ -58,6 +164,26 @@ class DataFrame:
                 new_data[col_name] = values
         return new_data
 
+    @property
+    def str(self):
+        # Allow for special methods for strings. Made on access so that the
+        # DataFrame has no reference cycle and is freed as soon as it is
+        # no longer used, which `_writable` relies on.
+        return StringMethods(self)
+
+    @property
+    def dt(self):
+        # Allow for special methods for datetimes, made on access like `str`
+        return DateTimeMethods(self)
+
+    def __getstate__(self):
+        # a copy made by pickle shares no arrays with the original
+        state = dict(self.__dict__)
+        state['_owned'] = set()
+        state['_family'] = None
+        state['_blocks'] = None
+        return state
+
     def __len__(self):
         """
         Make the builtin len function work with our dataframe
@@ -106,8 +232,16 @@ class DataFrame:
         if len(columns) != len(set(columns)):
             raise ValueError('Column names must be unique')
 
+        renames = dict(zip(self._data, columns))
         new_data = dict(zip(columns, self._data.values()))
         self._data = new_data
+        # owned columns are tracked by name
+        self._owned = set()
+        # the index and the blocks follow their columns to the new names
+        self._keep_index(self, renames)
+        if self._blocks:
+            self._blocks = [(block, [renames[col] for col in cols], views)
+                            for block, cols, views in self._blocks]
 
     @property
     def shape(self):
@@ -168,17 +302,17 @@ class DataFrame:
             html += f'<tr><td><strong>{i}</strong></td>'
             for col, values in self._data.items():
                 kind = values.dtype.kind
-                if kind == 'f':
-                    html += f'<td>{values[i]:10.3f}</td>'
+                v = values[i]
+                if v is None:
+                    html += f'<td>{"None":10}</td>'
+                elif kind == 'f':
+                    html += f'<td>{v:10.3f}</td>'
                 elif kind == 'b':
-                    html += f'<td>{values[i]}</td>'
+                    html += f'<td>{v}</td>'
                 elif kind == 'O':
-                    v = values[i]
-                    if v is None:
-                        v = 'None'
                     html += f'<td>{v:10}</td>'
                 else:
-                    html += f'<td>{values[i]:10}</td>'
+                    html += f'<td>{v:10}</td>'
             html += '</tr>'
 
         if not only_head:
@@ -190,17 +324,17 @@ class DataFrame:
                 html += f'<tr><td><strong>{len(self) + i}</strong></td>'
                 for col, values in self._data.items():
                     kind = values.dtype.kind
-                    if kind == 'f':
-                        html += f'<td>{values[i]:10.3f}</td>'
+                    v = values[i]
+                    if v is None:
+                        html += f'<td>{"None":10}</td>'
+                    elif kind == 'f':
+                        html += f'<td>{v:10.3f}</td>'
                     elif kind == 'b':
-                        html += f'<td>{values[i]}</td>'
+                        html += f'<td>{v}</td>'
                     elif kind == 'O':
-                        v = values[i]
-                        if v is None:
-                            v = 'None'
                         html += f'<td>{v:10}</td>'
                     else:
-                        html += f'<td>{values[i]:10}</td>'
+                        html += f'<td>{v:10}</td>'
                 html += '</tr>'
 
         html += '</tbody></table>'
@@ -211,9 +345,13 @@ class DataFrame:
         """
         Returns
         -------
-        A single 2D NumPy array of the underlying data
+        A single 2D NumPy array of the underlying data. It is a view of the
+        block of a consolidated DataFrame whose columns all share it.
         """
-        return np.column_stack(self._data.values())
+        blocks = self._live_blocks()
+        if len(blocks) == 1 and blocks[0][1] == self.columns:
+            return blocks[0][0].T
+        return np.column_stack(list(self._data.values()))
 
     @property
     def dtypes(self):
@@ -223,12 +361,15 @@ class DataFrame:
         A two-column DataFrame of column names in one column and
         their data type in the other
         """
-        DTYPE_NAME = {'O': 'string', 'i': 'int', 'f': 'float', 'b': 'bool'}
+        DTYPE_NAME = {'O': 'string', 'i': 'int', 'u': 'uint', 'f': 'float', 'b': 'bool',
+                      'M': 'datetime', 'm': 'timedelta'}
         col_arr = np.array(self.columns)
         dtypes = []
         for values in self._data.values():
-            kind = values.dtype.kind
-            dtype = DTYPE_NAME[kind]
+            if isinstance(values, Categorical):
+                dtype = 'category'
+            else:
+                dtype = DTYPE_NAME[values.dtype.kind]
             dtypes.append(dtype)
 
         return DataFrame({'Column Name': col_arr, 'Data Type': np.array(dtypes)})
@@ -251,11 +392,14 @@ class DataFrame:
         """
         # select a single column -> df['colname']
         if isinstance(item, str):
-            return DataFrame({item: self._data[item]})
+            df = DataFrame._from_arrays({item: self._data[item]}, self._selected_blocks([item]))
+            return self._keep_index(self._view(df))
 
         # select multiple columns -> df[['colname1', 'colname2']]
         if isinstance(item, list):
-            return DataFrame({col: self._data[col] for col in item})
+            new_data = {col: self._data[col] for col in item}
+            df = DataFrame._from_arrays(new_data, self._selected_blocks(item))
+            return self._keep_index(self._view(df))
 
         # boolean selection
         if isinstance(item, DataFrame):
@@ -266,10 +410,7 @@ class DataFrame:
             if bool_arr.dtype.kind != 'b':
                 raise TypeError('DataFrame must be a boolean')
 
-            new_data = {}
-            for col, values in self._data.items():
-                new_data[col] = values[bool_arr]
-            return DataFrame(new_data)
+            return self._take_rows(bool_arr, self.columns)
 
         if isinstance(item, tuple):
             return self._getitem_tuple(item)
@@ -320,10 +461,244 @@ class DataFrame:
         else:
             raise TypeError('Column selection must be either an int, string, list, or slice')
 
+        df = self._take_rows(row_selection, col_selection)
+        if isinstance(row_selection, slice):
+            # slices of rows are views of the same arrays
+            return self._view(df)
+        return df
+
+    def _take_rows(self, rows, columns):
+        """
+        Selects rows of the given columns. Blocks whose columns are all
+        selected have their rows selected at once.
+
+        Returns
+        -------
+        A DataFrame
+        """
         new_data = {}
-        for col in col_selection:
-            new_data[col] = self._data[col][row_selection]
-        return DataFrame(new_data)
+        blocks = []
+        for block, cols, _ in self._selected_blocks(columns):
+            blocks.append(_make_block(new_data, block[:, rows], cols))
+        for col in columns:
+            if col not in new_data:
+                new_data[col] = self._data[col][rows]
+        new_data = {col: new_data[col] for col in columns}
+        return self._keep_index(DataFrame._from_arrays(new_data, blocks))
+
+    def set_index(self, col, kind='hash'):
+        """
+        Makes a column the index of a new DataFrame so that `loc` can find
+        rows by their value in it. The column stays in the DataFrame.
+
+        The index sorts the keys once. The 'hash' kind also maps each
+        distinct key to its rows with a dictionary, so finding a key takes
+        constant time. The 'sorted' kind finds keys with a binary search.
+        Both find a range of keys with a binary search. Missing values
+        are never found.
+
+        The index is kept by column selections, `rename`, `drop` and row
+        selections. It is rebuilt the first time `loc` is used after the
+        rows or the values of the column change.
+
+        Parameters
+        ----------
+        col: str of column name
+        kind: 'hash' or 'sorted'
+
+        Returns
+        -------
+        A DataFrame
+        """
+        if not isinstance(col, str):
+            raise TypeError('`col` must be a string')
+        if col not in self._data:
+            raise KeyError(col)
+        if kind not in ('hash', 'sorted'):
+            raise ValueError("`kind` must be either 'hash' or 'sorted'")
+        df = self._view(DataFrame._from_arrays(dict(self._data), self._blocks))
+        df._index = Index(col, kind)._for(self._data[col])
+        return df
+
+    @property
+    def index(self):
+        """
+        Returns
+        -------
+        The name of the index column or None
+        """
+        return None if self._index is None else self._index.column
+
+    @property
+    def loc(self):
+        """
+        Selects rows by their value in the index column, see `set_index`
+
+        A key selects the rows that hold it -> df.loc[key]
+        A list of keys selects the rows of each key in turn -> df.loc[[key1, key2]]
+        A slice selects the rows with keys between its start and stop, both
+        included, in the order of the keys -> df.loc[lo:hi]
+        Columns are selected as with the brackets operator -> df.loc[key, cs]
+
+        Returns
+        -------
+        A LocIndexer
+        """
+        return LocIndexer(self)
+
+    def _get_index(self):
+        # the index built for the current array of its column
+        if self._index is None:
+            raise ValueError('The DataFrame has no index, use `set_index` first')
+        self._index = self._index._for(self._data[self._index.column])
+        return self._index
+
+    def _keep_index(self, df, renames=None):
+        """
+        Gives `df`, made from the arrays of this DataFrame, the same index
+        when it still has the index column. `renames` maps old column names
+        to new ones.
+
+        Returns
+        -------
+        `df`
+        """
+        if self._index is not None:
+            index = self._index
+            if renames and index.column in renames:
+                index = index._renamed(renames[index.column])
+            if index.column in df._data:
+                df._index = index
+        return df
+
+    def consolidate(self):
+        """
+        Stores all the int, float and bool columns of the same data type
+        together as the rows of a single 2-D array, a block. Arithmetic,
+        comparisons, cumulative methods, `abs`, `clip`, `round`, aggregations
+        and row selections then take one NumPy call for each block instead
+        of one for each column, and so do their results. `values` is a
+        view of the block when it holds every column.
+
+        Replacing a column with `__setitem__` leaves the other columns of
+        its block stored one by one again.
+
+        Returns
+        -------
+        A DataFrame
+        """
+        groups = {}
+        for col, values in self._data.items():
+            if isinstance(values, np.ndarray) and values.dtype.kind in 'biuf':
+                groups.setdefault(values.dtype, []).append(col)
+
+        new_data = dict(self._data)
+        blocks = []
+        for dtype, cols in groups.items():
+            block = np.empty((len(cols), len(self)), dtype=dtype)
+            for i, col in enumerate(cols):
+                block[i] = self._data[col]
+            blocks.append(_make_block(new_data, block, cols))
+        df = DataFrame._from_arrays(new_data, blocks)
+        # the blocks are new so they can be written to in place
+        df._owned = {col for _, cols, _ in blocks for col in cols}
+        return self._view(df)
+
+    def _live_blocks(self):
+        """
+        Returns the blocks whose rows are still the arrays of their columns
+        as a list of tuples of the block, its column names and row views
+        """
+        if not self._blocks:
+            return []
+        return [(block, cols, views) for block, cols, views in self._blocks
+                if all(self._data.get(col) is view for col, view in zip(cols, views))]
+
+    def _selected_blocks(self, columns):
+        # the live blocks whose columns are all among `columns`
+        selected = set(columns)
+        return [(block, cols, views) for block, cols, views in self._live_blocks()
+                if selected.issuperset(cols)]
+
+    def _apply_blocks(self, func, kinds='biuf'):
+        """
+        Applies `func` to every block of a data type in `kinds`
+
+        Returns
+        -------
+        A dictionary of the new columns and a list of their blocks
+        """
+        new_data = {}
+        blocks = []
+        for block, cols, _ in self._live_blocks():
+            if block.dtype.kind in kinds:
+                blocks.append(_make_block(new_data, func(block), cols))
+        return new_data, blocks
+
+    def _view(self, df):
+        """
+        Records that `df` shares arrays with this DataFrame. Both join the
+        same family of DataFrames, which is kept with weak references so
+        that it only holds the ones still alive. When both already have a
+        family the smaller one is folded into the larger, so a DataFrame
+        moves to a new family at most a logarithmic number of times.
+
+        Returns
+        -------
+        `df`
+        """
+        if self._family is None:
+            self._family = weakref.WeakValueDictionary({id(self): self})
+        family, other = self._family, df._family
+        if other is family:
+            return df
+        if other is None:
+            df._family = family
+            family[id(df)] = df
+            return df
+        if len(family) < len(other):
+            family, other = other, family
+        for member in list(other.values()):
+            member._family = family
+            family[id(member)] = member
+        return df
+
+    def _shared(self, values):
+        # whether another DataFrame of the family may see `values`
+        if self._family is None:
+            return False
+        buffers = _buffers(values)
+        for df in list(self._family.values()):
+            if df is self:
+                continue
+            for other in df._data.values():
+                for buffer in _buffers(other):
+                    if any(np.may_share_memory(arr, buffer) for arr in buffers):
+                        return True
+        return False
+
+    def _writable(self, col):
+        """
+        Returns the array of a column that can be written to in place.
+
+        Selections share the arrays of the DataFrame they come from, so the
+        array is copied first unless this DataFrame made it and no other
+        DataFrame still alive may see it. A DataFrame never writes to the
+        arrays it was created with. Categoricals, StringArrays and
+        NullableArrays keep their kind, while a ChunkedArray is joined into
+        one array.
+        """
+        values = self._data[col]
+        if col not in self._owned or self._shared(values):
+            if isinstance(values, ColumnArray) and not isinstance(values, ChunkedArray):
+                values = values.copy()
+            else:
+                values = np.array(values)
+            if values.dtype.kind == 'U':
+                values = values.astype('O')
+            self._data[col] = values
+            self._owned.add(col)
+        return values
 
     def _ipython_key_completions_(self):
         # allows for tab completion when doing df['c
@@ -331,6 +706,8 @@ class DataFrame:
 
     def __setitem__(self, key, value):
         # adds a new column or a overwrites an old column
+        if isinstance(key, tuple):
+            return self._setitem_tuple(key, value)
         if not isinstance(key, str):
             raise NotImplementedError('Only able to set a single column')
 
@@ -339,11 +716,15 @@ class DataFrame:
                 raise ValueError('Setting array must be 1D')
             if len(value) != len(self):
                 raise ValueError('Setting array must be same length as DataFrame')
+        elif isinstance(value, ColumnArray):
+            if len(value) != len(self):
+                raise ValueError('Setting array must be same length as DataFrame')
         elif isinstance(value, DataFrame):
             if value.shape[1] != 1:
                 raise ValueError('Setting DataFrame must be one column')
             if len(value) != len(self):
                 raise ValueError('Setting and Calling DataFrames must be the same length')
+            value._view(self)
             value = next(iter(value._data.values()))
         elif isinstance(value, (int, str, float, bool)):
             value = np.repeat(value, len(self))
@@ -355,6 +736,41 @@ class DataFrame:
             value = value.astype('O')
 
         self._data[key] = value
+        self._owned.discard(key)
+
+    def _setitem_tuple(self, key, value):
+        """
+        Sets the values of some rows of one column in place -> df[rs, 'col'] = value
+        where rs can be an int, slice, list of ints or a one-column boolean
+        DataFrame and value a scalar or an array with a value for each row.
+        Other DataFrames that share the column are not changed.
+        """
+        if len(key) != 2:
+            raise ValueError('Pass a two-item tuple of rows and a column name')
+        row_selection, col = key
+        if not isinstance(col, str):
+            raise TypeError('Only able to set the rows of a single column')
+        if col not in self._data:
+            raise KeyError(col)
+        if isinstance(row_selection, DataFrame):
+            if row_selection.shape[1] != 1:
+                raise ValueError('Can only pass a one column DataFrame for selection')
+            row_selection = next(iter(row_selection._data.values()))
+            if row_selection.dtype.kind != 'b':
+                raise TypeError('DataFrame must be a boolean')
+        elif not isinstance(row_selection, (int, list, slice, np.ndarray)):
+            raise TypeError('Row selection must be either an int, slice, list, or DataFrame')
+        if isinstance(value, DataFrame):
+            if value.shape[1] != 1:
+                raise ValueError('Setting DataFrame must be one column')
+            value = next(iter(value._data.values()))
+        if isinstance(value, ColumnArray):
+            value = value.to_numpy()
+
+        self._writable(col)[row_selection] = value
+        if self._index is not None and self._index.column == col:
+            # the array is changed in place so the index is built again
+            self._index = Index(col, self._index.kind)
 
     def head(self, n=5):
         """
@@ -433,7 +849,19 @@ class DataFrame:
         A DataFrame
         """
         new_data = {}
+        block_data = {}
+        for block, cols, _ in self._live_blocks():
+            # one value for each row of the block
+            result = aggfunc(block, axis=1)
+            for i, col in enumerate(cols):
+                block_data[col] = result[i:i + 1]
         for col, values in self._data.items():
+            if col in block_data:
+                new_data[col] = block_data[col]
+                continue
+            if isinstance(values, NullableArray):
+                new_data[col] = values._reduce(aggfunc)
+                continue
             try:
                 val = aggfunc(values)
             except TypeError:
@@ -452,11 +880,15 @@ class DataFrame:
         new_data = {}
         for col, values in self._data.items():
             kind = values.dtype.kind
-            if kind == 'O':
+            if isinstance(values, ColumnArray):
+                new_data[col] = values.isna()
+            elif kind == 'O':
                 new_data[col] = values == None
+            elif kind in 'mM':
+                new_data[col] = np.isnat(values)
             else:
                 new_data[col] = np.isnan(values)
-        return DataFrame(new_data)
+        return DataFrame._from_arrays(new_data)
 
     def count(self):
         """
@@ -472,7 +904,28 @@ class DataFrame:
         for col, values in df._data.items():
             val = length - values.sum()
             new_data[col] = np.array([val])
-        return DataFrame(new_data)
+        return DataFrame._from_arrays(new_data)
+
+    def memory_usage(self, deep=False):
+        """
+        Finds the number of bytes used by the array of each column. Columns
+        that share memory with other DataFrames are counted in full.
+
+        Parameters
+        ----------
+        deep: bool
+            If True, the Python strings referenced by object and
+            Categorical columns are counted too. Otherwise only the
+            pointers to them are.
+
+        Returns
+        -------
+        A DataFrame
+        """
+        new_data = {}
+        for col, values in self._data.items():
+            new_data[col] = np.array([_memory_usage(values, deep)])
+        return DataFrame._from_arrays(new_data)
 
     def unique(self):
         """
@@ -484,7 +937,12 @@ class DataFrame:
         """
         dfs = []
         for col, values in self._data.items():
-            uniques = np.unique(values)
+            if isinstance(values, Categorical):
+                uniques = values.categories[np.unique(values.codes[values.codes >= 0])]
+            elif isinstance(values, NullableArray):
+                uniques = np.unique(values.values[values.valid])
+            else:
+                uniques = np.unique(values)
             dfs.append(DataFrame({col: uniques}))
         if len(dfs) == 1:
             return dfs[0]
@@ -500,7 +958,13 @@ class DataFrame:
         """
         new_data = {}
         for col, value in self._data.items():
-            new_data[col] = np.array([len(np.unique(value))])
+            if isinstance(value, Categorical):
+                n = np.count_nonzero(np.bincount(value.codes + 1)[1:])
+            elif isinstance(value, NullableArray):
+                n = len(np.unique(value.values[value.valid]))
+            else:
+                n = len(np.unique(value))
+            new_data[col] = np.array([n])
         return DataFrame(new_data)
 
     def value_counts(self, normalize=False):
@@ -518,8 +982,18 @@ class DataFrame:
         """
         dfs = []
         for col, values in self._data.items():
-            keys, raw_counts = np.unique(values, return_counts=True)
-            
+            if isinstance(values, Categorical):
+                # missing values are not counted
+                raw_counts = np.bincount(values.codes + 1,
+                                         minlength=len(values.categories) + 1)[1:]
+                keys = values.categories[raw_counts > 0]
+                raw_counts = raw_counts[raw_counts > 0]
+            elif isinstance(values, NullableArray):
+                # missing values are not counted
+                keys, raw_counts = np.unique(values.values[values.valid], return_counts=True)
+            else:
+                keys, raw_counts = np.unique(values, return_counts=True)
+
             order = np.argsort(-raw_counts)
             keys = keys[order]
             raw_counts = raw_counts[order]
@@ -551,7 +1025,11 @@ class DataFrame:
         new_data = {}
         for col, values in self._data.items():
             new_data[columns.get(col, col)] = values
-        return DataFrame(new_data)
+        # the blocks follow their columns to the new names
+        df = DataFrame(new_data)
+        df._blocks = [(block, [columns.get(col, col) for col in cols], views)
+                      for block, cols, views in self._live_blocks()] or None
+        return self._keep_index(self._view(df), columns)
 
     def drop(self, columns):
         """
@@ -573,7 +1051,34 @@ class DataFrame:
         for col, values in self._data.items():
             if col not in columns:
                 new_data[col] = values
-        return DataFrame(new_data)
+        return self._keep_index(self._view(DataFrame._from_arrays(new_data)))
+
+    def append(self, other):
+        """
+        Adds the rows of `other` after the rows of this DataFrame without
+        copying either. The columns that have the same data type in both
+        become ChunkedArrays that keep the arrays of both DataFrames and
+        are joined into one array only when an operation needs it. Adding
+        rows to the result again takes constant time for each column, so
+        a DataFrame built in a loop copies its rows once in all.
+
+        Parameters
+        ----------
+        other: DataFrame with the same columns
+
+        Returns
+        -------
+        A DataFrame
+        """
+        if not isinstance(other, DataFrame):
+            raise TypeError('`other` must be a DataFrame')
+        if other.columns != self.columns:
+            raise ValueError('`other` must have the same columns')
+        new_data = {}
+        for col, values in self._data.items():
+            new_data[col] = _append_values(values, other._data[col])
+        df = other._view(self._view(DataFrame._from_arrays(new_data)))
+        return self._keep_index(df)
 
     #### Non-Aggregation Methods ####
 
@@ -651,7 +1156,7 @@ class DataFrame:
         -------
         A DataFrame
         """
-        return self._non_agg(np.copy)
+        return self._keep_index(self._non_agg(np.copy))
 
     def _non_agg(self, funcname, kinds='bif', **kwargs):
         """
@@ -667,13 +1172,24 @@ class DataFrame:
         A DataFrame
         """
         new_data = {}
+        block_data = {}
+        blocks = []
+        if funcname in BLOCK_FUNCS:
+            axis = {'axis': 1} if BLOCK_FUNCS[funcname] else {}
+            block_data, blocks = self._apply_blocks(
+                lambda block: funcname(block, **axis, **kwargs), kinds)
         for col, values in self._data.items():
-            if values.dtype.kind in kinds:
-                values = funcname(values, **kwargs)
+            if col in block_data:
+                values = block_data[col]
+            elif values.dtype.kind in kinds:
+                if isinstance(values, ColumnArray):
+                    values = values._apply(funcname, **kwargs)
+                else:
+                    values = funcname(values, **kwargs)
             else:
                 values = values.copy()
             new_data[col] = values
-        return DataFrame(new_data)
+        return DataFrame._from_arrays(new_data, blocks)
 
     def diff(self, n=1):
         """
@@ -689,15 +1205,22 @@ class DataFrame:
         A DataFrame
         """
         def func(values):
-            values = values.astype('float')
+            if isinstance(values, NullableArray) and values.dtype.kind == 'i':
+                return values.diff(n)
+            if values.dtype.kind in 'mM':
+                # datetimes differ by timedeltas, which are missing as NaT
+                missing = np.timedelta64('NaT')
+            else:
+                values = values.astype('float')
+                missing = np.NAN
             values_shifted = np.roll(values, n)
             values = values - values_shifted
             if n >= 0:
-                values[:n] = np.NAN
+                values[:n] = missing
             else:
-                values[n:] = np.NAN
+                values[n:] = missing
             return values
-        return self._non_agg(func)
+        return self._non_agg(func, kinds='bifmM')
 
     def pct_change(self, n=1):
         """
@@ -796,10 +1319,26 @@ class DataFrame:
             if other.shape[1] != 1:
                 raise ValueError('`other` must be a one-column DataFrame')
             other = next(iter(other._data.values()))
+            checked = True
+        else:
+            checked = np.ndim(other) == 0
         new_data = {}
+        blocks = []
+        if checked and not isinstance(other, ColumnArray):
+            # a column of `other` lines up with each row of a block
+            block_data, blocks = self._apply_blocks(lambda block: getattr(block, op)(other))
         for col, values in self._data.items():
+            if blocks and col in block_data:
+                new_data[col] = block_data[col]
+                continue
             func = getattr(values, op)
-            new_data[col] = func(other)
+            if values.dtype.kind == 'M':
+                new_data[col] = func(_datetime_operand(other))
+            else:
+                new_data[col] = func(other)
+        if checked:
+            return DataFrame._from_arrays(new_data, blocks)
+        # an array of the wrong shape may have been broadcast
         return DataFrame(new_data)
 
     def sort_values(self, by, asc=True):
@@ -816,9 +1355,9 @@ class DataFrame:
         A DataFrame
         """
         if isinstance(by, str):
-            order = np.argsort(self._data[by])
+            order = np.argsort(_sort_keys(self._data[by]))
         elif isinstance(by, list):
-            cols = [self._data[col] for col in by[::-1]]
+            cols = [_sort_keys(self._data[col]) for col in by[::-1]]
             order = np.lexsort(cols)
         else:
             raise TypeError('`by` must be a str or a list')
@@ -858,9 +1397,24 @@ class DataFrame:
             rows = np.random.choice(np.arange(len(self)), size=n, replace=replace).tolist()
         return self[rows, :]
 
+    def groupby(self, keys):
+        """
+        Groups the rows by the values of one or more columns, see `GroupBy`
+
+        Parameters
+        ----------
+        keys: str or list of column names
+
+        Returns
+        -------
+        A GroupBy
+        """
+        return GroupBy(self, keys)
+
     def pivot_table(self, rows=None, columns=None, values=None, aggfunc=None):
         """
-        Creates a pivot table from one or two 'grouping' columns.
+        Creates a pivot table from one or two 'grouping' columns. The rows
+        are grouped with `groupby`.
 
         Parameters
         ----------
@@ -890,68 +1444,264 @@ class DataFrame:
             else:
                 raise ValueError('You cannot provide `aggfunc` when `values` is None')
 
-        if rows is not None:
-            row_data = self._data[rows]
-
-        if columns is not None:
-            col_data = self._data[columns]
-
         if rows is None:
             pivot_type = 'columns'
         elif columns is None:
             pivot_type = 'rows'
         else:
             pivot_type = 'all'
-        
-        from collections import defaultdict
-        d = defaultdict(list)
-        if pivot_type == 'columns':
-            for group, val in zip(col_data, val_data):
-                d[group].append(val)
-        elif pivot_type == 'rows':
-            for group, val in zip(row_data, val_data):
-                d[group].append(val)
-        else:
-            for group1, group2, val in zip(row_data, col_data, val_data):
-                d[(group1, group2)].append(val)
 
-        agg_dict = {}
-        for group, vals in d.items():
-            arr = np.array(vals)
-            func = getattr(np, aggfunc)
-            agg_dict[group] = func(arr)
+        groups = self.groupby([key for key in (rows, columns) if key is not None])
+        agg = groups._aggregate(val_data, aggfunc)
 
         new_data = {}
         if pivot_type == 'columns':
-            for col_name in sorted(agg_dict):
-                value = agg_dict[col_name]
-                new_data[col_name] = np.array([value])
+            for i, col_name in enumerate(groups._labels(0).tolist()):
+                new_data[col_name] = agg[i:i + 1]
         elif pivot_type == 'rows':
-            row_array = np.array(list(agg_dict.keys()))
-            val_array = np.array(list(agg_dict.values()))
-
-            order = np.argsort(row_array)
-            new_data[rows] = row_array[order]
-            new_data[aggfunc] = val_array[order]
+            new_data[rows] = groups._labels(0)
+            new_data[aggfunc] = agg
         else:
-            row_set = set()
-            col_set = set()
-            for group in agg_dict:
-                row_set.add(group[0])
-                col_set.add(group[1])
-            row_list = sorted(row_set)
-            col_list = sorted(col_set)
-            new_data = {}
-            new_data[rows] = np.array(row_list)
-            for col in col_list:
-                new_vals = []
-                for row in row_list:
-                    new_val = agg_dict.get((row, col), np.nan)
-                    new_vals.append(new_val)
-                new_data[col] = np.array(new_vals)
+            # each group is one cell of a table of the row and column values
+            row_codes, row_pos = np.unique(groups._group_codes[0], return_inverse=True)
+            col_codes, col_pos = np.unique(groups._group_codes[1], return_inverse=True)
+            shape = len(col_codes), len(row_codes)
+            present = True
+            if isinstance(agg, NullableArray):
+                # groups without a value are empty cells too
+                present, agg = agg.valid, agg.values
+            table = np.empty(shape, dtype=agg.dtype)
+            table[col_pos, row_pos] = agg
+            filled = np.zeros(shape, dtype='bool')
+            filled[col_pos, row_pos] = present
+            new_data[rows] = groups._uniques[0][row_codes]
+            for col, values, present in zip(groups._uniques[1][col_codes].tolist(),
+                                            table, filled):
+                # only the columns with an empty cell hold missing values
+                if not present.all():
+                    kind = values.dtype.kind
+                    if kind == 'O':
+                        values[~present] = None
+                    elif kind in 'mM':
+                        values[~present] = np.datetime64('NaT')
+                    else:
+                        values = values.astype('float64')
+                        values[~present] = np.nan
+                new_data[col] = values
         return DataFrame(new_data)
 
-    def _add_docs(self):
+    async def apivot_table(self, rows=None, columns=None, values=None, aggfunc=None,
+                           executor=None):
+        """
+        Creates a pivot table without blocking the event loop. The work runs
+        in `executor` and the result is awaited. See `pivot_table`.
+
+        Parameters
+        ----------
+        rows, columns, values, aggfunc: see `pivot_table`
+        executor: concurrent.futures.Executor
+            Optional. A thread or process pool to run the work in. Defaults
+            to the thread pool of the event loop. The DataFrame is copied
+            to a process pool.
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return await _run_in_executor(executor, self.pivot_table, rows=rows,
+                                      columns=columns, values=values, aggfunc=aggfunc)
+
+    def _with_source(self, col, fn):
+        # adds a column holding the file location every row came from
+        new_data = dict(self._data)
+        new_data[col] = _source_values(fn, len(self))
+        return self._view(DataFrame(new_data))
+
+    def to_csv(self, path, chunksize=100_000, compression='infer'):
+        """
+        Writes the DataFrame to a comma-separated value file
+
+        Each column of a chunk of rows is formatted in bulk by NumPy and the
+        fields are packed into lines with array operations before being
+        written through a large buffer. Values are not quoted, so a
+        ValueError is raised for strings that hold a comma, a double
+        quote, a line break or a null byte. Missing strings are written as
+        empty fields.
+
+        Parameters
+        ----------
+        path: string of file location
+        chunksize: int
+            Number of rows formatted at once. Larger chunks are faster but
+            use more memory.
+        compression: 'infer', 'gzip', 'bz2', 'xz' or None
+            Compress the file while it is written. 'infer' uses the file
+            extension.
+
+        Returns
+        -------
+        None
+        """
+        if not isinstance(chunksize, int):
+            raise TypeError('`chunksize` must be an int')
+        if chunksize < 1:
+            raise ValueError('`chunksize` must be a positive int')
+
+        if compression == 'infer':
+            extension = os.path.splitext(str(path))[1].lower()
+            compression = COMPRESSION_EXTENSIONS.get(extension)
+        elif compression is not None and compression not in COMPRESSION_MAGIC:
+            raise ValueError(f'`compression` must be one of {", ".join(COMPRESSION_MAGIC)}, '
+                             "'infer' or None")
+
+        if compression is None:
+            f = open(path, 'wb', buffering=1 << 20)
+        else:
+            f = _open_compressed(path, compression, 'wb')
+        with f:
+            f.write((','.join(self.columns) + '\n').encode('utf-8'))
+            for start in range(0, len(self), chunksize):
+                fields = []
+                for col, values in self._data.items():
+                    try:
+                        fields.append(_format_field_bytes(values[start:start + chunksize]))
+                    except ValueError:
+                        raise ValueError(f'Column {col!r} has strings with a comma, quote, '
+                                         'line break or null byte, which cannot be '
+                                         'written without quotes') from None
+                f.write(_pack_lines(fields))
+
+    def to_cub(self, path, row_group_size=None):
+        """
+        Writes the DataFrame to a binary columnar file that `read_cub`
+        can load without parsing.
+
+        The rows are split into row groups. Each column of a row group is
+        stored as one buffer aligned to 64 bytes. Numeric and boolean
+        columns hold the raw array data. String columns hold an array of
+        int64 offsets followed by the UTF-8 bytes of every string, plus a
+        boolean array marking missing values when there are any. The values
+        of a NullableArray are stored with their packed validity bitmap. A JSON
+        footer records the location of each buffer along with the minimum,
+        maximum and number of missing values of each column in each row
+        group so that readers can skip groups that cannot match a filter.
+
+        Parameters
+        ----------
+        path: string of file location
+        row_group_size: int
+            Optional. Number of rows in each row group. By default all rows
+            are stored in a single group.
+
+        Returns
+        -------
+        None
+        """
+        if row_group_size is None:
+            row_group_size = max(len(self), 1)
+        elif not isinstance(row_group_size, int):
+            raise TypeError('`row_group_size` must be an int')
+        elif row_group_size < 1:
+            raise ValueError('`row_group_size` must be a positive int')
+
+        columns = []
+        for col, values in self._data.items():
+            if values.dtype.kind == 'O':
+                columns.append({'name': col, 'dtype': 'string'})
+            elif isinstance(values, NullableArray):
+                columns.append({'name': col, 'dtype': values.dtype.str, 'nullable': True})
+            else:
+                columns.append({'name': col, 'dtype': values.dtype.str})
+
+        row_groups = []
+        with open(path, 'wb') as f:
+            f.write(CUB_MAGIC)
+            for start in range(0, len(self), row_group_size):
+                group = []
+                for col, values in self._data.items():
+                    values = values[start:start + row_group_size]
+                    if values.dtype.kind == 'O':
+                        offsets, data, nulls = _string_buffers(values, col)
+                        meta = {'offsets': _write_buffer(f, offsets),
+                                'data': _write_buffer(f, data)}
+                        if nulls.any():
+                            meta['nulls'] = _write_buffer(f, nulls)
+                    elif isinstance(values, NullableArray):
+                        meta = {'data': _write_buffer(f, values.values),
+                                'validity': _write_buffer(f, values.validity)}
+                    else:
+                        meta = {'data': _write_buffer(f, values)}
+                    meta['stats'] = _column_stats(values)
+                    group.append(meta)
+                num_rows = min(row_group_size, len(self) - start)
+                row_groups.append({'num_rows': num_rows, 'columns': group})
+
+            footer = {'version': CUB_VERSION, 'num_rows': len(self),
+                      'columns': columns, 'row_groups': row_groups}
+            footer = json.dumps(footer).encode('utf-8')
+            f.write(footer)
+            f.write(len(footer).to_bytes(8, 'little'))
+            f.write(CUB_MAGIC)
+
+    def to_sql(self, table, connection, if_exists='fail', chunksize=100_000):
+        """
+        Writes the DataFrame to a table of a SQLite database
+
+        All rows are inserted with `executemany` inside a single transaction
+        so that nothing is written if an insert fails. The table is created
+        with INTEGER, REAL and TEXT columns unless rows are appended to an
+        existing table. Datetimes are written as ISO 8601 TEXT and
+        timedeltas as INTEGER counts of their unit. Missing values are
+        written as NULL.
+
+        Parameters
+        ----------
+        table: str of table name
+        connection: sqlite3.Connection or string of database file location
+            A file location opens a connection that is closed before
+            returning.
+        if_exists: str
+            What to do when the table already exists. One of 'fail',
+            'replace' or 'append'.
+        chunksize: int
+            Number of rows converted and passed to `executemany` at once
+
+        Returns
+        -------
+        None
+        """
+        if not isinstance(table, str):
+            raise TypeError('`table` must be a string')
+        if if_exists not in ('fail', 'replace', 'append'):
+            raise ValueError("`if_exists` must be one of 'fail', 'replace' or 'append'")
+        if not isinstance(chunksize, int):
+            raise TypeError('`chunksize` must be an int')
+        if chunksize < 1:
+            raise ValueError('`chunksize` must be a positive integer')
+
+        name = _sql_name(table)
+        insert = (f'INSERT INTO {name} VALUES '
+                  f'({", ".join("?" * len(self._data))})')
+        with _sql_connection(connection) as con:
+            exists = con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                                 "AND name = ?", (table,)).fetchone() is not None
+            if exists and if_exists == 'fail':
+                raise ValueError(f'Table {table!r} already exists')
+
+            with con:
+                if exists and if_exists == 'replace':
+                    con.execute(f'DROP TABLE {name}')
+                if not exists or if_exists == 'replace':
+                    col_defs = ', '.join(f'{_sql_name(col)} {SQL_TYPES[values.dtype.kind]}'
+                                         for col, values in self._data.items())
+                    con.execute(f'CREATE TABLE {name} ({col_defs})')
+                for start in range(0, len(self), chunksize):
+                    cols = [_sql_values(values[start:start + chunksize])
+                            for values in self._data.values()]
+                    con.executemany(insert, zip(*cols))
+
+    @classmethod
+    def _add_docs(cls):
         agg_names = ['min', 'max', 'mean', 'median', 'sum', 'var',
                      'std', 'any', 'all', 'argmax', 'argmin']
         agg_doc = \
@@ -963,7 +1713,10 @@ class DataFrame:
         DataFrame
         """
         for name in agg_names:
-            getattr(DataFrame, name).__doc__ = agg_doc.format(name)
+            getattr(cls, name).__doc__ = agg_doc.format(name)
+
+
+DataFrame._add_docs()
 
 
 class StringMethods:
@@ -1060,6 +1813,17 @@ class StringMethods:
         old_values = self._df._data[col]
         if old_values.dtype.kind != 'O':
             raise TypeError('The `str` accessor only works with string columns')
+        if isinstance(old_values, StringArray) and method in ASCII_METHODS and \
+                old_values.is_ascii():
+            return DataFrame({col: ASCII_METHODS[method](old_values)})
+        if isinstance(old_values, Categorical):
+            # the method is called once for each category, code -1 picks
+            # the None appended for missing values
+            new_values = [method(val, *args) for val in old_values.categories]
+            if (old_values.codes < 0).any():
+                new_values.append(None)
+            arr = np.array(new_values)[old_values.codes]
+            return DataFrame({col: arr})
         new_values = []
         for val in old_values:
             if val is None:
@@ -1071,34 +1835,3180 @@ class StringMethods:
         return DataFrame({col: arr})
 
 
-def read_csv(fn):
+class DateTimeMethods:
+
+    def __init__(self, df):
+        self._df = df
+
+    def year(self, col):
+        return self._dt_component(col, lambda values: values.astype('M8[Y]').view('int64') + 1970)
+
+    def month(self, col):
+        return self._dt_component(col, lambda values: _unit_offset(values, 'M', 'Y') + 1)
+
+    def day(self, col):
+        return self._dt_component(col, lambda values: _unit_offset(values, 'D', 'M') + 1)
+
+    def dayofyear(self, col):
+        return self._dt_component(col, lambda values: _unit_offset(values, 'D', 'Y') + 1)
+
+    def weekday(self, col):
+        # 1970-01-01 was a Thursday and Monday is 0
+        return self._dt_component(col, lambda values: (values.astype('M8[D]').view('int64') + 3) % 7)
+
+    def hour(self, col):
+        return self._dt_component(col, lambda values: _unit_offset(values, 'h', 'D'))
+
+    def minute(self, col):
+        return self._dt_component(col, lambda values: _unit_offset(values, 'm', 'h'))
+
+    def second(self, col):
+        return self._dt_component(col, lambda values: _unit_offset(values, 's', 'm'))
+
+    def date(self, col):
+        return self._dt_component(col, lambda values: values.astype('M8[D]'))
+
+    def floor(self, col, unit):
+        """
+        Rounds each datetime down to a whole `unit` such as 'D' or 'h'
+        """
+        return self._dt_component(col, lambda values: values.astype(f'M8[{unit}]'))
+
+    def _dt_component(self, col, method):
+        """
+        Computes a component of every datetime at once with NumPy datetime
+        arithmetic. Integer components of missing datetimes are NaN.
+        """
+        values = self._df._data[col]
+        if values.dtype.kind != 'M':
+            raise TypeError('The `dt` accessor only works with datetime columns')
+        new_values = method(values)
+        missing = np.isnat(values)
+        if new_values.dtype.kind == 'i' and missing.any():
+            new_values = new_values.astype('float')
+            new_values[missing] = np.nan
+        return DataFrame({col: new_values})
+
+
+class GroupBy:
     """
-    Read in a comma-separated value file as a DataFrame
+    The rows of a DataFrame grouped by the values of one or more key
+    columns. Create it with `DataFrame.groupby`.
+
+    Each key column is mapped to integer codes once and the codes of
+    several keys are combined into the id of each row's group. Groups are
+    numbered from 0 in sorted order of their keys. Rows with a missing key
+    belong to no group. Aggregations then work on every group at once with
+    `np.bincount` or with the `reduceat` method of a ufunc over the rows
+    sorted by group. Other NumPy functions are called once for each group.
+    The missing values of a NullableArray are skipped.
+
+    Select the columns to aggregate with brackets -> df.groupby('a')[['b', 'c']]
 
     Parameters
     ----------
-    fn: string of file location
-
-    Returns
-    -------
-    A DataFrame
+    df: DataFrame
+    keys: str or list of column names
     """
-    from collections import defaultdict
-    values = defaultdict(list)
-    with open(fn) as f:
-        header = f.readline()
-        column_names = header.strip('\n').split(',')
-        for line in f:
-            vals = line.strip('\n').split(',')
-            for val, name in zip(vals, column_names):
+
+    def __init__(self, df, keys):
+        if isinstance(keys, str):
+            keys = [keys]
+        elif not isinstance(keys, list) or not keys:
+            raise TypeError('`keys` must be a string or a non-empty list of column names')
+        for key in keys:
+            if key not in df._data:
+                raise KeyError(key)
+
+        ids = None
+        self._group_codes = []
+        self._uniques = []
+        for key in keys:
+            codes, uniques = _key_codes(df._data[key])
+            if ids is None:
+                ids, used = _dense_ids(codes, len(uniques))
+                self._group_codes = [used]
+            else:
+                # a group of the previous keys and a value of this key
+                combined = np.where((ids < 0) | (codes < 0), -1, ids * len(uniques) + codes)
+                ids, used = _dense_ids(combined, self.ngroups * len(uniques))
+                group, code = np.divmod(used, len(uniques))
+                self._group_codes = [codes[group] for codes in self._group_codes] + [code]
+            self._uniques.append(uniques)
+            self.ngroups = len(used)
+
+        self._df = df
+        self.keys = keys
+        self._columns = [col for col in df.columns if col not in keys]
+        self._ids = ids
+        # rows with a missing key are left out of every aggregation
+        self._grouped = None if (ids >= 0).all() else ids >= 0
+        self._counts = np.bincount(self._group_ids(), minlength=self.ngroups)
+        self._order = None
+
+    def __getitem__(self, columns):
+        if isinstance(columns, str):
+            columns = [columns]
+        elif not isinstance(columns, list):
+            raise TypeError('Select the columns with a string or a list')
+        for col in columns:
+            if col not in self._df._data:
+                raise KeyError(col)
+        groups = GroupBy.__new__(GroupBy)
+        groups.__dict__.update(self.__dict__)
+        groups._columns = columns
+        return groups
+
+    def __len__(self):
+        return self.ngroups
+
+    def size(self):
+        """
+        Counts the rows of each group
+
+        Returns
+        -------
+        A DataFrame of the keys and a 'size' column
+        """
+        new_data = self._key_data()
+        new_data['size'] = self._counts.copy()
+        return DataFrame._from_arrays(new_data)
+
+    def count(self):
+        return self.agg('count')
+
+    def sum(self):
+        return self.agg('sum')
+
+    def prod(self):
+        return self.agg('prod')
+
+    def mean(self):
+        return self.agg('mean')
+
+    def median(self):
+        return self.agg('median')
+
+    def min(self):
+        return self.agg('min')
+
+    def max(self):
+        return self.agg('max')
+
+    def var(self):
+        return self.agg('var')
+
+    def std(self):
+        return self.agg('std')
+
+    def any(self):
+        return self.agg('any')
+
+    def all(self):
+        return self.agg('all')
+
+    def first(self):
+        return self.agg('first')
+
+    def last(self):
+        return self.agg('last')
+
+    def agg(self, aggfunc):
+        """
+        Aggregates the columns of each group. Columns that the function
+        cannot aggregate are left out.
+
+        Parameters
+        ----------
+        aggfunc: str or dict
+            'count', 'first', 'last' or the name of a NumPy function such
+            as 'sum', 'mean' or 'max', or a dictionary mapping column names
+            to such names to aggregate only those columns.
+
+        Returns
+        -------
+        A DataFrame of the keys followed by the aggregated columns
+        """
+        if isinstance(aggfunc, str):
+            aggfuncs = dict.fromkeys(self._columns, aggfunc)
+            skip_errors = True
+        elif isinstance(aggfunc, dict):
+            aggfuncs = aggfunc
+            skip_errors = False
+        else:
+            raise TypeError('`aggfunc` must be a string or a dictionary')
+
+        new_data = self._key_data()
+        for col, func in aggfuncs.items():
+            if col not in self._df._data:
+                raise KeyError(col)
+            try:
+                new_data[col] = self._aggregate(self._df._data[col], func)
+            except TypeError:
+                if not skip_errors:
+                    raise
+        return DataFrame(new_data)
+
+    def _key_data(self):
+        return {key: self._labels(i) for i, key in enumerate(self.keys)}
+
+    def _labels(self, i):
+        # the value of the ith key of each group
+        return self._uniques[i][self._group_codes[i]]
+
+    def _group_ids(self, values=None):
+        # the group ids, and values, of the rows that belong to a group
+        if self._grouped is None:
+            return self._ids if values is None else (self._ids, values)
+        ids = self._ids[self._grouped]
+        return ids if values is None else (ids, values[self._grouped])
+
+    def _sorted(self):
+        """
+        Returns the rows that belong to a group sorted by group, keeping
+        the order of the rows within each group, and the position of the
+        first row of each group
+        """
+        if self._order is None:
+            # NumPy sorts ints of up to 16 bits in linear time
+            ids = self._ids
+            if self.ngroups < np.iinfo('int16').max:
+                ids = ids.astype('int16')
+            order = np.argsort(ids, kind='stable')
+            # rows without a group have an id of -1 and come first
+            self._order = order[len(order) - self._counts.sum():]
+            self._starts = np.cumsum(self._counts) - self._counts
+        return self._order, self._starts
+
+    def _aggregate(self, values, aggfunc):
+        """
+        Aggregates the values of one column in every group
+
+        Returns
+        -------
+        An array with a value for each group
+        """
+        if not isinstance(aggfunc, str):
+            raise TypeError('The aggregation function must be a string')
+        if aggfunc == 'size':
+            return self._counts.copy()
+        if isinstance(values, NullableArray):
+            return self._aggregate_valid(values, aggfunc)
+        if isinstance(values, ColumnArray):
+            values = values.to_numpy()
+        kind = values.dtype.kind
+        if aggfunc == 'count':
+            present = self._ids >= 0
+            if kind == 'O':
+                present &= values != None
+            elif kind == 'f':
+                present &= ~np.isnan(values)
+            elif kind in 'mM':
+                present &= ~np.isnat(values)
+            return np.bincount(self._ids[present], minlength=self.ngroups)
+        if aggfunc not in ('first', 'last') and not hasattr(np, aggfunc):
+            raise ValueError(f'{aggfunc!r} is not a NumPy function')
+
+        if aggfunc in ('sum', 'mean', 'var', 'std') and kind in 'biuf' and self.ngroups:
+            # weighted counts add up the values of each group without sorting
+            ids, group_values = self._group_ids(values)
+            exact = kind == 'f'
+            if not exact:
+                # the bound is found with Python ints, which cannot overflow
+                largest = max(-int(group_values.min(initial=0)),
+                              int(group_values.max(initial=0)))
+                exact = largest * len(ids) < 2 ** 53
+            if exact:
+                sums = np.bincount(ids, group_values, minlength=self.ngroups)
+                if aggfunc == 'sum':
+                    dtype = values.dtype if kind == 'f' else np.add.reduce(values[:0]).dtype
+                    return sums.astype(dtype)
+                means = sums / self._counts
+                if aggfunc == 'mean':
+                    return means.astype(values.dtype) if kind == 'f' else means
+                deviations = group_values - means[ids]
+                variances = np.bincount(ids, deviations * deviations, minlength=self.ngroups)
+                variances /= self._counts
+                return variances if aggfunc == 'var' else np.sqrt(variances)
+
+        order, starts = self._sorted()
+        counts = self._counts
+        values = values[order]
+        if self.ngroups == 0:
+            return values
+        if aggfunc == 'first':
+            return values[starts]
+        if aggfunc == 'last':
+            return values[starts + counts - 1]
+        if aggfunc in GROUP_UFUNCS:
+            dtype = None
+            if aggfunc in ('sum', 'prod') and kind in 'biu':
+                # small ints are summed as int64 like np.sum does
+                dtype = np.add.reduce(values[:0]).dtype
+            return GROUP_UFUNCS[aggfunc].reduceat(values, starts, dtype=dtype)
+        if aggfunc in ('mean', 'var', 'std'):
+            dtype = 'float64' if kind in 'biu' else None
+            means = np.add.reduceat(values, starts, dtype=dtype) / counts
+            if aggfunc == 'mean':
+                return means
+            deviations = values - np.repeat(means, counts)
+            variances = np.add.reduceat(deviations * deviations, starts) / counts
+            return variances if aggfunc == 'var' else np.sqrt(variances)
+        if aggfunc == 'median':
+            # the values are sorted within each group
+            group = np.repeat(np.arange(self.ngroups), counts)
+            values = values[np.lexsort((values, group))]
+            medians = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+            if kind == 'f':
+                # NaN is sorted last so a group with NaN ends with it
+                medians[np.isnan(values[starts + counts - 1])] = np.nan
+            return medians
+        func = getattr(np, aggfunc)
+        return np.array([func(group) for group in np.split(values, starts[1:])])
+
+    def _aggregate_valid(self, values, aggfunc):
+        """
+        Aggregates the values of a NullableArray in the rows that hold one,
+        keeping their data type. A group without any value is 0 for 'sum'
+        and 'count', NaN when the result is float and missing otherwise.
+
+        Returns
+        -------
+        An array or a NullableArray with a value for each group
+        """
+        ids = np.where(values.valid, self._ids, -1)
+        counts = np.bincount(ids[ids >= 0], minlength=self.ngroups)
+        nonempty = counts > 0
+        if not nonempty.all():
+            # groups without values are left out and filled in afterwards
+            new_ids = np.cumsum(nonempty) - 1
+            ids = np.where(ids >= 0, new_ids[ids], -1)
+
+        groups = GroupBy.__new__(GroupBy)
+        groups.__dict__.update(self.__dict__)
+        groups.ngroups = np.count_nonzero(nonempty)
+        groups._ids = ids
+        groups._grouped = None if (ids >= 0).all() else ids >= 0
+        groups._counts = counts[nonempty]
+        groups._order = None
+        result = groups._aggregate(values.values, aggfunc)
+        if groups.ngroups == self.ngroups:
+            return result
+
+        if aggfunc in ('sum', 'count'):
+            filled = np.zeros(self.ngroups, dtype=result.dtype)
+        elif result.dtype.kind in 'iub':
+            filled = np.zeros(self.ngroups, dtype=result.dtype)
+            filled[nonempty] = result
+            return NullableArray(filled, nonempty)
+        else:
+            filled = np.full(self.ngroups, np.nan, dtype=result.dtype)
+        filled[nonempty] = result
+        return filled
+
+
+class Index:
+    """
+    Finds the rows that hold a key in the index column of a DataFrame.
+    It is built for one array of the column, whose keys are sorted along
+    with their row numbers. The 'hash' kind also maps each distinct key to
+    the span of its rows in the sorted keys.
+
+    Parameters
+    ----------
+    column: str of column name
+    kind: 'hash' or 'sorted'
+    """
+
+    def __init__(self, column, kind='hash'):
+        self.column = column
+        self.kind = kind
+        self._values = None
+
+    def _for(self, values):
+        # this index if it was built for `values` or a new one that is
+        if values is self._values:
+            return self
+        index = Index(self.column, self.kind)
+        index._build(values)
+        return index
+
+    def _renamed(self, column):
+        # the same lookup structures under another column name
+        index = Index(column, self.kind)
+        if self._values is not None:
+            index._keys, index._rows = self._keys, self._rows
+            index._table, index._values = self._table, self._values
+        return index
+
+    def _build(self, values):
+        arr = values.to_numpy() if isinstance(values, ColumnArray) else values
+        kind = arr.dtype.kind
+        if kind == 'O':
+            present = arr != None
+        elif kind == 'f':
+            present = ~np.isnan(arr)
+        elif kind in 'mM':
+            present = ~np.isnat(arr)
+        else:
+            present = np.ones(len(arr), dtype='bool')
+        keys = arr[present]
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._rows = np.flatnonzero(present)[order]
+        self._table = None
+        if self.kind == 'hash':
+            # the rows of a key are next to each other in `_rows`
+            starts = np.flatnonzero(np.r_[True, self._keys[1:] != self._keys[:-1]])
+            if len(self._keys) == 0:
+                starts = starts[:0]
+            stops = np.append(starts[1:], len(self._keys))
+            self._table = dict(zip(self._keys[starts].tolist(),
+                                   zip(starts.tolist(), stops.tolist())))
+        self._values = values
+
+    def _key(self, key):
+        # datetime keys are converted to the unit of the column
+        if self._keys.dtype.kind == 'M':
+            dt_key = _datetime_operand(key)
+            if not isinstance(dt_key, np.datetime64):
+                raise KeyError(key)
+            converted = dt_key.astype(self._keys.dtype)
+            if converted != dt_key:
+                raise KeyError(key)
+            return converted
+        return key
+
+    def get_loc(self, key):
+        """
+        Finds the rows that hold `key`
+
+        Returns
+        -------
+        An int array of row numbers in increasing order
+        """
+        key = self._key(key)
+        try:
+            if self._table is not None:
+                lookup = key.tolist() if isinstance(key, np.generic) else key
+                start, stop = self._table[lookup]
+            else:
+                start = np.searchsorted(self._keys, key, 'left')
+                stop = np.searchsorted(self._keys, key, 'right')
+        except (KeyError, TypeError):
+            raise KeyError(key) from None
+        if start == stop:
+            raise KeyError(key)
+        return self._rows[start:stop]
+
+    def slice_locs(self, start=None, stop=None):
+        """
+        Finds the rows with keys from `start` to `stop`, both included.
+        None leaves that end open.
+
+        Returns
+        -------
+        An int array of row numbers in order of their keys
+        """
+        try:
+            low = 0 if start is None else \
+                np.searchsorted(self._keys, self._key(start), 'left')
+            high = len(self._keys) if stop is None else \
+                np.searchsorted(self._keys, self._key(stop), 'right')
+        except TypeError:
+            raise TypeError(f'The index column {self.column!r} cannot be compared '
+                            f'with {start!r} and {stop!r}') from None
+        return self._rows[low:max(low, high)]
+
+
+class LocIndexer:
+
+    def __init__(self, df):
+        self._df = df
+
+    def __getitem__(self, item):
+        if isinstance(item, tuple):
+            if len(item) != 2:
+                raise ValueError('Pass either keys or a two-item tuple of keys and '
+                                 'columns to `loc`')
+            rows, columns = item
+        else:
+            rows, columns = item, None
+
+        index = self._df._get_index()
+        if isinstance(rows, slice):
+            if rows.step is not None:
+                raise ValueError('`loc` cannot select a slice with a step')
+            positions = index.slice_locs(rows.start, rows.stop)
+        elif isinstance(rows, list):
+            positions = [index.get_loc(key) for key in rows]
+            positions = np.concatenate(positions) if positions else np.array([], dtype='int64')
+        else:
+            positions = index.get_loc(rows)
+
+        df = self._df._take_rows(positions, self._df.columns)
+        if columns is not None:
+            df = df[:, columns]
+        return df
+
+
+class ColumnArray:
+    """
+    Base class of the columns that are not stored as a single NumPy array.
+
+    Subclasses implement `__len__`, `take` to select rows, `to_numpy` to
+    convert themselves to a NumPy array and `nbytes`, the size of their
+    buffers. Their `dtype` is the data type of
+    that array so that DataFrame methods treat them like any other column
+    of that kind. Operations without a faster path for the subclass
+    convert the column with `to_numpy`. Subclasses that can be written to
+    in place implement `__setitem__`.
+    """
+    ndim = 1
+
+    def __len__(self):
+        raise NotImplementedError
+
+    @property
+    def shape(self):
+        return len(self),
+
+    def take(self, item):
+        raise NotImplementedError
+
+    def to_numpy(self):
+        raise NotImplementedError
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.to_numpy()
+        if dtype is not None:
+            arr = arr.astype(dtype)
+        return arr
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self.to_numpy()[item]
+        return self.take(item)
+
+    def __iter__(self):
+        return iter(self.to_numpy())
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_numpy()!r})'
+
+    def copy(self):
+        return self.take(np.arange(len(self)))
+
+    def astype(self, dtype):
+        return self.to_numpy().astype(dtype)
+
+    def tolist(self):
+        return self.to_numpy().tolist()
+
+    def isna(self):
+        return DataFrame({'a': self.to_numpy()}).isna()._data['a']
+
+    def __add__(self, other):
+        return self._oper('__add__', other)
+
+    def __radd__(self, other):
+        return self._oper('__radd__', other)
+
+    def __sub__(self, other):
+        return self._oper('__sub__', other)
+
+    def __rsub__(self, other):
+        return self._oper('__rsub__', other)
+
+    def __mul__(self, other):
+        return self._oper('__mul__', other)
+
+    def __rmul__(self, other):
+        return self._oper('__rmul__', other)
+
+    def __truediv__(self, other):
+        return self._oper('__truediv__', other)
+
+    def __rtruediv__(self, other):
+        return self._oper('__rtruediv__', other)
+
+    def __floordiv__(self, other):
+        return self._oper('__floordiv__', other)
+
+    def __rfloordiv__(self, other):
+        return self._oper('__rfloordiv__', other)
+
+    def __pow__(self, other):
+        return self._oper('__pow__', other)
+
+    def __rpow__(self, other):
+        return self._oper('__rpow__', other)
+
+    def __gt__(self, other):
+        return self._oper('__gt__', other)
+
+    def __lt__(self, other):
+        return self._oper('__lt__', other)
+
+    def __ge__(self, other):
+        return self._oper('__ge__', other)
+
+    def __le__(self, other):
+        return self._oper('__le__', other)
+
+    def __ne__(self, other):
+        return self._oper('__ne__', other)
+
+    def __eq__(self, other):
+        return self._oper('__eq__', other)
+
+    __hash__ = None
+
+    def _oper(self, op, other):
+        if isinstance(other, ColumnArray):
+            other = other.to_numpy()
+        return getattr(self.to_numpy(), op)(other)
+
+    def _apply(self, func, **kwargs):
+        return func(self.to_numpy(), **kwargs)
+
+
+class ChunkedArray(ColumnArray):
+    """
+    A column stored as a list of NumPy arrays of the same data type, the
+    chunks, presented as a single array. `append` adds a chunk without
+    copying any data. The chunks are joined into one array the first time
+    an operation needs the whole column, which is then kept.
+
+    ChunkedArrays made by appending to one another share their list of
+    chunks and each one sees only the first chunks of the list it had when
+    it was made. Appending to the one that sees the whole list adds to the
+    list in place and appending to any other copies its part of the list.
+
+    Parameters
+    ----------
+    chunks: list of 1-D NumPy arrays of the same data type
+    """
+
+    def __init__(self, chunks):
+        chunks = [np.asarray(chunk) for chunk in chunks]
+        if not chunks:
+            raise ValueError('A ChunkedArray needs at least one chunk')
+        for chunk in chunks:
+            if chunk.ndim != 1:
+                raise ValueError('Each chunk must be a 1-D NumPy array')
+            if chunk.dtype != chunks[0].dtype:
+                raise TypeError('All chunks must have the same data type')
+        self._init(chunks, len(chunks), sum(map(len, chunks)))
+
+    def _init(self, chunks, nchunks, length):
+        self._chunks = chunks
+        self._nchunks = nchunks
+        self._length = length
+        self._array = None
+
+    @property
+    def chunks(self):
+        return self._chunks[:self._nchunks]
+
+    @property
+    def dtype(self):
+        return self._chunks[0].dtype
+
+    @property
+    def nbytes(self):
+        return sum(chunk.nbytes for chunk in self.chunks)
+
+    def __len__(self):
+        return self._length
+
+    def append(self, values):
+        """
+        Adds `values`, an array of the same data type, as the last chunk
+
+        Returns
+        -------
+        A new ChunkedArray
+        """
+        values = np.asarray(values)
+        if values.ndim != 1:
+            raise ValueError('`values` must be a 1-D NumPy array')
+        if values.dtype != self.dtype:
+            raise TypeError('`values` must have the same data type as the chunks')
+        if self._array is not None and self._nchunks > 1:
+            # start from the joined array instead of joining again later
+            chunks = [self._array]
+        elif len(self._chunks) == self._nchunks:
+            chunks = self._chunks
+        else:
+            chunks = self._chunks[:self._nchunks]
+        chunks.append(values)
+        arr = ChunkedArray.__new__(ChunkedArray)
+        arr._init(chunks, len(chunks), self._length + len(values))
+        return arr
+
+    def take(self, item):
+        return self.to_numpy()[item]
+
+    def to_numpy(self):
+        if self._array is None:
+            chunks = self.chunks
+            self._array = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        return self._array
+
+
+class Categorical(ColumnArray):
+    """
+    A string column stored as integer codes into an array of its distinct
+    values, the categories. The categories are sorted so that comparing or
+    sorting codes gives the same result as comparing or sorting the
+    strings. Missing values have a code of -1.
+
+    Parameters
+    ----------
+    values: array-like of strings and None
+    """
+    dtype = np.dtype('O')
+
+    def __init__(self, values):
+        self.codes, self.categories = _factorize(np.asarray(values, dtype='O'))
+
+    @classmethod
+    def from_codes(cls, codes, categories):
+        """
+        Creates a Categorical without checking `codes` or `categories`,
+        which must be sorted and unique
+        """
+        cat = cls.__new__(cls)
+        cat.codes = codes
+        cat.categories = categories
+        return cat
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.categories.nbytes
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            code = self.codes[item]
+            return None if code < 0 else self.categories[code]
+        return self.take(item)
+
+    def __setitem__(self, item, value):
+        # values that are not categories yet are added to them in order
+        values = np.atleast_1d(np.asarray(value, dtype='O'))
+        present = values != None
+        new = set(values[present].tolist()).difference(self.categories.tolist())
+        if new:
+            categories = np.array(sorted(new.union(self.categories.tolist())), dtype='O')
+            remap = np.append(np.searchsorted(categories, self.categories), -1)
+            self.codes = remap[self.codes]
+            self.categories = categories
+        codes = np.full(len(values), -1, dtype=self.codes.dtype)
+        codes[present] = np.searchsorted(self.categories, values[present])
+        self.codes[item] = codes
+
+    def take(self, item):
+        return Categorical.from_codes(self.codes[item], self.categories)
+
+    def to_numpy(self):
+        # code -1 picks the None appended to the categories
+        return np.append(self.categories, None)[self.codes]
+
+    def copy(self):
+        return Categorical.from_codes(self.codes.copy(), self.categories)
+
+    def isna(self):
+        return self.codes < 0
+
+    def _oper(self, op, other):
+        if isinstance(other, str) and op in ('__eq__', '__ne__', '__lt__',
+                                             '__le__', '__gt__', '__ge__'):
+            # only the codes between `left` and `right` belong to strings
+            # equal to `other`, missing values are never less or greater
+            codes = self.codes
+            left = np.searchsorted(self.categories, other, 'left')
+            right = np.searchsorted(self.categories, other, 'right')
+            if op == '__eq__':
+                return (codes >= left) & (codes < right)
+            if op == '__ne__':
+                return (codes < left) | (codes >= right)
+            if op == '__lt__':
+                return (codes >= 0) & (codes < left)
+            if op == '__le__':
+                return (codes >= 0) & (codes < right)
+            if op == '__gt__':
+                return codes >= right
+            return codes >= left
+        return super()._oper(op, other)
+
+
+class StringArray(ColumnArray):
+    """
+    A string column stored as the UTF-8 bytes of every string in a single
+    buffer and an int64 array of offsets. The bytes of row i run from
+    offsets[i] to offsets[i + 1] so there is one more offset than rows.
+    Missing values hold no bytes and are marked in a boolean array.
+
+    Slicing rows shares the buffer of the original column, and selecting
+    rows with a list or a boolean array gathers the bytes in bulk without
+    creating a Python string for each value.
+
+    Parameters
+    ----------
+    values: array-like of strings and None
+    """
+    dtype = np.dtype('O')
+
+    def __init__(self, values):
+        self.offsets, self.data, self.nulls = _encode_strings(np.asarray(values, dtype='O'))
+
+    @classmethod
+    def from_buffers(cls, offsets, data, nulls=None):
+        """
+        Creates a StringArray from its buffers without copying them. The
+        offsets do not have to start at 0.
+        """
+        arr = cls.__new__(cls)
+        arr.offsets = offsets
+        arr.data = data
+        arr.nulls = np.zeros(len(offsets) - 1, dtype='bool') if nulls is None else nulls
+        return arr
+
+    @classmethod
+    def concat(cls, arrays):
+        """
+        Joins StringArrays end to end, copying each buffer once
+        """
+        lengths = [np.diff(arr.offsets) for arr in arrays]
+        offsets = np.zeros(sum(map(len, lengths)) + 1, dtype='int64')
+        np.cumsum(np.concatenate(lengths), out=offsets[1:])
+        data = np.concatenate([arr.data[arr.offsets[0]:arr.offsets[-1]] for arr in arrays])
+        nulls = np.concatenate([arr.nulls for arr in arrays])
+        return cls.from_buffers(offsets, data, nulls)
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            if item < 0:
+                item += len(self)
+            if self.nulls[item]:
+                return None
+            start, stop = self.offsets[item:item + 2]
+            return self.data[start:stop].tobytes().decode('utf-8')
+        return self.take(item)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.nulls.nbytes + int(self.offsets[-1] - self.offsets[0])
+
+    def __setitem__(self, item, value):
+        # the strings are written to an object array and encoded again
+        values = self.to_numpy()
+        values[item] = value
+        self.offsets, self.data, self.nulls = _encode_strings(values)
+
+    def take(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step == 1:
+                stop = max(start, stop)
+                return StringArray.from_buffers(self.offsets[start:stop + 1], self.data,
+                                                self.nulls[start:stop])
+            item = np.arange(start, stop, step)
+        idx = np.asarray(item)
+        if idx.dtype.kind == 'b':
+            if len(idx) != len(self):
+                raise IndexError('Boolean index must be the same length as the column')
+            idx = np.flatnonzero(idx)
+        idx = idx.astype('intp', copy=False)
+        idx = np.where(idx < 0, idx + len(self), idx)
+        if len(idx) and (idx.min() < 0 or idx.max() >= len(self)):
+            raise IndexError('Row index out of bounds')
+
+        starts = self.offsets[idx]
+        lengths = self.offsets[idx + 1] - starts
+        offsets = np.zeros(len(idx) + 1, dtype='int64')
+        np.cumsum(lengths, out=offsets[1:])
+        # position of every byte to copy, one run of positions per string
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return StringArray.from_buffers(offsets, self.data[positions], self.nulls[idx])
+
+    def to_numpy(self):
+        return _decode_strings(self.offsets, self.data, self.nulls)
+
+    def copy(self):
+        start, stop = self.offsets[0], self.offsets[-1]
+        return StringArray.from_buffers(self.offsets - start, self.data[start:stop].copy(),
+                                        self.nulls.copy())
+
+    def isna(self):
+        return self.nulls.copy()
+
+    def is_ascii(self):
+        return not (self.data[self.offsets[0]:self.offsets[-1]] & 0x80).any()
+
+    def _oper(self, op, other):
+        if isinstance(other, str) and op in ('__eq__', '__ne__'):
+            # only strings of the same length have their bytes compared
+            target = np.frombuffer(other.encode('utf-8'), dtype='uint8')
+            lengths = np.diff(self.offsets)
+            rows = np.flatnonzero((lengths == len(target)) & ~self.nulls)
+            if len(target) and len(rows):
+                chars = self.data[self.offsets[rows][:, None] + np.arange(len(target))]
+                rows = rows[(chars == target).all(axis=1)]
+            result = np.zeros(len(self), dtype='bool')
+            result[rows] = True
+            return result if op == '__eq__' else ~result
+        return super()._oper(op, other)
+
+
+class NullableArray(ColumnArray):
+    """
+    An int or bool column with missing values. The values are kept in their
+    own data type and a packed bitmap, one bit per row with the first row
+    in the lowest bit, marks the rows that hold a value. Missing values are
+    skipped by aggregations and stay missing through arithmetic, so the
+    column is never converted to float.
+
+    Parameters
+    ----------
+    values: array-like of ints or bools where None or NaN is missing
+    valid: array-like of bools
+        Optional. Marks the values that are not missing.
+    """
+
+    def __init__(self, values, valid=None):
+        arr = np.asarray(values)
+        if valid is None:
+            if arr.dtype.kind == 'O':
+                valid = arr != None
+            elif arr.dtype.kind == 'f':
+                valid = ~np.isnan(arr)
+            else:
+                valid = np.ones(len(arr), dtype='bool')
+        valid = np.asarray(valid, dtype='bool')
+        if arr.dtype.kind in 'fO':
+            present = arr[valid]
+            is_bool = len(present) and all(isinstance(val, (bool, np.bool_)) for val in present)
+            arr = np.where(valid, arr, False if is_bool else 0).astype(
+                'bool' if is_bool else 'int64')
+            if (arr[valid] != present).any():
+                raise TypeError('NullableArray can only hold ints and bools')
+        if arr.dtype.kind not in 'iub':
+            raise TypeError('NullableArray can only hold ints and bools')
+        self.values = arr
+        self.validity = np.packbits(valid, bitorder='little')
+
+    @classmethod
+    def from_buffers(cls, values, validity):
+        """
+        Creates a NullableArray from an int or bool array and a packed
+        validity bitmap without copying them
+        """
+        arr = cls.__new__(cls)
+        arr.values = values
+        arr.validity = validity
+        return arr
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.validity.nbytes
+
+    @property
+    def valid(self):
+        return np.unpackbits(self.validity, count=len(self), bitorder='little').view('bool')
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            if item < 0:
+                item += len(self)
+            if not self.validity[item >> 3] >> (item & 7) & 1:
+                return None
+            return self.values[item]
+        return self.take(item)
+
+    def __setitem__(self, item, value):
+        # None and NaN mark the rows as missing
+        if not isinstance(value, NullableArray):
+            value = NullableArray(np.atleast_1d(value))
+        valid = self.valid
+        self.values[item] = value.values
+        valid[item] = value.valid
+        self.validity = np.packbits(valid, bitorder='little')
+
+    def take(self, item):
+        return NullableArray(self.values[item], self.valid[item])
+
+    def to_numpy(self):
+        valid = self.valid
+        if valid.all():
+            return self.values
+        if self.dtype.kind == 'b':
+            arr = self.values.astype('O')
+            arr[~valid] = None
+        else:
+            arr = self.values.astype('float64')
+            arr[~valid] = np.nan
+        return arr
+
+    def copy(self):
+        return NullableArray.from_buffers(self.values.copy(), self.validity.copy())
+
+    def isna(self):
+        return ~self.valid
+
+    def diff(self, n=1):
+        valid = self.valid
+        new_valid = valid & np.roll(valid, n)
+        if n >= 0:
+            new_valid[:n] = False
+        else:
+            new_valid[n:] = False
+        values = self.values - np.roll(self.values, n)
+        return NullableArray.from_buffers(values, np.packbits(new_valid, bitorder='little'))
+
+    def _limits(self):
+        if self.dtype.kind == 'b':
+            return False, True
+        info = np.iinfo(self.dtype)
+        return info.min, info.max
+
+    def _filled(self, fill):
+        return np.where(self.valid, self.values, fill)
+
+    def _reduce(self, aggfunc):
+        """
+        Applies an aggregation to the values that are not missing
+
+        Returns
+        -------
+        An array of one value, a NullableArray when it is missing
+        """
+        valid = self.valid
+        count = np.count_nonzero(valid)
+        if aggfunc in (np.sum, np.all, np.any):
+            return np.array([aggfunc(self.values, where=valid)])
+        if aggfunc in (np.mean, np.var, np.std):
+            if count == 0:
+                return np.array([np.nan])
+            mean = np.sum(self.values, where=valid, dtype='float64') / count
+            if aggfunc is np.mean:
+                return np.array([mean])
+            var = np.sum((self.values - mean) ** 2, where=valid) / count
+            return np.array([var if aggfunc is np.var else np.sqrt(var)])
+        if count == 0:
+            return NullableArray.from_buffers(np.zeros(1, dtype=self.dtype),
+                                              np.zeros(1, dtype='uint8'))
+        low, high = self._limits()
+        if aggfunc is np.min:
+            return np.array([np.min(self.values, where=valid, initial=high)])
+        if aggfunc is np.max:
+            return np.array([np.max(self.values, where=valid, initial=low)])
+        if aggfunc is np.argmin:
+            return np.array([np.argmin(self._filled(high))])
+        if aggfunc is np.argmax:
+            return np.array([np.argmax(self._filled(low))])
+        return np.array([aggfunc(self.values[valid])])
+
+    def _apply(self, func, **kwargs):
+        # cumulative functions fill missing values so that they are skipped
+        if func is np.cumsum:
+            values = self._filled(0)
+        elif func == np.minimum.accumulate:
+            values = self._filled(self._limits()[1])
+        elif func == np.maximum.accumulate:
+            values = self._filled(self._limits()[0])
+        elif func in (np.abs, np.clip, np.round, np.copy):
+            values = self.values
+        else:
+            return func(self, **kwargs)
+        return NullableArray.from_buffers(func(values, **kwargs), self.validity.copy())
+
+    def _oper(self, op, other):
+        name = op[2:-2]
+        if name in OPERATOR_UFUNCS:
+            return OPERATOR_UFUNCS[name](self, other)
+        # reflected operators such as __rsub__ swap the operands
+        return OPERATOR_UFUNCS[name[1:]](other, self)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """
+        Applies elementwise functions to the values of each NullableArray
+        and keeps a value only where all of them hold one. Comparisons
+        return plain boolean arrays where missing values are False, like
+        comparisons with NaN. Any other use of a ufunc converts the
+        NullableArrays to NumPy arrays first.
+        """
+        if method != '__call__' or 'out' in kwargs:
+            inputs = [np.asarray(x) if isinstance(x, ColumnArray) else x for x in inputs]
+            return getattr(ufunc, method)(*inputs, **kwargs)
+
+        valid = None
+        values = []
+        for x in inputs:
+            if isinstance(x, NullableArray):
+                valid = x.valid if valid is None else valid & x.valid
+                x = x.values
+            elif isinstance(x, ColumnArray):
+                x = x.to_numpy()
+            values.append(x)
+        with np.errstate(all='ignore'):
+            result = ufunc(*values, **kwargs)
+
+        if ufunc is np.not_equal:
+            return result | ~valid
+        if ufunc in (np.equal, np.less, np.less_equal, np.greater, np.greater_equal):
+            return result & valid
+        if result.dtype.kind == 'f':
+            result[~valid] = np.nan
+            return result
+        return NullableArray.from_buffers(result, np.packbits(valid, bitorder='little'))
+
+
+def _ascii_len(arr):
+    # every character of an ASCII string is one byte
+    lengths = np.diff(arr.offsets)
+    if arr.nulls.any():
+        lengths = lengths.astype('O')
+        lengths[arr.nulls] = None
+    return lengths
+
+
+def _ascii_case(low, high, shift):
+    # shifts the bytes of the letters from `low` to `high` in the buffer
+    def func(arr):
+        data = arr.data[arr.offsets[0]:arr.offsets[-1]]
+        letters = (data >= ord(low)) & (data <= ord(high))
+        data = np.where(letters, data + shift, data).astype('uint8')
+        return StringArray.from_buffers(arr.offsets - arr.offsets[0], data, arr.nulls)
+    return func
+
+
+# string methods done on the buffer of an ASCII StringArray
+ASCII_METHODS = {str.__len__: _ascii_len,
+                 str.upper: _ascii_case('a', 'z', -32),
+                 str.lower: _ascii_case('A', 'Z', 32)}
+
+
+def _buffers(values):
+    # the NumPy arrays holding the data of a column
+    if isinstance(values, ChunkedArray):
+        return values.chunks
+    if isinstance(values, NullableArray):
+        return [values.values, values.validity]
+    if isinstance(values, Categorical):
+        return [values.codes]
+    if isinstance(values, StringArray):
+        return [values.offsets, values.data, values.nulls]
+    if isinstance(values, np.ndarray):
+        return [values]
+    return []
+
+
+def _make_block(data, block, cols):
+    """
+    Puts a view of each row of a block in `data` as the array of its column
+
+    Returns
+    -------
+    A tuple of the block, its column names and the row views
+    """
+    views = tuple(block)
+    data.update(zip(cols, views))
+    return block, cols, views
+
+
+def _sort_keys(values):
+    # categories are sorted so their codes sort in the same order
+    if isinstance(values, Categorical):
+        return values.codes
+    if isinstance(values, NullableArray):
+        # the rank of each value, with missing values ranked last
+        valid = values.valid
+        keys = np.full(len(values), len(values), dtype='int64')
+        keys[valid] = np.unique(values.values[valid], return_inverse=True)[1]
+        return keys
+    if isinstance(values, ColumnArray):
+        return values.to_numpy()
+    return values
+
+
+def _check_downcast(downcast):
+    if downcast not in (False, True, 'float'):
+        raise ValueError("`downcast` must be True, False or 'float'")
+
+
+def _downcast(values, downcast):
+    """
+    Converts an int column to the smallest int data type that holds its
+    values and, when `downcast` is 'float', a float column to float32 when
+    its finite values are in range. Any other column is returned as is.
+    """
+    if isinstance(values, NullableArray):
+        new_values = _downcast(values.values, downcast)
+        return NullableArray.from_buffers(new_values, values.validity)
+    if not isinstance(values, np.ndarray) or len(values) == 0:
+        return values
+    kind = values.dtype.kind
+    if kind == 'i':
+        low, high = values.min(), values.max()
+        for dtype in ('int8', 'int16', 'int32', 'int64'):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                break
+        if np.dtype(dtype).itemsize < values.dtype.itemsize:
+            return values.astype(dtype)
+    elif kind == 'f' and downcast == 'float' and values.dtype.itemsize > 4:
+        finite = values[np.isfinite(values)]
+        if len(finite) == 0 or np.abs(finite).max() <= np.finfo('float32').max:
+            return values.astype('float32')
+    return values
+
+
+def _memory_usage(values, deep=False):
+    # the bytes of the arrays of a column and with `deep` of its strings
+    if isinstance(values, Categorical):
+        nbytes = values.nbytes
+        values = values.categories
+    else:
+        nbytes = values.nbytes
+    if deep and isinstance(values, np.ndarray) and values.dtype.kind == 'O':
+        nbytes += sum(map(sys.getsizeof, values.tolist()))
+    return nbytes
+
+
+def _unit_offset(values, unit, start):
+    # the number of whole `unit`s between each datetime and its `start`
+    return (values.astype(f'M8[{unit}]') - values.astype(f'M8[{start}]')).view('int64')
+
+
+def _datetime_operand(other):
+    """
+    Converts strings, dates and arrays of them compared with or subtracted
+    from a datetime column to datetime64 so that NumPy can operate on them
+    """
+    if isinstance(other, (str, date)):
+        return np.datetime64(other)
+    if isinstance(other, np.ndarray) and other.dtype.kind in 'UO':
+        return other.astype('datetime64')
+    return other
+
+
+def _key_codes(values):
+    """
+    Maps each value of a column to the position of its value in the
+    sorted array of distinct values. Categoricals already hold these codes,
+    strings are mapped with a hash table by `_factorize` and other values
+    with `np.unique`. Missing values are given a code of -1.
+
+    Returns
+    -------
+    A tuple of an int array of codes and an array of distinct values
+    """
+    if isinstance(values, Categorical):
+        return values.codes, values.categories
+    if isinstance(values, ColumnArray):
+        values = values.to_numpy()
+    kind = values.dtype.kind
+    if kind == 'O':
+        return _factorize(values)
+    uniques, codes = np.unique(values, return_inverse=True)
+    codes = codes.astype('int64', copy=False)
+    if kind in 'fmM':
+        # missing values are sorted last
+        missing = np.isnan(values) if kind == 'f' else np.isnat(values)
+        if missing.any():
+            codes[missing] = -1
+            uniques = uniques[:codes.max() + 1]
+    return codes, uniques
+
+
+def _dense_ids(codes, n):
+    """
+    Numbers the codes from 0 to `n` - 1 that are used from 0 up in the same
+    order. A code of -1 stays -1.
+
+    Returns
+    -------
+    A tuple of the new codes and the sorted array of codes used
+    """
+    present = codes >= 0
+    if n <= 2 * len(codes) + 1024:
+        # counting avoids sorting
+        used = np.bincount(codes[present], minlength=n) > 0
+        ids = (np.cumsum(used) - 1)[codes]
+        used = np.flatnonzero(used)
+    else:
+        used = np.unique(codes[present])
+        ids = np.searchsorted(used, codes)
+    ids[~present] = -1
+    return ids, used
+
+
+def _factorize(values):
+    """
+    Maps each value to the position of its value in the sorted array of
+    distinct values with a hash table. None is given a code of -1.
+
+    Returns
+    -------
+    A tuple of an int array of codes and an object array of distinct values
+    """
+    # both loops over the values run in C
+    vals = values.tolist()
+    uniques = dict.fromkeys(vals)
+    missing = None in uniques
+    uniques.pop(None, None)
+    categories = np.empty(len(uniques), dtype='O')
+    categories[:] = list(uniques)
+    categories = categories[np.argsort(categories, kind='stable')]
+    positions = dict(zip(categories.tolist(), range(len(categories))))
+    if missing:
+        positions[None] = -1
+    codes = np.fromiter(map(positions.__getitem__, vals), dtype='int64', count=len(vals))
+    return codes, categories
+
+
+def concat(dfs):
+    """
+    Joins DataFrames with the same columns end to end. Each column of the
+    result is allocated once and the rows of every DataFrame are copied
+    into it. Use `DataFrame.append` to add rows without copying them.
+
+    Bool and number columns are converted to a data type that holds all
+    of their values. Any other column, such as strings or datetimes, must
+    have the same kind of data in every DataFrame.
+
+    Parameters
+    ----------
+    dfs: list of DataFrames
+
+    Returns
+    -------
+    A DataFrame
+    """
+    if not isinstance(dfs, list):
+        raise TypeError('`dfs` must be a list of DataFrames')
+    if not dfs:
+        raise ValueError('`dfs` must contain at least one DataFrame')
+    for df in dfs:
+        if not isinstance(df, DataFrame):
+            raise TypeError('`dfs` must be a list of DataFrames')
+        if df.columns != dfs[0].columns:
+            raise ValueError('All DataFrames must have the same columns')
+    for col in dfs[0].columns:
+        kinds = {df._data[col].dtype.kind for df in dfs}
+        if len(kinds) > 1 and not kinds <= set('biuf'):
+            raise TypeError(f'Column {col!r} cannot join strings, datetimes or '
+                            'timedeltas with other data types')
+    new_df = DataFrame._from_arrays(_concat_values([df._data for df in dfs]))
+    # a common index is built again when it is next used
+    index = dfs[0]._index
+    if index is not None and all(df._index is not None and df._index.column == index.column
+                                 and df._index.kind == index.kind for df in dfs):
+        new_df._index = Index(index.column, index.kind)
+    return new_df
+
+
+def read_csv(fn, chunksize=None, engine=None, memory_map=False, workers=None,
+             usecols=None, where=None, compression='infer', source_column=None,
+             dtype=None, categorical=False, string_storage='object', parse_dates=None,
+             date_format=None, downcast=False):
+    """
+    Read in a comma-separated value file as a DataFrame
+
+    Parameters
+    ----------
+    fn: string of file location, glob pattern or list of file locations
+        Several files are read into a single DataFrame in the order given.
+        A pattern such as 'logs/2026-*.csv' is expanded to the matching
+        files in sorted order. All files must have the same columns and a
+        column gets the data type that fits its values in every file.
+    chunksize: int
+        Optional. Number of rows per DataFrame. When given, an iterator of
+        DataFrames is returned instead so that the whole file is never held
+        in memory. Every chunk uses the data types found in the earlier
+        chunks, except that an int column becomes float from the first
+        chunk that holds floats. A number column whose later chunk holds
+        strings or empty fields raises a ValueError. Pass `dtype` to read
+        such a column with one data type in every chunk.
+    engine: 'python' or 'numpy'
+        The 'python' engine splits each line into a list of strings. The
+        'numpy' engine reads the file as bytes, finds every comma and newline
+        at once and converts each column straight from the raw bytes, which
+        is much faster for large files. Defaults to 'numpy' when
+        `memory_map` or `workers` is given and 'python' otherwise.
+    memory_map: bool
+        If True, map the file into memory and parse it in place with the
+        'numpy' engine. The operating system pages the file in as needed
+        and no extra copy of the raw bytes is made.
+    workers: int
+        Optional. Number of processes used to parse the file with the
+        'numpy' engine. The file is split into byte ranges that end on a
+        newline and each range is parsed in its own process. When several
+        files are read, each file is parsed whole in one of the processes.
+    usecols: list of column names
+        Optional. Only these columns are converted and returned.
+    where: tuple or list of tuples
+        Optional. Keep only the rows that match a condition given as a
+        (column name, operator, value) tuple such as ('salary', '>', 50000).
+        The operator is one of <, <=, >, >=, == or !=. A list of conditions
+        keeps the rows that match all of them. Rows are dropped while the
+        file is parsed. Empty fields never match a condition on a number.
+    compression: 'infer', 'gzip', 'bz2', 'xz' or None
+        Decompress the file while it is read. 'infer' detects the
+        compression from the file extension or the first bytes of the
+        file. Data is decompressed in small blocks so combined with
+        `chunksize` the whole file is never held in memory.
+    source_column: str
+        Optional. Name of a new column that holds the location of the file
+        each row was read from.
+    dtype: dict
+        Optional. Column names mapped to the data type to read them as,
+        one of 'int', 'float', 'bool', 'str' or a NumPy data type such as
+        'datetime64[s]' for ISO 8601 dates and times. These columns are
+        converted directly. The data type of every other
+        column is inferred from its first 1,000 values and the column is
+        only converted again as float or string if a later value does not
+        fit.
+    categorical: bool or list of str
+        Optional. Reads the given string columns, or with True every string
+        column with few distinct values, as a Categorical that stores each
+        distinct string once.
+    string_storage: str
+        'object' to store the other string columns as object arrays of
+        Python strings or 'buffer' to store them as StringArrays, which
+        keep the bytes of every string in one buffer. The numpy engine
+        copies the bytes of the fields straight into the buffer without
+        creating a Python string for each one.
+    parse_dates: list of str
+        Optional. Columns to read as datetime64 arrays. ISO 8601 strings
+        such as '2026-03-01' or '2026-03-01T12:30' are parsed by NumPy all
+        at once and the unit is the finest one found in the column. Empty
+        values are NaT.
+    date_format: str
+        Optional. A `datetime.strptime` format such as '%d/%m/%Y' of the
+        values of the `parse_dates` columns. Each distinct value is parsed
+        once.
+    downcast: bool or 'float'
+        If True, each int column is stored in the smallest int data type
+        that holds all of its values and 'float' also stores float columns
+        as float32, see `DataFrame`. Cannot be used with `chunksize` as the
+        data type would depend on the values of each chunk. Give the data
+        types in `dtype` instead.
+
+    Returns
+    -------
+    A DataFrame or an iterator of DataFrames when `chunksize` is given
+    """
+    if engine is None:
+        engine = 'numpy' if memory_map or workers else 'python'
+    if engine not in ('python', 'numpy'):
+        raise ValueError("`engine` must be either 'python' or 'numpy'")
+    if memory_map and engine != 'numpy':
+        raise ValueError("`memory_map` can only be used with the 'numpy' engine")
+
+    if workers is not None:
+        if not isinstance(workers, int):
+            raise TypeError('`workers` must be an int')
+        if workers < 1:
+            raise ValueError('`workers` must be a positive int')
+
+    if chunksize is not None:
+        if not isinstance(chunksize, int):
+            raise TypeError('`chunksize` must be an int')
+        if chunksize < 1:
+            raise ValueError('`chunksize` must be a positive int')
+
+    if source_column is not None and not isinstance(source_column, str):
+        raise TypeError('`source_column` must be a string')
+
+    dtype = _check_dtypes(dtype)
+    if parse_dates is not None:
+        if not isinstance(parse_dates, list):
+            raise TypeError('`parse_dates` must be a list of column names')
+        # the dates are read as strings first
+        dtype = dict(dtype or {}, **{col: np.dtype('O') for col in parse_dates})
+    if date_format is not None and not isinstance(date_format, str):
+        raise TypeError('`date_format` must be a string')
+    _check_downcast(downcast)
+    if downcast and chunksize is not None:
+        raise ValueError('`downcast` cannot be used together with `chunksize`')
+    if not isinstance(categorical, (bool, list)):
+        raise TypeError('`categorical` must be a bool or a list of column names')
+    _check_string_storage(string_storage)
+
+    fns = _expand_paths(fn)
+    if fns is not None:
+        if chunksize is not None:
+            raise ValueError('`chunksize` cannot be used when reading several files')
+        df = _read_csv_many(fns, workers, engine, memory_map, usecols, where,
+                            compression, source_column, dtype)
+        df = _parse_dates(df, parse_dates, date_format)
+        if downcast:
+            df = DataFrame(df._data, downcast=downcast)
+        return _store_strings(_categorize(df, categorical), string_storage)
+
+    if workers is not None:
+        if engine != 'numpy':
+            raise ValueError("`workers` can only be used with the 'numpy' engine")
+        if chunksize is not None:
+            raise ValueError('`workers` cannot be used together with `chunksize`')
+
+    compression = _infer_compression(fn, compression)
+    if compression is not None and (memory_map or (workers or 1) > 1):
+        raise ValueError('Compressed files cannot be used with `memory_map` or `workers`')
+
+    if chunksize is not None:
+        chunks = _read_csv_chunks(fn, chunksize, engine, memory_map, usecols, where,
+                                  compression, dtype, string_storage)
+        if source_column is not None:
+            chunks = (df._with_source(source_column, fn) for df in chunks)
+        if parse_dates:
+            chunks = (_parse_dates(df, parse_dates, date_format) for df in chunks)
+        if categorical or string_storage != 'object':
+            chunks = (_store_strings(_categorize(df, categorical), string_storage)
+                      for df in chunks)
+        return chunks
+
+    if workers is not None and workers > 1:
+        df = _read_csv_parallel(fn, workers, memory_map, usecols, where, dtype)
+    else:
+        df = DataFrame(_read_csv_file(fn, compression, engine, memory_map, usecols,
+                                      where, dtype, string_storage))
+    if source_column is not None:
+        df = df._with_source(source_column, fn)
+    df = _parse_dates(df, parse_dates, date_format)
+    if downcast:
+        df = DataFrame(df._data, downcast=downcast)
+    return _store_strings(_categorize(df, categorical), string_storage)
+
+
+def _check_string_storage(string_storage):
+    if string_storage not in ('object', 'buffer'):
+        raise ValueError("`string_storage` must be either 'object' or 'buffer'")
+
+
+def _store_strings(df, string_storage):
+    # converts the object columns to StringArrays for the 'buffer' storage
+    if string_storage == 'object':
+        return df
+    new_data = {}
+    for col, values in df._data.items():
+        # the numpy engine already built StringArrays from the raw bytes
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'O':
+            values = StringArray(values)
+        new_data[col] = values
+    return DataFrame(new_data)
+
+
+def _parse_dates(df, parse_dates, date_format=None):
+    """
+    Converts the string columns named in `parse_dates` to datetime64 arrays
+    """
+    if not parse_dates:
+        return df
+    new_data = dict(df._data)
+    for col in parse_dates:
+        if col not in new_data:
+            raise KeyError(f'{col!r} is not a column')
+        values = new_data[col]
+        if values.dtype.kind != 'O':
+            raise ValueError(f'Column {col!r} is not a string column')
+        try:
+            new_data[col] = _to_datetimes(values, date_format)
+        except ValueError:
+            raise ValueError(f'Column {col!r} contains values that cannot be '
+                             'read as dates') from None
+    return DataFrame(new_data)
+
+
+def _to_datetimes(values, date_format=None):
+    """
+    Parses an object array of strings as datetimes. Without a format NumPy
+    parses the ISO 8601 strings in one pass. Otherwise each distinct string
+    is parsed once and the results are gathered with the codes of the
+    strings. Empty strings and None are NaT.
+    """
+    if date_format is None:
+        return values.astype('datetime64')
+    codes, uniques = _factorize(values)
+    # code -1 picks the None appended for missing values
+    parsed = [datetime.strptime(val, date_format) if val else None
+              for val in uniques.tolist()]
+    return np.array(parsed + [None], dtype='datetime64')[codes]
+
+
+def _categorize(df, categorical):
+    """
+    Converts the string columns named in `categorical`, or with True the
+    string columns with few distinct values among their first values, to
+    Categoricals
+    """
+    if not categorical:
+        return df
+    if categorical is True:
+        categorical = []
+        for col, values in df._data.items():
+            sample = values[:INFER_ROWS]
+            if values.dtype.kind == 'O' and \
+                    len(set(sample.tolist())) <= CATEGORY_MAX_RATIO * len(sample):
+                categorical.append(col)
+
+    new_data = dict(df._data)
+    for col in categorical:
+        if col not in new_data:
+            raise KeyError(f'{col!r} is not a column')
+        values = new_data[col]
+        if values.dtype.kind != 'O':
+            raise ValueError(f'Column {col!r} is not a string column')
+        if not isinstance(values, Categorical):
+            new_data[col] = Categorical(values)
+    return DataFrame(new_data)
+
+
+async def aread_csv(fn, executor=None, **kwargs):
+    """
+    Reads a comma-separated value file without blocking the event loop.
+    The file is read in `executor` and the DataFrame is awaited. Use
+    `aiter_csv` to read a file in chunks.
+
+    Cancelling the awaiting task stops a read that has not started yet.
+    A read already running in a thread cannot be interrupted, but its
+    result is thrown away.
+
+    Parameters
+    ----------
+    fn: string of file location, glob pattern or list of file locations
+    executor: concurrent.futures.Executor
+        Optional. A thread or process pool to read the file in. Defaults to
+        the thread pool of the event loop.
+    kwargs: any argument of `read_csv` except `chunksize`
+
+    Returns
+    -------
+    A DataFrame
+    """
+    if kwargs.get('chunksize') is not None:
+        raise ValueError('Use `aiter_csv` to read a file in chunks')
+    return await _run_in_executor(executor, read_csv, fn, **kwargs)
+
+
+async def aiter_csv(fn, chunksize, executor=None, **kwargs):
+    """
+    Reads a comma-separated value file in chunks without blocking the event
+    loop. Each chunk is read in `executor` when it is asked for, so other
+    tasks run between chunks and a cancelled or abandoned loop stops
+    reading the file after the current chunk.
+
+    Parameters
+    ----------
+    fn: string of file location
+    chunksize: int of number of rows in each DataFrame
+    executor: concurrent.futures.ThreadPoolExecutor
+        Optional. Defaults to the thread pool of the event loop. Process
+        pools cannot be used as the file stays open between chunks.
+    kwargs: any argument of `read_csv`
+
+    Yields
+    ------
+    DataFrames of at most `chunksize` rows
+    """
+    if isinstance(executor, ProcessPoolExecutor):
+        raise TypeError('`executor` cannot be a process pool when reading in chunks')
+    chunks = read_csv(fn, chunksize=chunksize, **kwargs)
+    loop = asyncio.get_event_loop()
+    future = None
+    try:
+        while True:
+            future = loop.run_in_executor(executor, next, chunks, None)
+            # shielded so that a cancelled task leaves `future` to finish
+            df = await asyncio.shield(future)
+            if df is None:
+                break
+            yield df
+    finally:
+        if future is None or future.done():
+            chunks.close()
+        else:
+            # the chunk being read still holds the file, close it after
+            future.add_done_callback(lambda _: chunks.close())
+
+
+async def _run_in_executor(executor, func, *args, **kwargs):
+    if executor is not None and not isinstance(executor, Executor):
+        raise TypeError('`executor` must be a concurrent.futures.Executor')
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+def _read_csv_file(fn, compression, engine, memory_map, usecols, where, dtypes=None,
+                   string_storage='object'):
+    """
+    Reads a whole file in the current process. The numpy engine builds
+    StringArrays straight from the bytes of the fields when
+    `string_storage` is 'buffer'.
+
+    Returns
+    -------
+    A dictionary of column names mapped to NumPy arrays
+    """
+    if engine == 'numpy':
+        with _open_binary(fn, memory_map, compression) as f:
+            column_names = _parse_header(f.readline())
+            values = _split_buffer(_read_rest(f), column_names, usecols, where)
+        return _convert_values(values, dtypes, string_storage)
+
+    with _open_text(fn, compression) as f:
+        header = f.readline()
+        column_names = header.strip('\n').split(',')
+        values = _split_lines(f, column_names, usecols, where)
+    return _convert_values(values, dtypes)
+
+
+def _expand_paths(fn):
+    """
+    Expands a glob pattern or a list of file locations
+
+    Returns
+    -------
+    A list of file locations or None when `fn` is a single file
+    """
+    if isinstance(fn, (list, tuple)):
+        if not fn:
+            raise ValueError('No files were given')
+        return list(fn)
+    if isinstance(fn, str) and any(char in fn for char in '*?['):
+        fns = sorted(glob.glob(fn))
+        if not fns:
+            raise FileNotFoundError(f'No files match {fn!r}')
+        return fns
+    return None
+
+
+def _read_csv_many(fns, workers, engine, memory_map, usecols, where, compression,
+                   source_column, dtypes):
+    """
+    Reads several files, in a pool of processes when `workers` is greater
+    than one, and joins them in order. Files whose inferred data types
+    disagree are reconciled the same way as the byte ranges of a single
+    file read in parallel.
+    """
+    compressions = [_infer_compression(fn, compression) for fn in fns]
+    if memory_map and any(compressions):
+        raise ValueError('Compressed files cannot be used with `memory_map`')
+
+    read = partial(_read_csv_file, engine=engine, memory_map=memory_map,
+                   usecols=usecols, where=where, dtypes=dtypes)
+    pool = ProcessPoolExecutor(workers) if (workers or 1) > 1 else None
+    run = pool.map if pool else map
+    try:
+        parts = list(run(read, fns, compressions))
+        for fn, part in zip(fns, parts):
+            if list(part) != list(parts[0]):
+                raise ValueError(f'{fn} does not have the same columns as {fns[0]}')
+
+        common = _common_dtypes(parts)
+        redo = [i for i, part in enumerate(parts)
+                if any(part[col].dtype.kind != 'O' and common[col].kind == 'O' for col in part)]
+        redone = run(partial(read, dtypes=common),
+                     [fns[i] for i in redo], [compressions[i] for i in redo])
+        for i, part in zip(redo, redone):
+            parts[i] = part
+    finally:
+        if pool:
+            pool.shutdown()
+
+    if source_column is not None:
+        for fn, part in zip(fns, parts):
+            part[source_column] = _source_values(fn, len(next(iter(part.values()))))
+    return DataFrame(_concat_values(parts))
+
+
+def _source_values(fn, n):
+    values = np.empty(n, dtype='O')
+    values[:] = str(fn)
+    return values
+
+
+def _read_csv_parallel(fn, workers, memory_map, usecols, where, dtypes):
+    """
+    Parses byte ranges of the file in a pool of processes and joins the
+    columns of each range. Ranges whose inferred data types disagree are
+    reconciled. Numeric columns are upcast when concatenated while ranges
+    that read a column as numbers when another range found strings are
+    parsed again as strings so that the original text is kept.
+    """
+    with open(fn, 'rb') as f:
+        column_names = _parse_header(f.readline())
+        ranges = _line_ranges(f, workers)
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_read_csv_range, fn, start, stop, column_names,
+                               memory_map, usecols, where, dtypes)
+                   for start, stop in ranges]
+        parts = [future.result() for future in futures]
+
+        common = _common_dtypes(parts)
+        futures = {}
+        for i, ((start, stop), part) in enumerate(zip(ranges, parts)):
+            if any(part[col].dtype.kind != 'O' and common[col].kind == 'O' for col in part):
+                futures[i] = pool.submit(_read_csv_range, fn, start, stop, column_names,
+                                         memory_map, usecols, where, common)
+        for i, future in futures.items():
+            parts[i] = future.result()
+
+    return DataFrame(_concat_values(parts))
+
+
+def _line_ranges(f, n):
+    """
+    Splits the rest of a binary file into about `n` byte ranges of equal
+    size that each end just after a newline
+
+    Returns
+    -------
+    A list of (start, stop) tuples of byte positions
+    """
+    start = f.tell()
+    size = os.fstat(f.fileno()).st_size
+    bounds = [start]
+    for i in range(1, n):
+        f.seek(max(start + (size - start) * i // n - 1, bounds[-1]))
+        f.readline()
+        if f.tell() >= size:
+            break
+        if f.tell() > bounds[-1]:
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_csv_range(fn, start, stop, column_names, memory_map, usecols, where,
+                    dtypes=None):
+    # runs in a worker process
+    with _open_binary(fn, memory_map) as f:
+        f.seek(start)
+        values = _split_buffer(_read_rest(f, stop - start), column_names, usecols, where)
+        return _convert_values(values, dtypes)
+
+
+def _common_dtypes(parts):
+    """
+    Finds a single data type for each column that every part can be
+    converted to. Numbers are promoted and any part with strings makes the
+    whole column strings.
+
+    Parameters
+    ----------
+    parts: list of dictionaries of column names mapped to arrays
+
+    Returns
+    -------
+    A dictionary of column names mapped to NumPy data types
+    """
+    return {col: _common_dtype([part[col].dtype for part in parts]) for col in parts[0]}
+
+
+def _common_dtype(dtypes):
+    if any(dtype.kind == 'O' for dtype in dtypes):
+        return np.dtype('O')
+    return np.result_type(*dtypes)
+
+
+def _concat_values(parts):
+    """
+    Concatenates the arrays of each column found in a list of dictionaries
+
+    Returns
+    -------
+    A dictionary of column names mapped to arrays
+    """
+    return {col: _concat_arrays([part[col] for part in parts]) for col in parts[0]}
+
+
+def _concat_arrays(arrays):
+    """
+    Joins the arrays of a column end to end. The new array is allocated
+    once and each array is copied into its place. Categoricals, StringArrays
+    and NullableArrays of one data type stay that kind of array. Other
+    arrays are joined as NumPy arrays of a data type they can all be
+    converted to, see `_common_dtypes`.
+    """
+    if all(isinstance(arr, Categorical) for arr in arrays):
+        # the codes of each array are mapped into the sorted union of categories
+        categories = np.unique(np.concatenate([arr.categories for arr in arrays]))
+        codes = np.empty(sum(map(len, arrays)), dtype='int64')
+        start = 0
+        for arr in arrays:
+            remap = np.append(np.searchsorted(categories, arr.categories), -1)
+            codes[start:start + len(arr)] = remap[arr.codes]
+            start += len(arr)
+        return Categorical.from_codes(codes, categories)
+    if all(isinstance(arr, StringArray) for arr in arrays):
+        return StringArray.concat(arrays)
+    if all(isinstance(arr, NullableArray) for arr in arrays) and \
+            len({arr.dtype.kind for arr in arrays}) == 1:
+        values = _concat_arrays([arr.values for arr in arrays])
+        valid = _concat_arrays([arr.valid for arr in arrays])
+        return NullableArray.from_buffers(values, np.packbits(valid, bitorder='little'))
+
+    chunks = []
+    for arr in arrays:
+        if isinstance(arr, ChunkedArray):
+            chunks.extend(arr.chunks)
+        elif isinstance(arr, ColumnArray):
+            chunks.append(arr.to_numpy())
+        else:
+            chunks.append(arr)
+    dtype = _common_dtype([chunk.dtype for chunk in chunks])
+    new_values = np.empty(sum(map(len, chunks)), dtype=dtype)
+    start = 0
+    for chunk in chunks:
+        new_values[start:start + len(chunk)] = chunk
+        start += len(chunk)
+    return new_values
+
+
+def _append_values(values, new_values):
+    """
+    Adds `new_values` after `values`. NumPy arrays of the same data type are
+    kept as the chunks of a ChunkedArray without copying them. Anything
+    else is joined into a new array.
+    """
+    if isinstance(new_values, np.ndarray) and new_values.dtype == values.dtype:
+        if isinstance(values, ChunkedArray):
+            return values.append(new_values)
+        if isinstance(values, np.ndarray):
+            return ChunkedArray([values, new_values])
+    return _concat_arrays([values, new_values])
+
+
+def _read_csv_chunks(fn, chunksize, engine, memory_map, usecols, where, compression,
+                     dtypes, string_storage='object'):
+    if engine == 'numpy':
+        opener = _open_binary(fn, memory_map, compression)
+    else:
+        opener = _open_text(fn, compression)
+
+    with opener as f:
+        if engine == 'numpy':
+            column_names = _parse_header(f.readline())
+            blocks = _read_line_blocks(f, chunksize)
+            split = _split_buffer
+        else:
+            header = f.readline()
+            column_names = header.strip('\n').split(',')
+            blocks = iter(lambda: list(islice(f, chunksize)), [])
+            split = _split_lines
+
+        given = dtypes or {}
+        found = {}
+        for number, block in enumerate(blocks):
+            values = split(block, column_names, usecols, where)
+            if not len(next(iter(values.values()))):
+                # every row of the block was filtered out
+                continue
+            try:
+                # later chunks keep the data types of the earlier ones
+                new_data = _convert_values(values, {**found, **given}, string_storage)
+            except ValueError:
+                new_data = _promote_values(values, found, given, string_storage,
+                                           number * chunksize + 2)
+            found = {col: arr.dtype for col, arr in new_data.items() if col not in given}
+            yield DataFrame(new_data)
+
+
+def _promote_values(values, found, given, string_storage, line):
+    """
+    Converts the raw values of a chunk whose values do not all fit the
+    data types found in the earlier chunks. Each column is inferred again
+    and an int column becomes float when the chunk holds floats. A number
+    column that now holds strings or empty fields raises a ValueError.
+
+    Returns
+    -------
+    A dictionary of column names mapped to arrays
+    """
+    try:
+        new_data = _convert_values(values, given, string_storage)
+    except ValueError as e:
+        raise ValueError(f'{e} in the chunk starting on line {line}') from None
+    for col, arr in new_data.items():
+        if col not in found:
+            continue
+        if found[col].kind == 'O':
+            if arr.dtype.kind != 'O':
+                # numbers are read again so that their original text is kept
+                new_data[col] = _convert_column(values[col], 'O', string_storage)
+        elif arr.dtype.kind == 'O':
+            raise ValueError(f'Column {col!r} has values that are not numbers in the '
+                             f'chunk starting on line {line}. Pass `dtype` to read it '
+                             'with one data type in every chunk')
+        else:
+            new_data[col] = arr.astype(np.result_type(found[col], arr.dtype))
+    return new_data
+
+
+def _infer_compression(fn, compression):
+    """
+    Finds the compression of a file from its extension or, failing that,
+    from the magic number at its start
+
+    Returns
+    -------
+    'gzip', 'bz2', 'xz' or None
+    """
+    if compression is None or compression in COMPRESSION_MAGIC:
+        return compression
+    if compression != 'infer':
+        raise ValueError(f'`compression` must be one of {", ".join(COMPRESSION_MAGIC)}, '
+                         "'infer' or None")
+
+    extension = os.path.splitext(str(fn))[1].lower()
+    if extension in COMPRESSION_EXTENSIONS:
+        return COMPRESSION_EXTENSIONS[extension]
+    with open(fn, 'rb') as f:
+        start = f.read(6)
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if start.startswith(magic):
+            return compression
+    return None
+
+
+def _open_compressed(fn, compression, mode='rb'):
+    if compression == 'gzip':
+        return gzip.open(fn, mode)
+    if compression == 'bz2':
+        return bz2.open(fn, mode)
+    return lzma.open(fn, mode)
+
+
+def _open_text(fn, compression=None):
+    if compression is None:
+        return open(fn)
+    return _open_compressed(fn, compression, 'rt')
+
+
+@contextmanager
+def _open_binary(fn, memory_map=False, compression=None):
+    """
+    Opens a file for reading bytes. Compressed files are decompressed as
+    they are read. When `memory_map` is True the file is mapped into
+    memory instead. The map supports the same reading methods.
+    """
+    if not memory_map:
+        if compression is None:
+            f = open(fn, 'rb')
+        else:
+            f = _open_compressed(fn, compression)
+        with f:
+            yield f
+        return
+
+    with open(fn, 'rb') as f:
+        mm = _map_file(f)
+    try:
+        yield mm
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            # arrays kept alive by a traceback still view the map. It is
+            # closed once they are garbage collected.
+            pass
+
+
+def _map_file(f):
+    # maps the whole of an open file for reading
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_rest(f, size=-1):
+    # a memory map is parsed in place instead of being copied to bytes
+    if isinstance(f, mmap.mmap):
+        stop = None if size < 0 else f.tell() + size
+        return memoryview(f)[f.tell():stop]
+    return f.read(size)
+
+
+def _split_lines(lines, column_names, usecols=None, where=None):
+    """
+    Splits each line on commas and collects the raw string values of
+    each column
+
+    Parameters
+    ----------
+    lines: iterable of strings
+    column_names: list of column names in the header
+    usecols: list of column names to keep
+    where: conditions that each kept row must match. See `read_csv`.
+
+    Returns
+    -------
+    A dictionary of column names mapped to lists of strings
+    """
+    usecols, conditions = _check_selection(column_names, usecols, where)
+    values = {col: [] for col in usecols}
+    if usecols == column_names and not conditions:
+        for line in lines:
+            vals = line.strip('\n').split(',')
+            for val, name in zip(vals, column_names):
                 values[name].append(val)
+        return values
+
+    kept = [(column_names.index(col), values[col]) for col in usecols]
+    conditions = [(column_names.index(col), func, value) for col, func, value in conditions]
+    for line in lines:
+        vals = line.strip('\n').split(',')
+        try:
+            if all(_raw_condition(vals[i], func, value, column_names[i])
+                   for i, func, value in conditions):
+                for i, col_values in kept:
+                    col_values.append(vals[i])
+        except IndexError:
+            raise ValueError('Every line must have the same number of fields '
+                             'as the header') from None
+    return values
+
+
+def _raw_condition(val, func, value, col):
+    # a raw string is compared as a number when the condition uses one. An
+    # empty field is a missing number, which never matches.
+    if isinstance(value, str):
+        return func(val, value)
+    if not val:
+        return False
+    try:
+        return func(int(val), value)
+    except ValueError:
+        try:
+            return func(float(val), value)
+        except ValueError:
+            raise ValueError(f'Column {col!r} has values that cannot be '
+                             'compared with a number') from None
+
+
+def _check_selection(column_names, usecols=None, where=None):
+    """
+    Validates the columns and the row conditions requested from a reader
+
+    Parameters
+    ----------
+    column_names: list of all column names
+    usecols: list of column names or None for all of them
+    where: a (column name, operator, value) tuple, a list of them or None
+
+    Returns
+    -------
+    A list of the columns to keep in their original order and a list of
+    (column name, comparison function, value) tuples
+    """
+    if usecols is None:
+        usecols = column_names
+    else:
+        if isinstance(usecols, str):
+            usecols = [usecols]
+        elif not isinstance(usecols, list):
+            raise TypeError('`usecols` must be a string or a list')
+        for col in usecols:
+            if col not in column_names:
+                raise ValueError(f'Column {col!r} does not exist')
+        usecols = [col for col in column_names if col in usecols]
+
+    if where is None:
+        return usecols, []
+    if isinstance(where, tuple):
+        where = [where]
+    elif not isinstance(where, list):
+        raise TypeError('`where` must be a tuple or a list of tuples')
+    conditions = []
+    for condition in where:
+        if not isinstance(condition, tuple) or len(condition) != 3:
+            raise TypeError('Each condition must be a (column name, operator, value) tuple')
+        col, op, value = condition
+        if col not in column_names:
+            raise ValueError(f'Column {col!r} does not exist')
+        if op not in COMPARISONS:
+            raise ValueError(f'The operator must be one of {", ".join(COMPARISONS)}')
+        conditions.append((col, COMPARISONS[op], value))
+    return usecols, conditions
+
+
+def _parse_header(header):
+    return header.decode('utf-8').rstrip('\r\n').split(',')
+
+
+def _read_line_blocks(f, nlines, block_size=1 << 22):
+    """
+    Reads a binary file in fixed size blocks and yields bytes objects that
+    each hold at most `nlines` complete lines
+    """
+    pieces = []
+    count = 0
+    while True:
+        data = f.read(block_size)
+        if not data:
+            break
+        newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == NEWLINE)
+        i = 0
+        start = 0
+        while len(newlines) - i >= nlines - count:
+            i += nlines - count
+            end = newlines[i - 1] + 1
+            pieces.append(data[start:end])
+            yield b''.join(pieces)
+            pieces = []
+            count = 0
+            start = end
+        pieces.append(data[start:])
+        count += len(newlines) - i
+
+    rest = b''.join(pieces)
+    if rest:
+        yield rest
+
+
+def _split_buffer(buf, column_names, usecols=None, where=None):
+    """
+    Finds the fields of every line in a buffer of bytes without creating
+    a Python object for each value. The positions of all the commas and
+    newlines are found at once and each column is then gathered into a
+    fixed-width bytes array. Columns that are not used are never gathered
+    and rows that do not match the conditions are dropped before any
+    other column is gathered.
+
+    Parameters
+    ----------
+    buf: bytes-like object of complete lines without the header
+    column_names: list of column names in the header
+    usecols: list of column names to keep
+    where: conditions that each kept row must match. See `read_csv`.
+
+    Returns
+    -------
+    A dictionary of column names mapped to bytes arrays
+    """
+    usecols, conditions = _check_selection(column_names, usecols, where)
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    n = len(arr)
+    while n and arr[n - 1] in (NEWLINE, CARRIAGE_RETURN):
+        n -= 1
+    arr = arr[:n]
+    if n == 0:
+        return {col: np.array([], dtype='S1') for col in usecols}
+
+    ncols = len(column_names)
+    ends = np.append(np.flatnonzero((arr == COMMA) | (arr == NEWLINE)), n)
+    if len(ends) % ncols != 0:
+        raise ValueError('Every line must have the same number of fields as the header')
+    ends = ends.reshape(-1, ncols)
+    starts = np.empty_like(ends)
+    starts.flat[0] = 0
+    starts.flat[1:] = ends.flat[:-1] + 1
+    if (arr[ends[:, :-1]] != COMMA).any() or (arr[ends[:-1, -1]] != NEWLINE).any():
+        raise ValueError('Every line must have the same number of fields as the header')
+
+    # remove the carriage return of windows line endings
+    last_starts, last_ends = starts[:, -1], ends[:, -1]
+    last_ends -= (last_ends > last_starts) & (arr[last_ends - 1] == CARRIAGE_RETURN)
+
+    keep = np.ones(len(starts), dtype='bool')
+    for col, func, value in conditions:
+        i = column_names.index(col)
+        raw = _gather_fields(arr, starts[:, i], ends[:, i])
+        keep &= _bytes_condition(raw, func, value, col)
+    if conditions:
+        starts, ends = starts[keep], ends[keep]
+        if len(starts) == 0:
+            return {col: np.array([], dtype='S1') for col in usecols}
+
+    values = {}
+    for col in usecols:
+        i = column_names.index(col)
+        values[col] = _gather_fields(arr, starts[:, i], ends[:, i])
+    return values
+
+
+def _bytes_condition(raw, func, value, col):
+    """
+    Evaluates a condition on the raw bytes of a column. The bytes are
+    compared as numbers when the condition uses one and empty fields are
+    then missing numbers, which never match.
+
+    Returns
+    -------
+    A boolean array
+    """
+    if isinstance(value, str):
+        return func(_decode_bytes(raw), value)
+    present = raw != b''
+    if present.all():
+        present = slice(None)
+    mask = np.zeros(len(raw), dtype='bool')
+    for dtype in ('int', 'float'):
+        try:
+            mask[present] = func(raw[present].astype(dtype), value)
+            return mask
+        except ValueError:
+            pass
+    raise ValueError(f'Column {col!r} has values that cannot be compared with a number')
+
+
+def _gather_fields(arr, starts, ends):
+    """
+    Copies the bytes between each start and end position into a single
+    fixed-width bytes array
+    """
+    n = len(arr)
+    lengths = ends - starts
+    width = max(int(lengths.max()), 1)
+    chars = np.empty((len(starts), width), dtype=np.uint8)
+
+    # each field is read as a full-width window of the buffer. The last few
+    # windows would run past its end so they come from a zero-padded tail.
+    k = np.searchsorted(starts, n - width, side='right')
+    if k:
+        chars[:k] = _windows(arr, width)[starts[:k]]
+    tail_start = max(n - width, 0)
+    tail = np.zeros(n - tail_start + width, dtype=np.uint8)
+    tail[:n - tail_start] = arr[tail_start:]
+    chars[k:] = _windows(tail, width)[starts[k:] - tail_start]
+
+    chars *= np.arange(width) < lengths[:, None]
+    return chars.view(f'S{width}').ravel()
+
+
+def _windows(arr, width):
+    # a read-only view of every run of `width` consecutive bytes
+    shape = (len(arr) - width + 1, width)
+    return as_strided(arr, shape=shape, strides=(1, 1), writeable=False)
+
+
+def _convert_values(values, dtypes=None, string_storage='object'):
+    """
+    Converts the raw values of each column to arrays. Columns found in
+    `dtypes` are converted directly. The data type of every other column
+    is inferred from a sample of its first values as int, float or object
+    and the whole column is then converted once. Only when a later value
+    does not fit is the column converted again with the next data type.
+
+    Parameters
+    ----------
+    values: dict of column names mapped to lists of strings or bytes arrays
+    dtypes: dict of column names mapped to NumPy data types
+        Optional.
+    string_storage: str
+        'buffer' to convert the string columns of bytes arrays straight to
+        StringArrays. See `read_csv`.
+
+    Returns
+    -------
+    A dictionary of column names mapped to NumPy arrays
+    """
+    if dtypes is None:
+        dtypes = {}
     new_data = {}
     for col, vals in values.items():
+        if col in dtypes:
+            try:
+                new_data[col] = _convert_column(vals, dtypes[col], string_storage)
+            except ValueError:
+                raise ValueError(f'Column {col!r} contains values that cannot be '
+                                 f'converted to {dtypes[col]}') from None
+            continue
+
+        inferred = _infer_dtype(vals[:INFER_ROWS])
+        for dtype in INFER_ORDER[INFER_ORDER.index(inferred):]:
+            try:
+                new_data[col] = _convert_column(vals, dtype, string_storage)
+                break
+            except ValueError:
+                pass
+    return new_data
+
+
+def _infer_dtype(vals):
+    for dtype in INFER_ORDER[:-1]:
         try:
-            new_data[col] = np.array(vals, dtype='int')
+            _convert_column(vals, dtype)
+            return dtype
         except ValueError:
+            pass
+    return INFER_ORDER[-1]
+
+
+def _check_dtypes(dtypes):
+    """
+    Validates the data types requested for the columns of a reader
+
+    Returns
+    -------
+    A dictionary of column names mapped to NumPy data types
+    """
+    if dtypes is None:
+        return None
+    if not isinstance(dtypes, dict):
+        raise TypeError('`dtype` must be a dictionary')
+    new_dtypes = {}
+    for col, dtype in dtypes.items():
+        if dtype in (str, 'str', 'string'):
+            dtype = 'O'
+        try:
+            dtype = np.dtype(dtype)
+        except TypeError:
+            raise TypeError(f'{dtype!r} is not a data type') from None
+        if dtype.kind not in 'biufOM':
+            raise ValueError(f'Column {col!r} cannot be read as {dtype}')
+        new_dtypes[col] = dtype
+    return new_dtypes
+
+
+def _convert_column(vals, dtype, string_storage='object'):
+    kind = np.dtype(dtype).kind
+    if kind == 'b':
+        return _parse_bools(vals)
+    if isinstance(vals, np.ndarray) and vals.dtype.kind == 'S':
+        if kind == 'O':
+            if string_storage == 'buffer':
+                return _bytes_to_strings(vals)
+            return _decode_bytes(vals)
+        if kind in 'iu':
+            return _parse_ints(vals, dtype)
+        return vals.astype(dtype)
+    return np.array(vals, dtype=dtype)
+
+
+def _parse_ints(vals, dtype):
+    """
+    Converts a bytes array of decimal integers with NumPy arithmetic on
+    one character position of every value at a time, the reverse of
+    `_format_ints`. Values written any other way, such as with spaces or
+    more than 18 digits, are converted one at a time by NumPy, which
+    raises a ValueError for values that are not integers.
+    """
+    dtype = np.dtype(dtype)
+    width = vals.dtype.itemsize
+    if len(vals) == 0 or width > 18:
+        return vals.astype(dtype)
+    # each row holds one character position of every value
+    chars = np.ascontiguousarray(vals.view(np.uint8).reshape(len(vals), width).T)
+    negative = chars[0] == ord('-')
+    signed = negative | (chars[0] == ord('+'))
+
+    # every value is an optional sign and at least one digit followed by
+    # the null padding
+    null = chars == 0
+    digits = chars - np.uint8(ord('0'))
+    is_digit = digits <= 9
+    other = ~(is_digit | null)
+    other[0] &= ~signed
+    if (other.any() or null[0].any() or (null[:-1] & ~null[1:]).any()
+            or (signed & null[1] if width > 1 else signed).any()):
+        return vals.astype(dtype)
+
+    # the padding adds a trailing 0 digit for each missing character
+    digits *= is_digit
+    result = np.zeros(len(vals), dtype='int64')
+    padding = np.zeros(len(vals), dtype=np.uint8)
+    for j in range(width):
+        result *= 10
+        result += digits[j]
+        padding += null[j]
+    if padding.any():
+        result //= 10 ** np.arange(width, dtype='int64')[padding]
+    np.negative(result, out=result, where=negative)
+
+    if dtype != result.dtype:
+        info = np.iinfo(dtype)
+        if result.min() < info.min or result.max() > info.max:
+            return vals.astype(dtype)
+        result = result.astype(dtype)
+    return result
+
+
+def _parse_bools(vals):
+    """
+    Converts raw strings such as 'True' and 'false' or '1' and '0' to
+    booleans. Raises a ValueError for any other value.
+    """
+    vals = np.asarray(vals)
+    if vals.dtype.kind == 'S':
+        true, false = [[val.encode() for val in vals] for vals in (TRUE_VALUES, FALSE_VALUES)]
+    else:
+        true, false = TRUE_VALUES, FALSE_VALUES
+    is_true = np.isin(vals, true)
+    if not (is_true | np.isin(vals, false)).all():
+        raise ValueError('Boolean values must be one of '
+                         f'{", ".join(TRUE_VALUES + FALSE_VALUES)}')
+    return is_true
+
+
+def _bytes_to_strings(vals):
+    """
+    Builds a StringArray from a bytes array without creating a Python
+    string for each value. The null padding of every value is dropped and
+    the bytes left are laid end to end in one buffer.
+    """
+    width = vals.dtype.itemsize
+    chars = vals.view(np.uint8).reshape(len(vals), width)
+    # like NumPy, a value ends at its last byte that is not null
+    present = chars[:, ::-1] != 0
+    lengths = np.where(present.any(axis=1), width - present.argmax(axis=1), 0)
+    offsets = np.zeros(len(vals) + 1, dtype='int64')
+    np.cumsum(lengths, out=offsets[1:])
+    data = chars[np.arange(width) < lengths[:, None]]
+
+    # every value is valid UTF-8 when the whole buffer is and no value
+    # starts with a continuation byte
+    starts = offsets[:-1][lengths > 0]
+    try:
+        if (data[starts] & 0xC0 == 0x80).any():
+            raise UnicodeDecodeError('utf-8', b'', 0, 1, 'invalid start byte')
+        data.tobytes().decode('utf-8')
+    except UnicodeDecodeError:
+        # finds and reports the value that cannot be decoded
+        _decode_bytes(vals)
+        raise
+    return StringArray.from_buffers(offsets, data)
+
+
+def _decode_bytes(vals):
+    """
+    Decodes a bytes array as UTF-8 into an object array of strings.
+    Columns that repeat their values decode each distinct value only once.
+    """
+    # decoding the list of bytes objects is faster than np.char.decode
+    vals = vals.tolist()
+    uniques = dict.fromkeys(vals)
+    strings = np.empty(len(vals), dtype='O')
+    if len(uniques) > len(vals) // 2:
+        strings[:] = [val.decode('utf-8') for val in vals]
+        return strings
+    for val in uniques:
+        uniques[val] = val.decode('utf-8')
+    strings[:] = list(map(uniques.__getitem__, vals))
+    return strings
+
+
+def _format_field_bytes(values):
+    """
+    Formats every value of a column as a fixed-width bytes array
+
+    Returns
+    -------
+    A bytes array padded with null bytes on either side
+    """
+    if isinstance(values, Categorical):
+        # each category is encoded once
+        return _format_objects(np.append(values.categories, None))[values.codes]
+    if isinstance(values, StringArray):
+        _check_csv_bytes(values.data[values.offsets[0]:values.offsets[-1]].tobytes())
+        # the bytes of each string are laid into the rows of a matrix
+        lengths = np.diff(values.offsets)
+        width = max(lengths.max(initial=0), 1)
+        chars = np.zeros((len(values), width), dtype=np.uint8)
+        chars[np.arange(width) < lengths[:, None]] = \
+            values.data[values.offsets[0]:values.offsets[-1]]
+        return chars.view(f'S{width}').ravel()
+    if isinstance(values, NullableArray):
+        # missing values are written as empty fields
+        return np.where(values.valid, _format_field_bytes(values.values), b'')
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind == 'b':
+        return np.array([b'False', b'True'])[values.view(np.uint8)]
+    if kind in 'iu':
+        return _format_ints(values)
+    if kind == 'O':
+        return _format_objects(values)
+    if kind in 'mM':
+        # missing datetimes are written as empty fields
+        return np.where(np.isnat(values), b'', values.astype('S'))
+    return values.astype('S')
+
+
+def _format_ints(values):
+    # digits are computed for the whole column at once, right to left
+    if len(values) == 0:
+        return values.astype('S')
+    if values.dtype.kind == 'u':
+        # unsigned ints can be too large for int64
+        mag = values.astype('uint64')
+    elif values.min() == np.iinfo(values.dtype).min:
+        return values.astype('S')
+    else:
+        mag = np.abs(values.astype('int64'))
+    width = len(str(mag.max())) + bool(values.min() < 0)
+    chars = np.zeros((len(values), width), dtype=np.uint8)
+    for j in range(width - 1, -1, -1):
+        digits = (mag % 10).astype(np.uint8) + ord('0')
+        chars[:, j] = np.where((mag > 0) | (j == width - 1), digits, 0)
+        mag //= 10
+    chars[:, 0] = np.where(values < 0, ord('-'), chars[:, 0])
+    return chars.view(f'S{width}').ravel()
+
+
+def _format_objects(values):
+    """
+    Encodes the strings of an object column as UTF-8. Columns that repeat
+    their values encode each distinct value only once.
+    """
+    vals = values.tolist()
+    uniques = dict.fromkeys(vals)
+    if len(uniques) > len(vals) // 2:
+        uniques = vals
+    encoded = [b'' if val is None else str(val).encode('utf-8') for val in uniques]
+    _check_csv_bytes(b''.join(encoded))
+    encoded = np.array(encoded, dtype='S')
+    if uniques is vals:
+        return encoded
+    index = {val: i for i, val in enumerate(uniques)}
+    codes = np.fromiter(map(index.__getitem__, vals), dtype=np.intp, count=len(vals))
+    return encoded[codes]
+
+
+def _check_csv_bytes(data):
+    # a field that holds any of these bytes would be split or cut when read
+    if any(char in data for char in CSV_UNSAFE_BYTES):
+        raise ValueError('Strings with a comma, quote, line break or null byte '
+                         'cannot be written without quotes')
+
+
+def _pack_lines(fields):
+    """
+    Packs columns of fixed-width bytes into comma-separated lines. Every
+    row is laid out at full width in one array and the null padding is
+    then removed in a single pass.
+
+    Returns
+    -------
+    bytes of all the lines
+    """
+    n = len(fields[0])
+    widths = [arr.dtype.itemsize for arr in fields]
+    rows = np.zeros((n, sum(widths) + len(fields)), dtype=np.uint8)
+    pos = 0
+    for arr, width in zip(fields, widths):
+        rows[:, pos:pos + width] = arr.view(np.uint8).reshape(n, width)
+        rows[:, pos + width] = COMMA
+        pos += width + 1
+    rows[:, -1] = NEWLINE
+    rows = rows.ravel()
+    return rows[rows != 0].tobytes()
+
+
+def read_cub(path, columns=None, mmap=True, filter=None, string_storage='object'):
+    """
+    Read in a binary columnar file written by `DataFrame.to_cub`
+
+    Parameters
+    ----------
+    path: string of file location
+    columns: list of column names
+        Optional. Only these columns are read.
+    mmap: bool
+        If True, numeric and boolean columns are read-only views of the
+        file mapped into memory. Nothing is parsed or copied so the
+        DataFrame is ready at once and the operating system only reads
+        the parts of the file that are touched. Columns are copied when the
+        file has more than one row group or rows are filtered. If False,
+        the buffers of the selected columns are read into memory.
+    filter: tuple or list of tuples
+        Optional. Keep only the rows that match a condition given as a
+        (column name, operator, value) tuple such as ('salary', '>', 50000).
+        The operator is one of <, <=, >, >=, == or !=. A list of conditions
+        keeps the rows that match all of them. Missing values never match.
+        Row groups whose statistics show that none of their rows can match
+        are not read at all.
+    string_storage: str
+        'object' to read string columns as object arrays or 'buffer' to read
+        them as StringArrays, which are views of the file when it is mapped
+        into memory.
+
+    Returns
+    -------
+    A DataFrame
+    """
+    _check_string_storage(string_storage)
+    with open(path, 'rb') as f:
+        if f.read(len(CUB_MAGIC)) != CUB_MAGIC:
+            raise ValueError(f'{path} is not a cub file')
+        f.seek(-8 - len(CUB_MAGIC), 2)
+        footer_size = int.from_bytes(f.read(8), 'little')
+        f.seek(-8 - len(CUB_MAGIC) - footer_size, 2)
+        footer = json.loads(f.read(footer_size).decode('utf-8'))
+        if footer['version'] != CUB_VERSION:
+            raise ValueError(f'Unsupported cub file version {footer["version"]}')
+
+        column_names = [meta['name'] for meta in footer['columns']]
+        _, conditions = _check_selection(column_names, where=filter)
+        if columns is None:
+            columns = column_names
+        elif isinstance(columns, str):
+            columns = [columns]
+        elif not isinstance(columns, list):
+            raise TypeError('`columns` must be a string or a list')
+        for col in columns:
+            if col not in column_names:
+                raise ValueError(f'Column {col!r} does not exist')
+        dtypes = {meta['name']: meta['dtype'] for meta in footer['columns']}
+        nullable = {meta['name'] for meta in footer['columns'] if meta.get('nullable')}
+        conditions = [(col, func, _datetime_operand(value))
+                      if dtypes[col] != 'string' and np.dtype(dtypes[col]).kind == 'M'
+                      else (col, func, value) for col, func, value in conditions]
+
+        if mmap:
+            # the map stays open for as long as any column views it
+            buf = _map_file(f)
+        else:
+            buf = f
+
+        parts = []
+        for group in footer['row_groups']:
+            metas = dict(zip(column_names, group['columns']))
+            if not all(_group_may_match(metas[col]['stats'], func, value, col)
+                       for col, func, value in conditions):
+                continue
+
+            n = group['num_rows']
+            part = {}
+            keep = None
+            for col, func, value in conditions:
+                values = _read_column(buf, metas[col], dtypes[col], n, string_storage)
+                mask = _condition_mask(values, func, value, col)
+                keep = mask if keep is None else keep & mask
+            for col in columns:
+                values = _read_column(buf, metas[col], dtypes[col], n, string_storage)
+                part[col] = values if keep is None else values[keep]
+            parts.append(part)
+
+    if not parts:
+        return DataFrame({col: _empty_column(dtypes[col], col in nullable)
+                          for col in columns})
+    if len(parts) == 1:
+        return DataFrame(parts[0])
+    return DataFrame(_concat_values(parts))
+
+
+def _read_column(buf, meta, dtype, n, string_storage='object'):
+    if dtype == 'string':
+        offsets = _read_buffer(buf, meta['offsets'], 'int64', n + 1)
+        data = _read_buffer(buf, meta['data'], 'uint8', int(offsets[-1]))
+        nulls = _read_buffer(buf, meta['nulls'], 'bool', n) if 'nulls' in meta else None
+        if string_storage == 'buffer':
+            return StringArray.from_buffers(offsets, data, nulls)
+        return _decode_strings(offsets, data, nulls)
+    values = _read_buffer(buf, meta['data'], dtype, n)
+    if 'validity' in meta:
+        validity = _read_buffer(buf, meta['validity'], 'uint8', (n + 7) // 8)
+        return NullableArray.from_buffers(values, validity)
+    return values
+
+
+def _empty_column(dtype, nullable=False):
+    if nullable:
+        return NullableArray(np.array([], dtype=dtype))
+    return np.array([], dtype='O' if dtype == 'string' else dtype)
+
+
+def _column_stats(values):
+    """
+    Finds the minimum, maximum and number of missing values of a column.
+    The minimum and maximum are None when every value is missing.
+
+    Returns
+    -------
+    A dictionary that can be stored as JSON
+    """
+    if isinstance(values, NullableArray):
+        valid = values.valid
+        stats = _column_stats(values.values[valid])
+        stats['null_count'] = len(values) - int(np.count_nonzero(valid))
+        return stats
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind == 'O':
+        nulls = values == None
+    elif kind == 'f':
+        nulls = np.isnan(values)
+    elif kind in 'mM':
+        nulls = np.isnat(values)
+    else:
+        nulls = np.zeros(len(values), dtype='bool')
+    present = values[~nulls]
+
+    stats = {'min': None, 'max': None, 'null_count': int(nulls.sum())}
+    if len(present):
+        if kind == 'M':
+            # datetimes are stored as ISO 8601 strings
+            stats['min'], stats['max'] = str(present.min()), str(present.max())
+        elif kind == 'm':
+            stats['min'], stats['max'] = present.astype('int64').min().item(), \
+                present.astype('int64').max().item()
+        elif kind == 'O':
+            stats['min'], stats['max'] = min(present), max(present)
+        else:
+            stats['min'], stats['max'] = present.min().item(), present.max().item()
+    return stats
+
+
+def _group_may_match(stats, func, value, col):
+    """
+    Uses the statistics of a column in a row group to decide whether any
+    of its rows could match a condition
+    """
+    low, high = stats['min'], stats['max']
+    if low is None:
+        return False
+    if isinstance(value, np.datetime64):
+        low, high = np.datetime64(low), np.datetime64(high)
+    try:
+        if func is lt:
+            return low < value
+        if func is le:
+            return low <= value
+        if func is gt:
+            return high > value
+        if func is ge:
+            return high >= value
+        if func is eq:
+            return low <= value <= high
+        return not low == high == value
+    except TypeError:
+        raise ValueError(f'Column {col!r} cannot be compared with {value!r}') from None
+
+
+def _condition_mask(values, func, value, col):
+    """
+    Evaluates a condition on every value of a column. Missing values
+    never match.
+
+    Returns
+    -------
+    A boolean array
+    """
+    kind = values.dtype.kind
+    if isinstance(values, ColumnArray):
+        present = ~values.isna()
+    elif kind == 'O':
+        present = values != None
+    elif kind == 'f':
+        present = ~np.isnan(values)
+    elif kind in 'mM':
+        present = ~np.isnat(values)
+    else:
+        present = np.ones(len(values), dtype='bool')
+
+    mask = np.zeros(len(values), dtype='bool')
+    try:
+        mask[present] = func(values[present], value)
+    except TypeError:
+        raise ValueError(f'Column {col!r} cannot be compared with {value!r}') from None
+    return mask
+
+
+def _write_buffer(f, arr):
+    """
+    Writes the raw data of an array at the next aligned position of a file
+
+    Returns
+    -------
+    The byte offset of the data in the file
+    """
+    f.write(bytes(-f.tell() % CUB_ALIGNMENT))
+    offset = f.tell()
+    f.write(np.ascontiguousarray(arr).tobytes())
+    return offset
+
+
+def _read_buffer(f, offset, dtype, count):
+    # a memory map is viewed in place while a file is read into memory
+    if isinstance(f, mmap.mmap):
+        return np.frombuffer(f, dtype=dtype, count=count, offset=offset)
+    arr = np.empty(count, dtype=dtype)
+    f.seek(offset)
+    f.readinto(arr)
+    return arr
+
+
+def _string_buffers(values, col):
+    # a StringArray already holds its strings encoded
+    if isinstance(values, StringArray):
+        start, stop = values.offsets[0], values.offsets[-1]
+        return values.offsets - start, values.data[start:stop], values.nulls
+    return _encode_strings(np.asarray(values), col)
+
+
+def _encode_strings(values, col=None):
+    """
+    Encodes an object array of strings as UTF-8
+
+    Returns
+    -------
+    An int64 array of the start of each string and the end of the last,
+    a uint8 array of the bytes of every string and a boolean array that
+    marks missing values
+    """
+    nulls = values == None
+    encoded = []
+    for val in values:
+        if val is None:
+            encoded.append(b'')
+        elif isinstance(val, str):
+            encoded.append(val.encode('utf-8'))
+        else:
+            name = 'String columns' if col is None else f'Column {col!r}'
+            raise TypeError(f'{name} can only contain strings and None')
+    offsets = np.zeros(len(values) + 1, dtype='int64')
+    np.cumsum([len(val) for val in encoded], out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype='uint8')
+    return offsets, data, nulls
+
+
+def _decode_strings(offsets, data, nulls=None):
+    data = data.tobytes()
+    bounds = zip(offsets[:-1].tolist(), offsets[1:].tolist())
+    strings = [data[start:stop].decode('utf-8') for start, stop in bounds]
+    values = np.array(strings, dtype='O')
+    if nulls is not None:
+        values[nulls] = None
+    return values
+
+
+def read_sql(query, connection, params=None, chunksize=None, arraysize=10_000):
+    """
+    Read the result of a SQL query on a SQLite database as a DataFrame
+
+    Rows are fetched `arraysize` at a time with `fetchmany` and every
+    column is built directly as an array. Columns holding only integers
+    are read as int, columns holding integers and reals (or NULL) as float
+    with NaN for NULL, and any other column as strings with None for NULL.
+
+    Parameters
+    ----------
+    query: str of SQL query
+    connection: sqlite3.Connection or string of database file location
+        A file location opens a connection that is closed once the rows
+        are read, after the last chunk when `chunksize` is given.
+    params: sequence or dict
+        Optional. Values bound to the placeholders of the query
+    chunksize: int
+        Optional. When given, an iterator of DataFrames of at most
+        `chunksize` rows is returned. The data type of each column is
+        found separately for each chunk.
+    arraysize: int
+        Number of rows fetched at once when `chunksize` is not given
+
+    Returns
+    -------
+    A DataFrame or an iterator of DataFrames when `chunksize` is given
+    """
+    if not isinstance(query, str):
+        raise TypeError('`query` must be a string')
+    for name, value in [('chunksize', chunksize), ('arraysize', arraysize)]:
+        if value is None:
+            continue
+        if not isinstance(value, int):
+            raise TypeError(f'`{name}` must be an int')
+        if value < 1:
+            raise ValueError(f'`{name}` must be a positive integer')
+
+    with ExitStack() as stack:
+        con = stack.enter_context(_sql_connection(connection))
+        cursor = con.execute(query, () if params is None else params)
+        if cursor.description is None:
+            raise ValueError('`query` does not return any rows')
+        column_names = [desc[0] for desc in cursor.description]
+        if chunksize is not None:
+            # the chunks close the connection when they are done
+            return _read_sql_chunks(cursor, column_names, chunksize, stack.pop_all())
+
+        cursor.arraysize = arraysize
+        columns = [[] for _ in column_names]
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for col, vals in zip(columns, zip(*rows)):
+                col.extend(vals)
+        return _sql_frame(column_names, columns)
+
+
+def _read_sql_chunks(cursor, column_names, chunksize, stack):
+    cursor.arraysize = chunksize
+    with stack:
+        try:
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield _sql_frame(column_names, list(zip(*rows)))
+        finally:
+            cursor.close()
+
+
+def _sql_frame(column_names, columns):
+    return DataFrame({col: _python_column(vals) for col, vals in zip(column_names, columns)})
+
+
+def _python_column(vals):
+    """
+    Builds an array from a sequence of Python values. Integers become an
+    int array, integers and floats mixed with None a float array with NaN
+    for None and booleans a bool array. Anything else is kept as objects.
+    """
+    types = set(map(type, vals))
+    if types and types <= {bool}:
+        return np.array(vals, dtype='bool')
+    if types <= {int}:
+        try:
+            return np.array(vals, dtype='int64')
+        except OverflowError:
+            pass
+    elif types <= {int, float, type(None)}:
+        return np.array(vals, dtype='float64')
+    arr = np.empty(len(vals), dtype='O')
+    arr[:] = vals
+    return arr
+
+
+def _sql_values(values):
+    # converts an array to Python objects that sqlite3 can bind
+    kind = values.dtype.kind
+    if kind in 'mM':
+        nulls = np.isnat(values)
+        if kind == 'M':
+            values = np.datetime_as_string(values).astype('O')
+        else:
+            values = values.astype('int64').astype('O')
+        values[nulls] = None
+    elif kind == 'f':
+        nulls = np.isnan(values)
+        if nulls.any():
+            values = values.astype('O')
+            values[nulls] = None
+    return values.tolist()
+
+
+def _sql_name(name):
+    if not isinstance(name, str):
+        raise TypeError('Column and table names must be strings')
+    return '"' + name.replace('"', '""') + '"'
+
+
+@contextmanager
+def _sql_connection(connection):
+    """
+    Provides the sqlite3 connection given as is or a new connection to the
+    database file location given, which is closed afterwards
+    """
+    if isinstance(connection, sqlite3.Connection):
+        yield connection
+        return
+    if not isinstance(connection, str):
+        raise TypeError('`connection` must be a sqlite3 connection or a string '
+                        'of a database file location')
+    con = sqlite3.connect(connection)
+    try:
+        yield con
+    finally:
+        con.close()
+
+
+def read_json_lines(path, chunksize=None, columns=None, compression='infer'):
+    """
+    Read in a JSON Lines file, which holds one JSON object per line, as a
+    DataFrame
+
+    The file is parsed one line at a time and each value is appended to a
+    buffer for its column, so the records themselves are never kept. A key
+    missing from a record is read as NaN in numeric columns and None in
+    any other column. Nested objects and arrays are kept as Python objects.
+
+    Parameters
+    ----------
+    path: string of file location
+    chunksize: int
+        Optional. When given, an iterator of DataFrames of at most
+        `chunksize` rows is returned. Columns are never dropped from a
+        later chunk, but a key first found in a later chunk adds a column
+        from that chunk on.
+    columns: list of str
+        Optional. The keys to read, in the order of the returned columns.
+        By default every key is read in the order it is first found.
+    compression: str or None
+        See `read_csv`
+
+    Returns
+    -------
+    A DataFrame or an iterator of DataFrames when `chunksize` is given
+    """
+    if chunksize is not None:
+        if not isinstance(chunksize, int):
+            raise TypeError('`chunksize` must be an int')
+        if chunksize < 1:
+            raise ValueError('`chunksize` must be a positive integer')
+    if columns is not None:
+        if not isinstance(columns, list):
+            raise TypeError('`columns` must be a list')
+        for col in columns:
+            if not isinstance(col, str):
+                raise TypeError('All column names must be a string')
+        if len(set(columns)) != len(columns):
+            raise ValueError('`columns` must not contain duplicates')
+
+    compression = _infer_compression(path, compression)
+    chunks = _read_json_chunks(path, chunksize, columns, compression)
+    if chunksize is not None:
+        return chunks
+    df = next(chunks, None)
+    if df is None:
+        if not columns:
+            raise ValueError(f'{path!r} does not contain any records')
+        df = DataFrame({col: np.empty(0, dtype='O') for col in columns})
+    return df
+
+
+def _read_json_chunks(path, chunksize, columns, compression):
+    buffers = {col: [] for col in columns or []}
+    n = 0
+    with _open_text(path, compression) as f:
+        for i, line in enumerate(f, 1):
+            if not line.strip():
+                continue
             try:
-                new_data[col] = np.array(vals, dtype='float')
+                record = json.loads(line)
             except ValueError:
-                new_data[col] = np.array(vals, dtype='O')
-    return DataFrame(new_data)
+                raise ValueError(f'Line {i} of {path!r} is not valid JSON') from None
+            if not isinstance(record, dict):
+                raise ValueError(f'Line {i} of {path!r} is not a JSON object')
+
+            for col, buf in buffers.items():
+                buf.append(record.get(col))
+            if columns is None and not record.keys() <= buffers.keys():
+                # a new key is missing from every earlier record
+                for col, val in record.items():
+                    if col not in buffers:
+                        buffers[col] = [None] * n + [val]
+            n += 1
+            if n == chunksize:
+                yield DataFrame({col: _python_column(buf) for col, buf in buffers.items()})
+                buffers = {col: [] for col in buffers}
+                n = 0
+    if n:
+        yield DataFrame({col: _python_column(buf) for col, buf in buffers.items()})
+
@@ -0,0 +1,1756 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import gzip
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+import pytest
+
+import pandas_cub_final as pdc
+from tests import assert_df_equals
+
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+df_emp = pdc.read_csv('data/employee.csv')
+
+
+class TestReadCSVChunks:
+
+    def test_chunks(self):
+        chunks = list(pdc.read_csv('data/employee.csv', chunksize=500))
+        assert [len(chunk) for chunk in chunks] == [500, 500, 500, 35]
+        for chunk in chunks:
+            assert chunk.columns == df_emp.columns
+            assert_df_equals(chunk.dtypes, df_emp.dtypes)
+
+        salary = np.concatenate([chunk._data['salary'] for chunk in chunks])
+        assert_array_equal(salary, df_emp._data['salary'])
+
+    def test_chunk_dtype_mismatch(self, tmp_path):
+        fn = tmp_path / 'mixed.csv'
+        fn.write_text('a,b\n1,1\n2,2\n3.5,\n4,3\n5,4\n')
+        for engine in ['python', 'numpy']:
+            chunks = pdc.read_csv(fn, chunksize=2, engine=engine, dtype={'b': 'O'})
+            assert next(chunks)._data['a'].dtype.kind == 'i'
+            chunk = next(chunks)
+            assert_array_equal(chunk._data['a'], [3.5, 4])
+            assert chunk._data['a'].dtype.kind == 'f'
+            chunk = next(chunks)
+            assert_array_equal(chunk._data['a'], [5.0])
+
+            chunks = pdc.read_csv(fn, chunksize=2, engine=engine)
+            next(chunks)
+            with pytest.raises(ValueError, match='line 4.*`dtype`'):
+                next(chunks)
+
+            chunks = pdc.read_csv(fn, chunksize=2, engine=engine, dtype={'b': 'int'})
+            next(chunks)
+            with pytest.raises(ValueError, match='line 4'):
+                next(chunks)
+
+    def test_bad_chunksize(self):
+        with pytest.raises(TypeError):
+            pdc.read_csv('data/employee.csv', chunksize=1.5)
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', chunksize=0)
+
+
+class TestNumpyEngine:
+
+    def test_same_as_python(self):
+        df_result = pdc.read_csv('data/employee.csv', engine='numpy')
+        assert_df_equals(df_result, df_emp)
+        assert_df_equals(df_result.dtypes, df_emp.dtypes)
+
+    def test_chunks(self):
+        chunks = list(pdc.read_csv('data/employee.csv', chunksize=500, engine='numpy'))
+        assert [len(chunk) for chunk in chunks] == [500, 500, 500, 35]
+        assert_df_equals(chunks[-1], df_emp.tail(35))
+
+    def test_line_endings(self, tmp_path):
+        fn = tmp_path / 'crlf.csv'
+        fn.write_bytes('a,b,c\r\n1,x,1.5\r\n-2,café,\r\n30,,2'.encode())
+        df_result = pdc.read_csv(fn, engine='numpy')
+        df_answer = pdc.DataFrame({'a': np.array([1, -2, 30]),
+                                   'b': np.array(['x', 'café', ''], dtype='O'),
+                                   'c': np.array(['1.5', '', '2'], dtype='O')})
+        assert_df_equals(df_result, df_answer)
+
+    def test_parse_ints(self):
+        rng = np.random.RandomState(0)
+        ints = rng.randint(-10 ** 17, 10 ** 17, 1000) // 10 ** rng.randint(0, 18, 1000)
+        for vals in [ints.astype('S'), np.array([b'0', b'-0', b'+12', b'7'])]:
+            assert_array_equal(pdc._parse_ints(vals, 'int64'), vals.astype('int64'))
+        arr = pdc._parse_ints(np.array([b'200', b'3']), 'uint8')
+        assert arr.dtype == 'uint8'
+        assert arr.tolist() == [200, 3]
+        # values in other forms are left to NumPy
+        assert pdc._parse_ints(np.array([b' 12', b'1_000']), 'int64').tolist() == [12, 1000]
+        arr = pdc._parse_ints(np.array([b'18446744073709551615']), 'uint64')
+        assert arr.tolist() == [2 ** 64 - 1]
+        for bad in [b'', b'-', b'+', b'1-', b'--1', b'1.5', b'1\x002', b'x']:
+            with pytest.raises(ValueError):
+                pdc._parse_ints(np.array([b'1', bad]), 'int64')
+
+    def test_bad_fields(self, tmp_path):
+        fn = tmp_path / 'bad.csv'
+        fn.write_text('a,b\n1,2\n3\n4,5\n')
+        with pytest.raises(ValueError):
+            pdc.read_csv(fn, engine='numpy')
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', engine='c')
+
+
+class TestMemoryMap:
+
+    def test_memory_map(self):
+        df_result = pdc.read_csv('data/employee.csv', memory_map=True)
+        assert_df_equals(df_result, df_emp)
+
+    def test_memory_map_chunks(self):
+        chunks = pdc.read_csv('data/employee.csv', chunksize=1000, memory_map=True)
+        assert [len(chunk) for chunk in chunks] == [1000, 535]
+
+    def test_memory_map_engine(self):
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', engine='python', memory_map=True)
+
+
+class TestParallelRead:
+
+    def test_workers(self):
+        df_result = pdc.read_csv('data/employee.csv', workers=3)
+        assert_df_equals(df_result, df_emp)
+
+        df_result = pdc.read_csv('data/employee.csv', workers=2, memory_map=True)
+        assert_df_equals(df_result, df_emp)
+
+    def test_reconcile_dtypes(self, tmp_path):
+        fn = tmp_path / 'mixed.csv'
+        first = ''.join(f'{i},{i}\n' for i in range(1000))
+        second = ''.join(f'{i}.5,x{i}\n' for i in range(1000))
+        fn.write_text('a,b\n' + first + second)
+        df_result = pdc.read_csv(fn, workers=2)
+        df_answer = pdc.read_csv(fn)
+        assert_df_equals(df_result.dtypes, df_answer.dtypes)
+        assert_df_equals(df_result, df_answer)
+        assert df_result._data['b'][0] == '0'
+
+    def test_bad_workers(self):
+        with pytest.raises(TypeError):
+            pdc.read_csv('data/employee.csv', workers='2')
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', workers=2, chunksize=10)
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', workers=2, engine='python')
+
+
+class TestReadCSVSelection:
+
+    def test_usecols(self):
+        for engine in ['python', 'numpy']:
+            df_result = pdc.read_csv('data/employee.csv', engine=engine,
+                                     usecols=['salary', 'dept'])
+            assert_df_equals(df_result, df_emp[['dept', 'salary']])
+
+    def test_where(self):
+        where = [('salary', '>', 50000), ('race', '==', 'Asian')]
+        bool_arr = (df_emp._data['salary'] > 50000) & (df_emp._data['race'] == 'Asian')
+        df_answer = df_emp[pdc.DataFrame({'keep': bool_arr})][['gender', 'salary']]
+        for kwargs in [{'engine': 'python'}, {'engine': 'numpy'}, {'workers': 2}]:
+            df_result = pdc.read_csv('data/employee.csv', usecols=['salary', 'gender'],
+                                     where=where, **kwargs)
+            assert_df_equals(df_result, df_answer)
+
+    def test_where_missing(self, tmp_path):
+        fn = str(tmp_path / 'a.csv')
+        with open(fn, 'w') as f:
+            f.write('a,b\nx,60000\ny,\nz,1.5\nw,40000\n')
+        for engine in ['python', 'numpy']:
+            df_result = pdc.read_csv(fn, engine=engine, where=('b', '>', 50000))
+            assert df_result._data['a'].tolist() == ['x']
+            df_result = pdc.read_csv(fn, engine=engine, where=('b', '!=', 1.5))
+            assert df_result._data['a'].tolist() == ['x', 'w']
+
+    def test_where_chunks(self):
+        chunks = pdc.read_csv('data/employee.csv', chunksize=100, engine='numpy',
+                              where=('salary', '>=', 150000))
+        salary = np.concatenate([chunk._data['salary'] for chunk in chunks])
+        answer = df_emp._data['salary']
+        assert_array_equal(salary, answer[answer >= 150000])
+
+    def test_bad_selection(self):
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', usecols=['wage'])
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', where=('salary', '=>', 5))
+
+        with pytest.raises(TypeError):
+            pdc.read_csv('data/employee.csv', where=['salary', '>', 5])
+
+        for engine in ['python', 'numpy']:
+            with pytest.raises(ValueError):
+                pdc.read_csv('data/employee.csv', engine=engine, where=('race', '>', 5))
+
+
+class TestCub:
+
+    def test_round_trip(self, tmp_path):
+        fn = tmp_path / 'employee.cub'
+        df = df_emp.copy()
+        df['high'] = df_emp['salary'] > 80000
+        df['ratio'] = df_emp['salary'] / 1000
+        df['none'] = np.array(['a', None] * 767 + ['b'], dtype='O')
+        df.to_cub(fn)
+        for mmap in [True, False]:
+            df_result = pdc.read_cub(fn, mmap=mmap)
+            assert_df_equals(df_result, df)
+            assert_df_equals(df_result.dtypes, df.dtypes)
+            assert df_result._data['none'][1] is None
+
+    def test_zero_copy(self, tmp_path):
+        fn = tmp_path / 'employee.cub'
+        df_emp.to_cub(fn)
+        salary = pdc.read_cub(fn)._data['salary']
+        assert not salary.flags.owndata
+        assert not salary.flags.writeable
+        assert pdc.read_cub(fn, mmap=False)._data['salary'].flags.writeable
+
+    def test_columns(self, tmp_path):
+        fn = tmp_path / 'employee.cub'
+        df_emp.to_cub(fn)
+        df_result = pdc.read_cub(fn, columns=['salary', 'race'])
+        assert_df_equals(df_result, df_emp[['salary', 'race']])
+
+        with pytest.raises(ValueError):
+            pdc.read_cub(fn, columns=['wage'])
+
+        with pytest.raises(ValueError):
+            pdc.read_cub('data/employee.csv')
+
+    def test_nullable(self, tmp_path):
+        fn = tmp_path / 'nullable.cub'
+        df = pdc.DataFrame({'a': pdc.NullableArray([1, None, 3] * 5),
+                            'b': pdc.NullableArray([True, None, False] * 5)})
+        for row_group_size in [None, 4]:
+            df.to_cub(fn, row_group_size=row_group_size)
+            for mmap in [True, False]:
+                df_result = pdc.read_cub(fn, mmap=mmap)
+                for col in ['a', 'b']:
+                    arr = df_result._data[col]
+                    assert isinstance(arr, pdc.NullableArray)
+                    assert arr.dtype == df._data[col].dtype
+                    assert_array_equal(arr.valid, df._data[col].valid)
+                    assert_array_equal(arr.values[arr.valid], df._data[col].values[arr.valid])
+
+        df_result = pdc.read_cub(fn, filter=('a', '>', 1))
+        assert df_result._data['a'].values.tolist() == [3] * 5
+        df_result = pdc.read_cub(fn, filter=('a', '>', 5))
+        assert isinstance(df_result._data['a'], pdc.NullableArray)
+        assert len(df_result) == 0
+
+    def test_bad_strings(self, tmp_path):
+        df = pdc.DataFrame({'a': np.array([1, 'x'], dtype='O')})
+        with pytest.raises(TypeError):
+            df.to_cub(tmp_path / 'bad.cub')
+
+
+class TestCubRowGroups:
+
+    def test_row_groups(self, tmp_path):
+        fn = tmp_path / 'employee.cub'
+        df_emp.to_cub(fn, row_group_size=100)
+        for mmap in [True, False]:
+            assert_df_equals(pdc.read_cub(fn, mmap=mmap), df_emp)
+
+        with pytest.raises(ValueError):
+            df_emp.to_cub(fn, row_group_size=0)
+
+    def test_filter(self, tmp_path):
+        fn = tmp_path / 'employee.cub'
+        df_emp.to_cub(fn, row_group_size=100)
+        filter = [('salary', '>', 50000), ('race', '==', 'Asian')]
+        bool_arr = (df_emp._data['salary'] > 50000) & (df_emp._data['race'] == 'Asian')
+        df_answer = df_emp[pdc.DataFrame({'keep': bool_arr})]
+        assert_df_equals(pdc.read_cub(fn, filter=filter), df_answer)
+
+        df_result = pdc.read_cub(fn, filter=('salary', '<', 0))
+        assert df_result.shape == (0, 4)
+        assert_df_equals(df_result.dtypes, df_emp.dtypes)
+
+        with pytest.raises(ValueError):
+            pdc.read_cub(fn, filter=('race', '>', 5))
+
+    def test_skip_row_groups(self, tmp_path, monkeypatch):
+        fn = tmp_path / 'sorted.cub'
+        df = df_emp.sort_values('salary')
+        df.to_cub(fn, row_group_size=100)
+
+        calls = []
+        read_column = pdc._read_column
+
+        def counting_read_column(*args):
+            calls.append(args)
+            return read_column(*args)
+
+        monkeypatch.setattr(pdc, '_read_column', counting_read_column)
+        df_result = pdc.read_cub(fn, columns=['salary'], filter=('salary', '>=', 150000))
+        salary = df._data['salary']
+        assert_array_equal(df_result._data['salary'], salary[salary >= 150000])
+        # only the last of the 16 row groups is read
+        assert len(calls) == 2
+
+    def test_nulls_never_match(self, tmp_path):
+        fn = tmp_path / 'nulls.cub'
+        df = pdc.DataFrame({'a': np.array([1.0, np.nan, 3.0]),
+                            'b': np.array(['x', None, 'y'], dtype='O')})
+        df.to_cub(fn, row_group_size=1)
+        assert len(pdc.read_cub(fn, filter=('a', '!=', 3.0))) == 1
+        assert len(pdc.read_cub(fn, filter=('b', '!=', 'x'))) == 1
+
+
+class TestCompressedCSV:
+
+    @pytest.mark.parametrize('module, ext', [('gzip', '.gz'), ('bz2', '.bz2'), ('lzma', '.xz')])
+    def test_compression(self, tmp_path, module, ext):
+        module = pytest.importorskip(module)
+        with open('data/employee.csv', 'rb') as f:
+            data = module.compress(f.read())
+        fn = tmp_path / ('employee.csv' + ext)
+        fn.write_bytes(data)
+        for engine in ['python', 'numpy']:
+            assert_df_equals(pdc.read_csv(fn, engine=engine), df_emp)
+
+        # detected from the magic number without an extension
+        fn = tmp_path / 'employee.dat'
+        fn.write_bytes(data)
+        chunks = list(pdc.read_csv(fn, engine='numpy', chunksize=1000))
+        assert [len(chunk) for chunk in chunks] == [1000, 535]
+
+    def test_bad_compression(self, tmp_path):
+        import gzip
+        fn = tmp_path / 'employee.csv.gz'
+        with open('data/employee.csv', 'rb') as f:
+            fn.write_bytes(gzip.compress(f.read()))
+
+        with pytest.raises(ValueError):
+            pdc.read_csv(fn, memory_map=True)
+
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', compression='zip')
+
+        with pytest.raises(OSError):
+            pdc.read_csv('data/employee.csv', compression='gzip')
+
+
+class TestToCSV:
+
+    def test_round_trip(self, tmp_path):
+        fn = tmp_path / 'employee.csv'
+        df = df_emp.copy()
+        df['ratio'] = df_emp['salary'] / 7
+        df['neg'] = df_emp['salary'] * -1
+        df_emp.to_csv(fn, chunksize=400)
+        with open('data/employee.csv', 'rb') as f1, open(fn, 'rb') as f2:
+            assert f1.read() == f2.read()
+
+        df.to_csv(fn)
+        df_result = pdc.read_csv(fn)
+        assert_df_equals(df_result, df)
+        assert_array_equal(df_result._data['ratio'], df._data['ratio'])
+
+    def test_formats(self, tmp_path):
+        fn = tmp_path / 'formats.csv'
+        df = pdc.DataFrame({'a': np.array([True, False]),
+                            'b': np.array(['café', None], dtype='O'),
+                            'c': np.array([1.5, np.nan]),
+                            'd': np.array([0, -12], dtype='int8')})
+        df.to_csv(fn)
+        assert fn.read_text(encoding='utf-8') == 'a,b,c,d\nTrue,café,1.5,0\nFalse,,nan,-12\n'
+
+    def test_special_strings(self, tmp_path):
+        fn = tmp_path / 'strings.csv'
+        values = ['plain', 'sémi;colon', "it's", '', 'tab\there']
+        df = pdc.DataFrame({'a': np.array(values, dtype='O'), 'b': np.arange(5)})
+        df.to_csv(fn)
+        assert_df_equals(pdc.read_csv(fn), df)
+        df_buf = pdc.read_csv('data/employee.csv', string_storage='buffer')
+        df_buf.to_csv(fn)
+        assert_df_equals(pdc.read_csv(fn), df_emp)
+
+        for value in ['a,b', 'say "hi"', 'two\nlines', 'cr\r', 'nul\0']:
+            arr = np.array(['x', value], dtype='O')
+            for values in [arr, pdc.Categorical(arr), pdc.StringArray(arr)]:
+                with pytest.raises(ValueError, match="Column 'a'"):
+                    pdc.DataFrame({'a': values}).to_csv(fn)
+
+    def test_unsigned(self, tmp_path):
+        fn = tmp_path / 'unsigned.csv'
+        values = [2 ** 63 + 5, 0, 2 ** 64 - 1, 7]
+        pdc.DataFrame({'c': np.array(values, dtype='uint64')}).to_csv(fn)
+        assert fn.read_text() == 'c\n' + ''.join(f'{val}\n' for val in values)
+        df_result = pdc.read_csv(fn, dtype={'c': 'uint64'})
+        assert df_result._data['c'].tolist() == values
+        assert df_result.dtypes._data['Data Type'].tolist() == ['uint']
+
+    def test_nullable(self, tmp_path):
+        fn = tmp_path / 'nullable.csv'
+        df = pdc.DataFrame({'a': pdc.NullableArray([10, None, -3]),
+                            'b': pdc.NullableArray([True, None, False])})
+        df.to_csv(fn)
+        assert fn.read_text() == 'a,b\n10,True\n,\n-3,False\n'
+
+    def test_compression(self, tmp_path):
+        import gzip
+        fn = tmp_path / 'employee.csv.gz'
+        df_emp.to_csv(fn)
+        with gzip.open(fn) as f1, open('data/employee.csv', 'rb') as f2:
+            assert f1.read() == f2.read()
+
+        with pytest.raises(ValueError):
+            df_emp.to_csv(fn, compression='zip')
+
+
+class TestReadManyCSV:
+
+    def write_shards(self, tmp_path):
+        text = open('data/employee.csv').read().splitlines(keepends=True)
+        header, lines = text[0], text[1:]
+        for i, start in enumerate(range(0, len(lines), 600)):
+            (tmp_path / f'2026-0{i}.csv').write_text(header + ''.join(lines[start:start + 600]))
+
+    def test_glob(self, tmp_path):
+        self.write_shards(tmp_path)
+        for workers in [None, 2]:
+            df_result = pdc.read_csv(str(tmp_path / '2026-*.csv'), workers=workers)
+            assert_df_equals(df_result, df_emp)
+
+    def test_source_column(self, tmp_path):
+        self.write_shards(tmp_path)
+        fns = [str(tmp_path / '2026-02.csv'), str(tmp_path / '2026-00.csv')]
+        df_result = pdc.read_csv(fns, usecols=['salary'], source_column='file')
+        assert df_result.columns == ['salary', 'file']
+        assert len(df_result) == 935
+        assert_array_equal(df_result._data['salary'][:335], df_emp._data['salary'][1200:])
+        assert df_result._data['file'][0] == fns[0]
+        assert df_result._data['file'][-1] == fns[1]
+
+    def test_reconcile_dtypes(self, tmp_path):
+        (tmp_path / 'a.csv').write_text('a,b\n1,1\n2,2\n')
+        (tmp_path / 'b.csv').write_text('a,b\n1.5,x\n')
+        df_result = pdc.read_csv(str(tmp_path / '*.csv'), workers=2)
+        df_answer = pdc.DataFrame({'a': np.array([1, 2, 1.5]),
+                                   'b': np.array(['1', '2', 'x'], dtype='O')})
+        assert_df_equals(df_result, df_answer)
+
+    def test_bad_files(self, tmp_path):
+        (tmp_path / 'a.csv').write_text('a,b\n1,1\n')
+        (tmp_path / 'b.csv').write_text('a,c\n1,1\n')
+        with pytest.raises(ValueError):
+            pdc.read_csv(str(tmp_path / '*.csv'))
+
+        with pytest.raises(FileNotFoundError):
+            pdc.read_csv(str(tmp_path / '*.tsv'))
+
+
+class TestReadCSVDtype:
+
+    def test_schema(self):
+        for engine in ['python', 'numpy']:
+            df_result = pdc.read_csv('data/employee.csv', engine=engine,
+                                     dtype={'salary': 'float', 'race': str})
+            assert df_result.dtypes._data['Data Type'].tolist() == [
+                'string', 'string', 'string', 'float']
+            assert_array_equal(df_result._data['salary'], df_emp._data['salary'] * 1.)
+
+    def test_bools(self, tmp_path):
+        fn = tmp_path / 'a.csv'
+        fn.write_text('a,b\ntrue,1\nFalse,0\n')
+        for engine in ['python', 'numpy']:
+            df_result = pdc.read_csv(str(fn), engine=engine, dtype={'a': 'bool', 'b': bool})
+            df_answer = pdc.DataFrame({'a': np.array([True, False]),
+                                       'b': np.array([True, False])})
+            assert_df_equals(df_result, df_answer)
+
+    def test_bad_schema(self, tmp_path):
+        with pytest.raises(TypeError):
+            pdc.read_csv('data/employee.csv', dtype='float')
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', dtype={'dept': 'float'})
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', dtype={'dept': 'datetime64[D]'})
+
+    def test_infer_past_sample(self, tmp_path):
+        fn = tmp_path / 'a.csv'
+        n = pdc.INFER_ROWS
+        fn.write_text('a,b\n' + '1,1\n' * n + '1.5,x\n')
+        for engine in ['python', 'numpy']:
+            df_result = pdc.read_csv(str(fn), engine=engine)
+            assert df_result._data['a'].dtype.kind == 'f'
+            assert df_result._data['a'][-1] == 1.5
+            assert df_result._data['b'].dtype.kind == 'O'
+            assert df_result._data['b'][-1] == 'x'
+
+
+class TestAsync:
+
+    def test_aread_csv(self):
+        df_result = asyncio.run(pdc.aread_csv('data/employee.csv', engine='numpy'))
+        assert_df_equals(df_result, df_emp)
+
+    def test_executors(self):
+        async def load(executor):
+            return await asyncio.gather(
+                pdc.aread_csv('data/employee.csv', executor=executor),
+                pdc.aread_csv('data/employee.csv', executor=executor, usecols=['salary']))
+
+        for pool in [ThreadPoolExecutor(2), ProcessPoolExecutor(2)]:
+            with pool:
+                df1, df2 = asyncio.run(load(pool))
+            assert_df_equals(df1, df_emp)
+            assert_df_equals(df2, df_emp[['salary']])
+
+        with pytest.raises(TypeError):
+            asyncio.run(pdc.aread_csv('data/employee.csv', executor=2))
+        with pytest.raises(ValueError):
+            asyncio.run(pdc.aread_csv('data/employee.csv', chunksize=10))
+
+    def test_apivot_table(self):
+        df_answer = df_emp.pivot_table(rows='dept', columns='gender',
+                                       values='salary', aggfunc='mean')
+        with ProcessPoolExecutor(1) as pool:
+            df_result = asyncio.run(df_emp.apivot_table(
+                rows='dept', columns='gender', values='salary', aggfunc='mean',
+                executor=pool))
+        assert_df_equals(df_result, df_answer)
+
+    def test_aiter_csv(self):
+        async def load():
+            return [df async for df in pdc.aiter_csv('data/employee.csv', 500)]
+
+        dfs = asyncio.run(load())
+        assert [len(df) for df in dfs] == [500, 500, 500, 35]
+        assert_df_equals(dfs[3], df_emp[1500:, :])
+
+        with pytest.raises(TypeError):
+            with ProcessPoolExecutor(1) as pool:
+                asyncio.run(pdc.aiter_csv('data/employee.csv', 500, pool).__anext__())
+
+    def test_cancel(self):
+        release = threading.Event()
+        ran = []
+
+        async def run():
+            with ThreadPoolExecutor(1) as pool:
+                # occupy the only thread so that the work stays queued
+                blocker = asyncio.get_event_loop().run_in_executor(pool, release.wait)
+                task = asyncio.ensure_future(pdc._run_in_executor(pool, ran.append, 1))
+                await asyncio.sleep(0.01)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                release.set()
+                await blocker
+
+        asyncio.run(run())
+        assert ran == []
+
+
+class TestSQL:
+
+    def test_round_trip(self, tmp_path):
+        fn = str(tmp_path / 'a.db')
+        df_emp.to_sql('emp', fn)
+        df_result = pdc.read_sql('SELECT * FROM emp', fn, arraysize=100)
+        assert_df_equals(df_result, df_emp)
+
+        df_result = pdc.read_sql('SELECT salary FROM emp WHERE gender = ?', fn,
+                                 params=['Female'])
+        assert_df_equals(df_result, df_emp[df_emp['gender'] == 'Female', ['salary']])
+
+    def test_chunks(self, tmp_path):
+        con = sqlite3.connect(str(tmp_path / 'a.db'))
+        df_emp.to_sql('emp', con)
+        dfs = list(pdc.read_sql('SELECT * FROM emp', con, chunksize=500))
+        assert [len(df) for df in dfs] == [500, 500, 500, 35]
+        assert_df_equals(dfs[3], df_emp[1500:, :])
+
+    def test_connections_closed(self, tmp_path, monkeypatch):
+        opened = []
+        sqlite_connect = sqlite3.connect
+
+        def connect(*args, **kwargs):
+            con = sqlite_connect(*args, **kwargs)
+            opened.append(con)
+            return con
+
+        monkeypatch.setattr(pdc.sqlite3, 'connect', connect)
+        fn = str(tmp_path / 'a.db')
+        df_emp.to_sql('emp', fn)
+        assert_df_equals(pdc.read_sql('SELECT * FROM emp', fn), df_emp)
+        with pytest.raises(ValueError):
+            pdc.read_sql('CREATE TABLE t (a)', fn)
+        chunks = pdc.read_sql('SELECT * FROM emp', fn, chunksize=1000)
+        assert len(next(chunks)) == 1000
+        assert len(list(chunks)) == 1
+
+        assert len(opened) == 4
+        for con in opened:
+            with pytest.raises(sqlite3.ProgrammingError):
+                con.execute('SELECT 1')
+
+    def test_nulls(self, tmp_path):
+        con = sqlite3.connect(':memory:')
+        df = pdc.DataFrame({'a': np.array([1.5, np.nan]),
+                            'b': np.array(['x', None], dtype='O'),
+                            'c': np.array([True, False])})
+        df.to_sql('t', con)
+        assert con.execute('SELECT * FROM t').fetchall() == [(1.5, 'x', 1), (None, None, 0)]
+        df_answer = pdc.DataFrame({'a': np.array([1.5, np.nan]),
+                                   'b': np.array(['x', None], dtype='O'),
+                                   'c': np.array([1, 0])})
+        assert_df_equals(pdc.read_sql('SELECT * FROM t', con), df_answer)
+
+        df_result = pdc.read_sql('SELECT * FROM t WHERE 0', con)
+        assert df_result.columns == ['a', 'b', 'c']
+        assert len(df_result) == 0
+
+    def test_datetimes(self):
+        con = sqlite3.connect(':memory:')
+        df = pdc.DataFrame({'a': np.array(['2020-01-02T10:30', 'NaT'], dtype='M8[m]'),
+                            'b': np.array(['2021-03-04', '2021-03-06'], dtype='M8[D]')})
+        df['c'] = df['b'] - df['a']
+        df.to_sql('t', con)
+        assert con.execute('SELECT * FROM t').fetchall() == [
+            ('2020-01-02T10:30', '2021-03-04', 614250), (None, '2021-03-06', None)]
+        assert con.execute("SELECT date(b, '+1 day') FROM t").fetchall() == [
+            ('2021-03-05',), ('2021-03-07',)]
+        df_result = pdc.read_sql('SELECT * FROM t', con)
+        assert df_result._data['b'].tolist() == ['2021-03-04', '2021-03-06']
+
+    def test_if_exists(self, tmp_path):
+        con = sqlite3.connect(':memory:')
+        df = pdc.DataFrame({'a': np.array([1, 2])})
+        df.to_sql('t', con)
+        with pytest.raises(ValueError):
+            df.to_sql('t', con)
+        df.to_sql('t', con, if_exists='append')
+        assert_array_equal(pdc.read_sql('SELECT a FROM t', con)._data['a'], [1, 2, 1, 2])
+        df.to_sql('t', con, if_exists='replace')
+        assert_array_equal(pdc.read_sql('SELECT a FROM t', con)._data['a'], [1, 2])
+
+        with pytest.raises(ValueError):
+            df.to_sql('t', con, if_exists='drop')
+        with pytest.raises(TypeError):
+            pdc.read_sql('SELECT a FROM t', 5)
+
+
+class TestJSONLines:
+
+    def write_events(self, tmp_path):
+        fn = tmp_path / 'events.jsonl'
+        fn.write_text('{"id": 1, "user": "a", "ok": true}\n'
+                      '\n'
+                      '{"id": 2, "ok": false, "ms": 1.5}\n'
+                      '{"id": 3, "user": "c", "ok": true, "tags": ["x"]}\n')
+        return str(fn)
+
+    def test_read(self, tmp_path):
+        fn = self.write_events(tmp_path)
+        df_result = pdc.read_json_lines(fn)
+        assert df_result.columns == ['id', 'user', 'ok', 'ms', 'tags']
+        assert_array_equal(df_result._data['id'], [1, 2, 3])
+        assert_array_equal(df_result._data['user'], np.array(['a', None, 'c'], dtype='O'))
+        assert_array_equal(df_result._data['ok'], [True, False, True])
+        assert_array_equal(df_result._data['ms'], [np.nan, 1.5, np.nan])
+        assert df_result._data['tags'].tolist() == [None, None, ['x']]
+
+    def test_columns(self, tmp_path):
+        fn = self.write_events(tmp_path)
+        df_result = pdc.read_json_lines(fn, columns=['ms', 'id'])
+        df_answer = pdc.DataFrame({'ms': np.array([np.nan, 1.5, np.nan]),
+                                   'id': np.array([1, 2, 3])})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(TypeError):
+            pdc.read_json_lines(fn, columns='id')
+
+    def test_chunks(self, tmp_path):
+        fn = self.write_events(tmp_path)
+        dfs = list(pdc.read_json_lines(fn, chunksize=2))
+        assert [len(df) for df in dfs] == [2, 1]
+        assert dfs[0].columns == ['id', 'user', 'ok', 'ms']
+        assert dfs[1].columns == ['id', 'user', 'ok', 'ms', 'tags']
+        assert_array_equal(dfs[1]._data['ms'], [np.nan])
+
+    def test_bad_lines(self, tmp_path):
+        fn = tmp_path / 'bad.jsonl'
+        fn.write_text('{"a": 1}\n[1, 2]\n')
+        with pytest.raises(ValueError, match='Line 2'):
+            pdc.read_json_lines(str(fn))
+        fn.write_text('{"a": 1}\n{"a": \n')
+        with pytest.raises(ValueError, match='Line 2'):
+            pdc.read_json_lines(str(fn))
+
+    def test_gzip(self, tmp_path):
+        fn = str(tmp_path / 'events.jsonl.gz')
+        with gzip.open(fn, 'wt') as f:
+            f.write('{"a": 1}\n{"a": 2}\n')
+        assert_array_equal(pdc.read_json_lines(fn)._data['a'], [1, 2])
+
+
+df_cat = pdc.read_csv('data/employee.csv', categorical=True)
+
+
+class TestCategorical:
+
+    def test_read_csv(self):
+        for col in ['dept', 'race', 'gender']:
+            assert isinstance(df_cat._data[col], pdc.Categorical)
+        assert df_cat.dtypes._data['Data Type'].tolist() == [
+            'category', 'category', 'category', 'int']
+        assert_df_equals(df_cat, df_emp)
+        assert df_cat._data['race'].categories.tolist() == sorted(
+            set(df_emp._data['race']))
+
+        df_result = pdc.read_csv('data/employee.csv', categorical=['gender'])
+        assert isinstance(df_result._data['gender'], pdc.Categorical)
+        assert not isinstance(df_result._data['dept'], pdc.Categorical)
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', categorical=['salary'])
+
+    def test_missing(self):
+        cat = pdc.Categorical(np.array(['b', None, 'a', 'b'], dtype='O'))
+        assert_array_equal(cat.codes, [1, -1, 0, 1])
+        assert cat[1] is None
+        df = pdc.DataFrame({'a': cat})
+        assert_array_equal(df.isna()._data['a'], [False, True, False, False])
+        assert_array_equal(df.count()._data['a'], [3])
+        assert_array_equal(df.nunique()._data['a'], [2])
+
+    def test_comparisons(self):
+        for value in ['Male', 'Female', 'Hispanic', 'Other', '']:
+            for col in ['gender', 'race']:
+                for op in ['__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__']:
+                    df_result = getattr(df_cat[col], op)(value)
+                    df_answer = getattr(df_emp[col], op)(value)
+                    assert_df_equals(df_result, df_answer)
+
+    def test_selection(self):
+        df_result = df_cat[df_cat['gender'] == 'Female']
+        assert isinstance(df_result._data['dept'], pdc.Categorical)
+        assert_df_equals(df_result, df_emp[df_emp['gender'] == 'Female'])
+        assert_df_equals(df_cat.head(), df_emp.head())
+        assert_df_equals(df_cat[5:10, ['race', 'salary']], df_emp[5:10, ['race', 'salary']])
+
+    def test_unique_value_counts(self):
+        assert_df_equals(df_cat['race'].unique(), df_emp['race'].unique())
+        assert_df_equals(df_cat[['dept', 'race']].nunique(), df_emp[['dept', 'race']].nunique())
+        df_result = df_cat['race'].value_counts()
+        df_answer = df_emp['race'].value_counts()
+        assert_array_equal(df_result._data['count'], df_answer._data['count'])
+
+    def test_sort_values(self):
+        df_result = df_cat.sort_values(['race', 'salary'])
+        df_answer = df_emp.sort_values(['race', 'salary'])
+        assert_df_equals(df_result, df_answer)
+
+    def test_pivot_table(self):
+        df_result = df_cat.pivot_table(rows='dept', columns='gender', values='salary',
+                                       aggfunc='mean')
+        df_answer = df_emp.pivot_table(rows='dept', columns='gender', values='salary',
+                                       aggfunc='mean')
+        assert_df_equals(df_result, df_answer)
+        df_result = df_cat.pivot_table(rows='race', values='salary', aggfunc='max')
+        df_answer = df_emp.pivot_table(rows='race', values='salary', aggfunc='max')
+        assert_df_equals(df_result, df_answer)
+
+    def test_str_and_write(self, tmp_path):
+        assert_df_equals(df_cat.str.upper('race'), df_emp.str.upper('race'))
+        assert_df_equals(df_cat.str.len('race'), df_emp.str.len('race'))
+        df_cat.to_csv(str(tmp_path / 'a.csv'))
+        assert_df_equals(pdc.read_csv(str(tmp_path / 'a.csv')), df_emp)
+        df_cat.to_cub(str(tmp_path / 'a.cub'))
+        assert_df_equals(pdc.read_cub(str(tmp_path / 'a.cub')), df_emp)
+
+
+df_buf = pdc.read_csv('data/employee.csv', string_storage='buffer')
+
+
+class TestStringArray:
+
+    def test_buffers(self):
+        arr = pdc.StringArray(np.array(['ab', None, '', 'été'], dtype='O'))
+        assert_array_equal(arr.offsets, [0, 2, 2, 2, 7])
+        assert arr.data.tobytes() == 'abété'.encode()
+        assert_array_equal(arr.nulls, [False, True, False, False])
+        assert [arr[i] for i in range(-4, 4)] == ['ab', None, '', 'été'] * 2
+        assert arr.to_numpy().tolist() == ['ab', None, '', 'été']
+
+    def test_read_csv(self):
+        for col in ['dept', 'race', 'gender']:
+            assert isinstance(df_buf._data[col], pdc.StringArray)
+        assert_df_equals(df_buf, df_emp)
+        obj_bytes = sum(sys.getsizeof(val) + 8 for val in df_emp._data['dept'])
+        assert df_buf._data['dept'].nbytes * 2 < obj_bytes
+
+    def test_read_csv_bytes(self, tmp_path):
+        fn = str(tmp_path / 'a.csv')
+        with open(fn, 'w', encoding='utf-8') as f:
+            f.write('a,b\n1,café\n2,\n3,ñandú\n')
+        df_answer = pdc.read_csv(fn, engine='numpy')
+        for kwargs in [{}, {'chunksize': 5}, {'dtype': {'a': 'O'}}]:
+            df_result = pdc.read_csv(fn, engine='numpy', string_storage='buffer', **kwargs)
+            if 'chunksize' in kwargs:
+                df_result = next(df_result)
+            assert isinstance(df_result._data['b'], pdc.StringArray)
+            assert df_result._data['b'].tolist() == ['café', '', 'ñandú']
+            if not kwargs:
+                assert_df_equals(df_result, df_answer)
+
+        with open(fn, 'wb') as f:
+            f.write(b'a\nab\n\xe9t\n')
+        with pytest.raises(ValueError):
+            pdc.read_csv(fn, engine='numpy', string_storage='buffer', dtype={'a': 'O'})
+
+    def test_selection(self):
+        df_result = df_buf[10:20, :]
+        assert df_result._data['dept'].data is df_buf._data['dept'].data
+        assert_df_equals(df_result, df_emp[10:20, :])
+        assert_df_equals(df_buf[[5, -1, 2], :], df_emp[[5, -1, 2], :])
+        assert_df_equals(df_buf[::-3, :], df_emp[::-3, :])
+        assert_df_equals(df_buf.tail(), df_emp.tail())
+
+        filt = df_buf['race'] == 'Hispanic'
+        assert_df_equals(filt, df_emp['race'] == 'Hispanic')
+        assert_df_equals(df_buf['race'] != 'Hisp', df_emp['race'] != 'Hisp')
+        assert_df_equals(df_buf[filt], df_emp[filt])
+        assert_df_equals(df_buf.sort_values('dept'), df_emp.sort_values('dept'))
+        assert '<td>Houston Police Department-HPD</td>' in df_buf._repr_html_()
+
+    def test_str_methods(self):
+        for method in ['upper', 'lower', 'len', 'swapcase']:
+            df_result = getattr(df_buf.str, method)('dept')
+            df_answer = getattr(df_emp.str, method)('dept')
+            assert_df_equals(df_result, df_answer)
+        assert isinstance(df_buf.str.upper('dept')._data['dept'], pdc.StringArray)
+
+        arr = pdc.StringArray(np.array(['Ça', None], dtype='O'))
+        df_result = pdc.DataFrame({'a': arr}).str.upper('a')
+        assert df_result._data['a'].tolist() == ['ÇA', None]
+
+    def test_cub(self, tmp_path):
+        fn = str(tmp_path / 'a.cub')
+        df_buf.to_cub(fn, row_group_size=400)
+        assert_df_equals(pdc.read_cub(fn), df_emp)
+        df_result = pdc.read_cub(fn, string_storage='buffer',
+                                 filter=('gender', '==', 'Female'))
+        assert isinstance(df_result._data['dept'], pdc.StringArray)
+        assert_df_equals(df_result, df_emp[df_emp['gender'] == 'Female'])
+
+        df_buf.to_csv(str(tmp_path / 'a.csv'))
+        assert_df_equals(pdc.read_csv(str(tmp_path / 'a.csv')), df_emp)
+
+
+class TestNullable:
+
+    def make_df(self):
+        return pdc.DataFrame({'a': pdc.NullableArray([1, None, 3, 10, None]),
+                              'b': pdc.NullableArray([True, None, False, True, True]),
+                              'c': np.array([1, 2, 3, 4, 5])})
+
+    def test_bitmap(self):
+        arr = pdc.NullableArray([1, None, 3, 10, None, 6, 7, 8, 9])
+        assert arr.dtype == np.dtype('int64')
+        assert_array_equal(arr.validity, [0b11101101, 0b1])
+        assert [arr[i] for i in range(-9, 0)] == [1, None, 3, 10, None, 6, 7, 8, 9]
+        assert_array_equal(arr.to_numpy(), [1, np.nan, 3, 10, np.nan, 6, 7, 8, 9])
+        assert_array_equal(pdc.NullableArray([True, None]).to_numpy(),
+                           np.array([True, None], dtype='O'))
+        with pytest.raises(TypeError):
+            pdc.NullableArray([1.5, None])
+
+    def test_isna_count(self):
+        df = self.make_df()
+        assert_array_equal(df.isna()._data['a'], [False, True, False, False, True])
+        assert_array_equal(df.count()._data['a'], [3])
+        assert_array_equal(df.count()._data['b'], [4])
+        assert df.dtypes._data['Data Type'].tolist() == ['int', 'bool', 'int']
+
+    def test_agg(self):
+        df = self.make_df()
+        assert df.sum()._data['a'].tolist() == [14]
+        assert df.sum()._data['a'].dtype.kind == 'i'
+        assert df.min()._data['a'].tolist() == [1]
+        assert df.max()._data['a'].tolist() == [10]
+        assert_allclose(df.mean()._data['a'], [14 / 3])
+        assert_allclose(df.std()._data['a'], [np.std([1, 3, 10])])
+        assert_allclose(df.median()._data['a'], [3])
+        assert df.argmax()._data['a'].tolist() == [3]
+        assert df.argmin()._data['a'].tolist() == [0]
+        assert df.all()._data['b'].tolist() == [False]
+        assert df.any()._data['b'].tolist() == [True]
+
+        df = pdc.DataFrame({'a': pdc.NullableArray([None, None], valid=[False, False])})
+        assert df.max()._data['a'][0] is None
+
+    def test_groupby(self):
+        df = self.make_df()
+        df['g'] = np.array(['x', 'x', 'y', 'y', 'z'])
+        groups = df.groupby('g')
+        df_result = groups.sum()
+        assert df_result._data['a'].tolist() == [1, 13, 0]
+        assert df_result._data['a'].dtype.kind == 'i'
+        assert_allclose(groups.mean()._data['a'], [1, 6.5, np.nan])
+        assert groups.count()._data['a'].tolist() == [1, 2, 0]
+
+        for aggfunc, a_answer, b_answer in [('min', [1, 3, None], [True, False, True]),
+                                            ('max', [1, 10, None], [True, True, True])]:
+            df_result = groups.agg(aggfunc)
+            arr = df_result._data['a']
+            assert isinstance(arr, pdc.NullableArray)
+            assert arr.dtype.kind == 'i'
+            assert [arr[i] for i in range(3)] == a_answer
+            assert df_result._data['b'].tolist() == b_answer
+
+        df_result = df.pivot_table(rows='g', values='a', aggfunc='sum')
+        assert df_result._data['sum'].tolist() == [1, 13, 0]
+        df['h'] = np.array(['p', 'q', 'p', 'q', 'p'])
+        df_result = df.pivot_table(rows='g', columns='h', values='a', aggfunc='max')
+        assert_array_equal(df_result._data['p'], [1, 3, np.nan])
+        assert_array_equal(df_result._data['q'], [np.nan, 10, np.nan])
+
+    def test_oper(self):
+        df = self.make_df()
+        df_result = df['a'] + df['c']
+        arr = df_result._data['a']
+        assert isinstance(arr, pdc.NullableArray)
+        assert_array_equal(arr, [2, np.nan, 6, 14, np.nan])
+        assert (10 - df['a'])._data['a'].values[[0, 2, 3]].tolist() == [9, 7, 0]
+        assert_array_equal((df['c'] * df['a'])._data['c'], [1, np.nan, 9, 40, np.nan])
+        assert_array_equal((df['a'] / 2)._data['a'], [.5, np.nan, 1.5, 5, np.nan])
+        assert_array_equal((df['a'] > 2)._data['a'], [False, False, True, True, False])
+        assert_array_equal((df['a'] != 3)._data['a'], [True, True, False, True, True])
+        assert len(df[df['a'] > 2]) == 2
+
+    def test_non_agg(self):
+        df = self.make_df()
+        arr = df.cumsum()._data['a']
+        assert isinstance(arr, pdc.NullableArray)
+        assert_array_equal(arr, [1, np.nan, 4, 14, np.nan])
+        assert_array_equal(df.cummax()._data['a'], [1, np.nan, 3, 10, np.nan])
+        assert_array_equal(df.clip(2, 5)._data['a'], [2, np.nan, 3, 5, np.nan])
+        assert isinstance(df.copy()._data['a'], pdc.NullableArray)
+        arr = df.diff()._data['a']
+        assert isinstance(arr, pdc.NullableArray)
+        assert_array_equal(arr, [np.nan, np.nan, np.nan, 7, np.nan])
+        assert_array_equal(df.pct_change()._data['a'], [np.nan, np.nan, np.nan, 7 / 3, np.nan])
+
+    def test_selection(self):
+        df = self.make_df()
+        df_result = df[[4, 0, 2], :]
+        assert_array_equal(df_result._data['a'], [np.nan, 1, 3])
+        assert df.sort_values('a')._data['c'].tolist() == [1, 3, 4, 2, 5]
+        assert '<td>None      </td>' in df._repr_html_()
+
+    def test_unique_sort(self):
+        df = self.make_df()
+        a_uniques, b_uniques, _ = df.unique()
+        assert a_uniques._data['a'].tolist() == [1, 3, 10]
+        assert a_uniques._data['a'].dtype.kind == 'i'
+        assert b_uniques._data['b'].tolist() == [False, True]
+        assert df.nunique()._data['a'].tolist() == [3]
+        assert df.nunique()._data['b'].tolist() == [2]
+
+        a_counts, b_counts, _ = df.value_counts()
+        assert sorted(a_counts._data['a'].tolist()) == [1, 3, 10]
+        assert a_counts._data['count'].tolist() == [1, 1, 1]
+        assert b_counts._data['b'].tolist() == [True, False]
+        assert b_counts._data['count'].tolist() == [3, 1]
+
+        assert df.sort_values('b')._data['c'].tolist() == [3, 1, 4, 5, 2]
+        df_result = df.sort_values(['b', 'a'])
+        assert df_result._data['c'].tolist() == [3, 1, 4, 5, 2]
+
+
+class TestCopyOnWrite:
+
+    def make_df(self):
+        return pdc.DataFrame({'a': np.array([1, 2, 3, 4]),
+                              'b': np.array(['w', 'x', 'y', 'z'], dtype='O')})
+
+    def test_selections_share(self):
+        df = self.make_df()
+        for df_view in [df['a'], df[['a', 'b']], df.head(2), df[1:, :], df.rename({'a': 'c'})]:
+            col = df_view.columns[0]
+            assert np.shares_memory(df_view._data[col], df._data['a'])
+
+    def test_write_copies(self):
+        df = self.make_df()
+        a = df._data['a']
+        df_head = df.head(3)
+        df_col = df[['a']]
+
+        df_head[0, 'a'] = 10
+        assert_array_equal(df_head._data['a'], [10, 2, 3])
+        assert_array_equal(df._data['a'], [1, 2, 3, 4])
+        assert_array_equal(df_col._data['a'], [1, 2, 3, 4])
+
+        df[[1, 2], 'a'] = np.array([20, 30])
+        assert_array_equal(df._data['a'], [1, 20, 30, 4])
+        assert_array_equal(df_col._data['a'], [1, 2, 3, 4])
+        assert_array_equal(a, [1, 2, 3, 4])
+
+        # the copied column is owned so later writes happen in place
+        owned = df._data['a']
+        df[df['a'] > 10, 'a'] = 0
+        assert df._data['a'] is owned
+        assert_array_equal(df._data['a'], [1, 0, 0, 4])
+
+        df_tail = df.tail(2)
+        df[-1, 'a'] = 5
+        assert_array_equal(df_tail._data['a'], [0, 4])
+        assert_array_equal(df._data['a'], [1, 0, 0, 5])
+
+    def test_write_strings(self):
+        df = self.make_df()
+        df[:2, 'b'] = 'v'
+        assert df._data['b'].tolist() == ['v', 'v', 'y', 'z']
+        df_cat = pdc.DataFrame({'b': pdc.Categorical(['x', 'y'])})
+        df_cat[0, 'b'] = 'z'
+        assert df_cat._data['b'].tolist() == ['z', 'y']
+
+    def test_write_column_arrays(self):
+        df = pdc.DataFrame({'a': pdc.NullableArray([1, None, 3]),
+                            'b': pdc.NullableArray([True, None, False]),
+                            'c': pdc.Categorical(['y', None, 'x']),
+                            's': pdc.StringArray(['x', None, 'z'])})
+        df_head = df.head(2)
+        df[0, 'a'] = 10
+        df[2, 'b'] = None
+        df[[1, 2], 'c'] = np.array(['w', None], dtype='O')
+        df[1, 's'] = 'yy'
+        for col, kind in [('a', pdc.NullableArray), ('b', pdc.NullableArray),
+                          ('c', pdc.Categorical), ('s', pdc.StringArray)]:
+            assert type(df._data[col]) is kind
+        assert df._data['a'].dtype == 'int64'
+        assert df._data['a'].values[[0, 2]].tolist() == [10, 3]
+        assert df._data['a'].valid.tolist() == [True, False, True]
+        assert df._data['b'].valid.tolist() == [True, False, False]
+        assert df._data['c'].tolist() == ['y', 'w', None]
+        assert df._data['c'].categories.tolist() == ['w', 'x', 'y']
+        assert df._data['s'].tolist() == ['x', 'yy', 'z']
+        assert df_head._data['a'].values[0] == 1
+        assert df_head._data['c'].tolist() == ['y', None]
+        assert df_head._data['s'].tolist() == ['x', None]
+
+        # owned arrays are still copied when a selection shares them
+        df_head = df.head(2)
+        df[0, 'a'] = np.nan
+        assert df_head._data['a'][0] == 10
+        assert df._data['a'][0] is None
+        with pytest.raises(TypeError):
+            df[0, 'a'] = 1.5
+
+    def test_bad_set(self):
+        df = self.make_df()
+        with pytest.raises(KeyError):
+            df[0, 'c'] = 1
+        with pytest.raises(TypeError):
+            df[0, ['a', 'b']] = 1
+        with pytest.raises(TypeError):
+            df['x', 'a'] = 1
+
+    def test_chained_views(self):
+        df = self.make_df()
+        df[0, 'a'] = 0
+        df_view = df.head(3)[['a']].rename({'a': 'c'})
+        df[1, 'a'] = 0
+        assert_array_equal(df_view._data['c'], [0, 2, 3])
+        del df_view
+        owned = df._data['a']
+        df[2, 'a'] = 0
+        assert df._data['a'] is owned
+
+    def test_assigned_column(self):
+        df = self.make_df()
+        df[0, 'a'] = 0
+        df2 = pdc.DataFrame({'x': np.zeros(4)})
+        df2['a'] = df['a']
+        df[1, 'a'] = 0
+        assert_array_equal(df2._data['a'], [0, 2, 3, 4])
+
+
+class TestConstruction:
+
+    def test_from_arrays(self):
+        a = np.array([1, 2])
+        df = pdc.DataFrame._from_arrays({'a': a})
+        assert df._data['a'] is a
+        assert_df_equals(df + 1, pdc.DataFrame({'a': np.array([2, 3])}))
+        df[0, 'a'] = 5
+        assert_array_equal(a, [1, 2])
+
+    def test_docs_and_str(self):
+        assert 'Find the median' in pdc.DataFrame.median.__doc__
+        df = pdc.DataFrame({'a': np.array(['x'])})
+        assert isinstance(df.str, pdc.StringMethods)
+        assert_df_equals(df.str.upper('a'), pdc.DataFrame({'a': np.array(['X'])}))
+
+    def test_broadcast_checked(self):
+        df = pdc.DataFrame({'a': np.array([1, 2])})
+        with pytest.raises(ValueError):
+            df + np.ones((2, 2))
+
+
+class TestBlocks:
+
+    def make_df(self):
+        rng = np.random.RandomState(0)
+        data = {f'f{i}': rng.rand(50) for i in range(6)}
+        data['s'] = np.array(['x', 'y'] * 25, dtype='O')
+        data['i'] = np.arange(50)
+        data['f6'] = rng.rand(50)
+        return pdc.DataFrame(data)
+
+    def test_consolidate(self):
+        df = self.make_df()
+        df_block = df.consolidate()
+        assert df_block.columns == df.columns
+        assert_df_equals(df_block, df)
+        blocks = df_block._live_blocks()
+        assert [cols for _, cols, _ in blocks] == [
+            ['f0', 'f1', 'f2', 'f3', 'f4', 'f5', 'f6'], ['i']]
+        assert blocks[0][0].shape == (7, 50)
+
+    def test_values_view(self):
+        df = self.make_df().drop(['s', 'i']).consolidate()
+        values = df.values
+        assert values.shape == (50, 7)
+        assert np.shares_memory(values, df._data['f3'])
+        df_plain = self.make_df().drop(['s', 'i'])
+        assert_array_equal(values, np.column_stack(list(df_plain._data.values())))
+
+    def test_operations(self):
+        df = self.make_df()
+        df_block = df.consolidate()
+        num_cols = [col for col in df.columns if col != 's']
+        for method in ['cumsum', 'cummax', 'cummin', 'abs', 'copy']:
+            df_result = getattr(df_block, method)()
+            assert_df_equals(df_result, getattr(df, method)())
+            assert len(df_result._live_blocks()) == 2
+        assert_df_equals(df_block.clip(.2, .8), df.clip(.2, .8))
+        assert_df_equals(df_block.round(1), df.round(1))
+        for method in ['sum', 'mean', 'median', 'std', 'max', 'argmin']:
+            assert_df_equals(getattr(df_block, method)(), getattr(df, method)())
+
+        df_result = df_block[num_cols] * 2 - df_block['f0']
+        assert_df_equals(df_result, df[num_cols] * 2 - df['f0'])
+        df_result = df_block[num_cols].consolidate() * 2 - df_block['f0']
+        assert len(df_result._live_blocks()) == 2
+        assert_df_equals(df_result, df[num_cols] * 2 - df['f0'])
+        assert_df_equals(df_block[num_cols].consolidate() > .5, df[num_cols] > .5)
+
+    def test_row_selection(self):
+        df = self.make_df()
+        df_block = df.consolidate()
+        filt = df['f0'] > .5
+        df_result = df_block[filt]
+        assert len(df_result._live_blocks()) == 2
+        assert_df_equals(df_result, df[filt])
+        df_result = df_block.head(10)
+        assert np.shares_memory(df_result._live_blocks()[0][0], df_block._data['f0'])
+        assert_df_equals(df_result, df.head(10))
+        assert_df_equals(df_block[[3, 1, 2], :], df[[3, 1, 2], :])
+        assert df_block[:5, ['f0', 'f1']]._live_blocks() == []
+
+    def test_column_selection(self):
+        df = self.make_df()
+        df_block = df.consolidate()
+        num_cols = [col for col in df.columns if col != 's']
+        df_result = df_block[num_cols]
+        assert [cols for _, cols, _ in df_result._live_blocks()] == [
+            ['f0', 'f1', 'f2', 'f3', 'f4', 'f5', 'f6'], ['i']]
+        assert df_block['i']._live_blocks()[0][1] == ['i']
+        assert_array_equal(df_block[['f1', 'f2']].values, df[['f1', 'f2']].values)
+
+        df_result = df_block[['f0', 'f1', 'f2', 'f3', 'f4', 'f5', 'f6']]
+        assert np.shares_memory(df_result.values, df_block._data['f0'])
+        df_result = df_block.rename({'f0': 'g0', 'i': 'j'})
+        assert [cols for _, cols, _ in df_result._live_blocks()] == [
+            ['g0', 'f1', 'f2', 'f3', 'f4', 'f5', 'f6'], ['j']]
+        assert_df_equals(df_result, df.rename({'f0': 'g0', 'i': 'j'}))
+
+    def test_writes(self):
+        df_block = self.make_df().consolidate()
+        block = df_block._live_blocks()[0][0]
+        df_head = df_block.head()
+        df_block[0, 'f1'] = 5.
+        assert df_block._data['f1'][0] == 5
+        assert df_head._data['f1'][0] != 5
+        assert block[1, 0] != 5
+        # the shared column was copied, so the float block no longer holds it
+        assert [cols for _, cols, _ in df_block._live_blocks()] == [['i']]
+        assert_array_equal(df_block.cumsum()._data['f1'][:2],
+                           5 + np.array([0, df_block._data['f1'][1]]))
+
+        # a column the frame already owns is still shared with the result
+        df = self.make_df()
+        df[0, 's'] = 'w'
+        df_block = df.consolidate()
+        df[1, 's'] = 'leak'
+        df_block[2, 's'] = 'leak'
+        assert df_block._data['s'][:3].tolist() == ['w', 'y', 'leak']
+        assert df._data['s'][:3].tolist() == ['w', 'leak', 'x']
+
+        df_block = self.make_df().consolidate()
+        df_block.columns = [col.upper() for col in df_block.columns]
+        assert [cols for _, cols, _ in df_block._live_blocks()] == [
+            ['F0', 'F1', 'F2', 'F3', 'F4', 'F5', 'F6'], ['I']]
+
+        df_block = self.make_df().consolidate()
+        df_block['f3'] = np.zeros(50)
+        assert [cols for _, cols, _ in df_block._live_blocks()] == [['i']]
+        assert_array_equal(df_block.sum()._data['f3'], [0])
+
+
+class TestDatetime:
+
+    csv = ('name,hired,seen\n'
+           'a,2019-03-01,01/02/2020 10:30\n'
+           'b,2021-07-15,\n'
+           'c,,15/02/2020 08:00\n'
+           'd,2020-01-31,15/02/2020 08:00\n')
+
+    def read(self, tmp_path, **kwargs):
+        fn = tmp_path / 'dates.csv'
+        fn.write_text(self.csv)
+        return pdc.read_csv(str(fn), **kwargs)
+
+    def test_read_csv(self, tmp_path):
+        hired = np.array(['2019-03-01', '2021-07-15', 'NaT', '2020-01-31'], dtype='M8[D]')
+        df = self.read(tmp_path, parse_dates=['hired'])
+        assert_array_equal(df._data['hired'], hired)
+        assert df._data['hired'].dtype == 'M8[D]'
+        assert df.dtypes._data['Data Type'].tolist() == ['string', 'datetime', 'string']
+
+        for engine in ['python', 'numpy']:
+            df = self.read(tmp_path, dtype={'hired': 'datetime64[s]'}, engine=engine)
+            assert df._data['hired'].dtype == 'M8[s]'
+            assert_array_equal(df._data['hired'], hired)
+
+        df = self.read(tmp_path, parse_dates=['seen'], date_format='%d/%m/%Y %H:%M')
+        seen = np.array(['2020-02-01T10:30', 'NaT', '2020-02-15T08:00',
+                         '2020-02-15T08:00'], dtype='M8[m]')
+        assert_array_equal(df._data['seen'], seen)
+
+        chunks = list(self.read(tmp_path, parse_dates=['hired'], chunksize=2))
+        assert_array_equal(np.concatenate([df._data['hired'] for df in chunks]), hired)
+
+    def test_read_csv_errors(self, tmp_path):
+        with pytest.raises(ValueError):
+            self.read(tmp_path, parse_dates=['seen'])
+        with pytest.raises(ValueError):
+            self.read(tmp_path, parse_dates=['hired'], date_format='%d/%m/%Y')
+        with pytest.raises(KeyError):
+            self.read(tmp_path, parse_dates=['when'])
+        with pytest.raises(TypeError):
+            self.read(tmp_path, parse_dates='hired')
+        with pytest.raises(TypeError):
+            self.read(tmp_path, parse_dates=['seen'], date_format=1)
+
+    def test_comparisons(self, tmp_path):
+        df = self.read(tmp_path, parse_dates=['hired'])
+        assert_array_equal((df['hired'] > '2020-01-01')._data['hired'],
+                           [False, True, False, True])
+        assert_array_equal((df['hired'] == '2020-01-31')._data['hired'],
+                           [False, False, False, True])
+        from datetime import date
+        assert_array_equal((df['hired'] <= date(2020, 1, 31))._data['hired'],
+                           [True, False, False, True])
+        assert df[df['hired'] >= '2021-01-01']._data['name'].tolist() == ['b']
+        delta = df['hired'] - '2019-01-01'
+        assert_array_equal(delta._data['hired'],
+                           np.array([59, 926, 'NaT', 395], dtype='m8[D]'))
+
+    def test_dt(self, tmp_path):
+        df = self.read(tmp_path, parse_dates=['hired'])
+        assert_array_equal(df.dt.year('hired')._data['hired'], [2019, 2021, np.nan, 2020])
+        assert_array_equal(df.dt.month('hired')._data['hired'], [3, 7, np.nan, 1])
+        assert_array_equal(df.dt.day('hired')._data['hired'], [1, 15, np.nan, 31])
+        assert_array_equal(df.dt.dayofyear('hired')._data['hired'], [60, 196, np.nan, 31])
+        assert_array_equal(df.dt.weekday('hired')._data['hired'], [4, 3, np.nan, 4])
+
+        seen = np.array(['2020-02-01T10:30:15', '1969-12-31T23:59:59'], dtype='M8[s]')
+        df = pdc.DataFrame({'seen': seen})
+        values = df.dt.year('seen')._data['seen']
+        assert values.dtype.kind == 'i'
+        assert_array_equal(values, [2020, 1969])
+        assert_array_equal(df.dt.hour('seen')._data['seen'], [10, 23])
+        assert_array_equal(df.dt.minute('seen')._data['seen'], [30, 59])
+        assert_array_equal(df.dt.second('seen')._data['seen'], [15, 59])
+        assert_array_equal(df.dt.date('seen')._data['seen'],
+                           np.array(['2020-02-01', '1969-12-31'], dtype='M8[D]'))
+        assert_array_equal(df.dt.floor('seen', 'h')._data['seen'],
+                           np.array(['2020-02-01T10', '1969-12-31T23'], dtype='M8[h]'))
+        with pytest.raises(TypeError):
+            df_emp.dt.year('salary')
+
+    def test_sort_diff_isna(self, tmp_path):
+        df = self.read(tmp_path, parse_dates=['hired'])
+        assert df.sort_values('hired')._data['name'].tolist() == ['a', 'd', 'b', 'c']
+        diff = df[['hired']].diff()._data['hired']
+        assert diff.dtype == 'm8[D]'
+        assert_array_equal(diff, np.array(['NaT', 867, 'NaT', 'NaT'], dtype='m8[D]'))
+        assert df.isna()._data['hired'].tolist() == [False, False, True, False]
+        assert df.count()._data['hired'][0] == 3
+
+    def test_write(self, tmp_path):
+        df = self.read(tmp_path, parse_dates=['hired'])
+        fn = tmp_path / 'out.csv'
+        df.to_csv(fn)
+        assert_df_equals(pdc.read_csv(str(fn), parse_dates=['hired']), df)
+
+        fn = tmp_path / 'dates.cub'
+        df.to_cub(fn, row_group_size=2)
+        assert_df_equals(pdc.read_cub(fn), df)
+        df_result = pdc.read_cub(fn, filter=('hired', '>', '2020-06-01'))
+        assert df_result._data['name'].tolist() == ['b']
+
+
+class TestMemory:
+
+    def test_memory_usage(self):
+        df_result = df_emp.memory_usage()
+        assert df_result.columns == df_emp.columns
+        assert df_result._data['salary'][0] == 8 * len(df_emp)
+        assert df_result._data['dept'][0] == 8 * len(df_emp)
+
+        df_result = df_emp.memory_usage(deep=True)
+        assert df_result._data['salary'][0] == 8 * len(df_emp)
+        gender = df_emp._data['gender'].tolist()
+        assert df_result._data['gender'][0] == \
+            8 * len(df_emp) + sum(map(sys.getsizeof, gender))
+
+        codes = df_cat._data['gender'].codes
+        cat_deep = df_cat.memory_usage(deep=True)._data['gender'][0]
+        assert cat_deep < df_result._data['gender'][0] // 4
+        assert df_cat.memory_usage()._data['gender'][0] == codes.nbytes + 2 * 8
+        assert df_buf.memory_usage(deep=True)._data['gender'][0] == \
+            df_buf._data['gender'].nbytes
+
+        df = pdc.DataFrame({'a': pdc.NullableArray([1, None, 3])})
+        assert df.memory_usage()._data['a'][0] == 3 * 8 + 1
+
+    def test_downcast(self):
+        data = {'a': np.array([1, 2, 120]), 'b': np.array([-200, 5]).repeat(2)[:3],
+                'c': np.array([0, 2 ** 40, 1]), 'd': np.array([1.5, np.nan, np.inf]),
+                'e': np.array([1e300, 1, 2]), 's': np.array(['x', 'y', 'z']),
+                'n': pdc.NullableArray([1, None, 70000])}
+        df = pdc.DataFrame(data, downcast=True)
+        dtypes = {col: values.dtype for col, values in df._data.items()}
+        assert dtypes == {'a': 'int8', 'b': 'int16', 'c': 'int64', 'd': 'float64',
+                          'e': 'float64', 's': 'O', 'n': 'int32'}
+        assert_array_equal(df._data['b'], data['b'])
+        assert df._data['n'].valid.tolist() == [True, False, True]
+        assert df._data['n'].values[[0, 2]].tolist() == [1, 70000]
+
+        df = pdc.DataFrame(data, downcast='float')
+        assert df._data['d'].dtype == 'float32'
+        assert df._data['e'].dtype == 'float64'
+        assert_array_equal(df._data['d'], data['d'])
+        assert pdc.DataFrame({'a': np.array([], dtype='int64')}, downcast=True) \
+            ._data['a'].dtype == 'int64'
+
+        with pytest.raises(ValueError):
+            pdc.DataFrame(data, downcast='int')
+
+    def test_read_csv(self):
+        df = pdc.read_csv('data/employee.csv', downcast=True)
+        assert df._data['salary'].dtype == 'int32'
+        assert_array_equal(df._data['salary'], df_emp._data['salary'])
+        assert df.memory_usage()._data['salary'][0] == 4 * len(df_emp)
+        df = pdc.read_csv(['data/employee.csv', 'data/employee.csv'], downcast=True)
+        assert df._data['salary'].dtype == 'int32'
+        with pytest.raises(ValueError):
+            pdc.read_csv('data/employee.csv', downcast=True, chunksize=100)
+
+
+class TestIndex:
+
+    @pytest.mark.parametrize('kind', ['hash', 'sorted'])
+    def test_loc(self, kind):
+        df = df_emp.set_index('salary', kind=kind)
+        assert df.index == 'salary'
+        assert df_emp.index is None
+        assert df.columns == df_emp.columns
+
+        df_answer = df_emp[df_emp['salary'] == 45279]
+        assert_df_equals(df.loc[45279], df_answer)
+        assert_df_equals(df.loc[45279, ['dept', 'gender']], df_answer[['dept', 'gender']])
+
+        df_result = df.loc[45000:46000]
+        salary = df_result._data['salary']
+        assert (np.diff(salary) >= 0).all()
+        all_salary = df_emp._data['salary']
+        filt = all_salary[(all_salary >= 45000) & (all_salary <= 46000)]
+        assert_array_equal(salary, np.sort(filt))
+        assert len(df.loc[:30000]) == (df_emp['salary'] <= 30000)._data['salary'].sum()
+        assert len(df.loc[200000:]) == (df_emp['salary'] >= 200000)._data['salary'].sum()
+        assert len(df.loc[46000:45000]) == 0
+
+        df_result = df.loc[[63166, 45279]]
+        counts = [(df_emp._data['salary'] == val).sum() for val in [63166, 45279]]
+        assert df_result._data['salary'].tolist() == [63166] * counts[0] + [45279] * counts[1]
+
+        with pytest.raises(KeyError):
+            df.loc[1]
+        with pytest.raises(KeyError):
+            df.loc['a']
+        with pytest.raises(ValueError):
+            df.loc[1:5:2]
+        with pytest.raises(ValueError):
+            df_emp.loc[1]
+
+    def test_strings(self):
+        for df in [df_emp, df_cat, df_buf]:
+            df = df.set_index('dept')
+            df_result = df.loc['Houston Fire Department (HFD)']
+            assert len(df_result) == 365
+            assert df.loc['Houston Fire Department (HFD)':'Houston Fire Department (HFD)'] \
+                .shape == df_result.shape
+        df = pdc.DataFrame({'a': np.array(['b', None, 'a', 'b'], dtype='O'),
+                            'b': np.arange(4)}).set_index('a')
+        assert df.loc['b']._data['b'].tolist() == [0, 3]
+        assert df.loc[:]._data['b'].tolist() == [2, 0, 3]
+        with pytest.raises(KeyError):
+            df.loc[None]
+
+    def test_datetimes(self):
+        hired = np.array(['2020-01-02', '2019-05-01', 'NaT', '2020-01-02'], dtype='M8[D]')
+        df = pdc.DataFrame({'hired': hired, 'a': np.arange(4)})
+        for kind in ['hash', 'sorted']:
+            df = df.set_index('hired', kind=kind)
+            assert df.loc['2020-01-02']._data['a'].tolist() == [0, 3]
+            assert df.loc['2019-01-01':'2019-12-31']._data['a'].tolist() == [1]
+            with pytest.raises(KeyError):
+                df.loc['2020-01-02T10:00']
+
+    def test_maintained(self):
+        df = df_emp.set_index('salary')
+        index = df._get_index()
+        # row preserving operations reuse the same index
+        for df_result in [df[['salary', 'dept']], df.drop('race'), df['salary']]:
+            assert df_result.index == 'salary'
+            assert df_result._get_index() is index
+        df_result = df.rename({'salary': 'pay', 'race': 'r'})
+        assert df_result.index == 'pay'
+        assert df_result._get_index()._rows is index._rows
+        assert len(df_result.loc[45279]) == 14
+        df_result = df.copy()
+        df_result.columns = ['d', 'r', 'g', 'pay']
+        assert df_result.index == 'pay'
+        assert len(df_result.loc[45279]) == 14
+        assert df.drop('salary').index is None
+        assert (df[['salary']] + 1).index is None
+
+        # other row selections rebuild it when it is next used
+        for df_result in [df.head(100), df.sort_values('dept'), df[df['gender'] == 'Female'],
+                          df.copy()]:
+            assert df_result.index == 'salary'
+            df_answer = df_result[df_result['salary'] == 45279]
+            assert_df_equals(df_result.loc[45279], df_answer)
+
+    def test_writes(self):
+        df = df_emp.set_index('salary')
+        df_head = df.head(20)
+        df_head.loc[df_head._data['salary'][0]]
+        df_head[0, 'salary'] = 1
+        assert len(df_head.loc[1]) == 1
+        assert df.loc[45279]._data['salary'][0] == 45279
+        df_head['salary'] = np.arange(20)
+        assert_array_equal(df_head.loc[3:5]._data['salary'], [3, 4, 5])
+
+    def test_errors(self):
+        with pytest.raises(TypeError):
+            df_emp.set_index(['salary'])
+        with pytest.raises(KeyError):
+            df_emp.set_index('pay')
+        with pytest.raises(ValueError):
+            df_emp.set_index('salary', kind='tree')
+
+
+class TestConcat:
+
+    def test_concat(self):
+        parts = [df_emp[i:i + 500, :] for i in range(0, len(df_emp), 500)]
+        df_result = pdc.concat(parts)
+        assert_df_equals(df_result, df_emp)
+        for col in df_emp.columns:
+            assert not np.shares_memory(df_result._data[col], df_emp._data[col])
+
+        df_result = pdc.concat([df_emp[['salary']], df_emp[['salary']] * .5])
+        assert df_result._data['salary'].dtype == 'float64'
+        assert_array_equal(df_result._data['salary'][len(df_emp):], df_emp._data['salary'] * .5)
+        df_bool = pdc.DataFrame({'salary': np.array([True, False])})
+        assert_array_equal(pdc.concat([df_bool, df_emp[:2, ['salary']]])._data['salary'],
+                           [1, 0] + df_emp._data['salary'][:2].tolist())
+
+    def test_column_arrays(self):
+        for df in [df_cat, df_buf]:
+            df_result = pdc.concat([df[1000:, :], df[:10, :]])
+            assert type(df_result._data['dept']) is type(df._data['dept'])
+            assert df_result._data['dept'].tolist() == \
+                df_emp._data['dept'][1000:].tolist() + df_emp._data['dept'][:10].tolist()
+        df_result = pdc.concat([df_cat[['dept']], df_buf[['dept']]])
+        assert df_result._data['dept'].tolist() == df_emp._data['dept'].tolist() * 2
+
+        df = pdc.DataFrame({'a': pdc.NullableArray([1, None, 3])})
+        df_result = pdc.concat([df, df])
+        assert isinstance(df_result._data['a'], pdc.NullableArray)
+        assert df_result.isna()._data['a'].tolist() == [False, True, False] * 2
+
+    def test_index(self):
+        df = df_emp.set_index('salary')
+        df_result = pdc.concat([df, df])
+        assert df_result.index == 'salary'
+        assert len(df_result.loc[45279]) == 2 * len(df.loc[45279])
+        assert pdc.concat([df, df_emp]).index is None
+
+    def test_errors(self):
+        with pytest.raises(TypeError):
+            pdc.concat(df_emp)
+        with pytest.raises(ValueError):
+            pdc.concat([])
+        with pytest.raises(TypeError):
+            pdc.concat([df_emp, 1])
+        with pytest.raises(ValueError):
+            pdc.concat([df_emp, df_emp[['dept']]])
+        with pytest.raises(TypeError, match="'salary'"):
+            pdc.concat([df_emp[['salary']], df_emp[['dept']].rename({'dept': 'salary'})])
+        df_dates = pdc.DataFrame({'a': np.array(['2020-01-01'], dtype='M8[D]')})
+        with pytest.raises(TypeError):
+            pdc.concat([df_dates, pdc.DataFrame({'a': np.array([1])})])
+
+
+class TestChunkedArray:
+
+    def test_append(self):
+        parts = [df_emp[i:i + 100, :] for i in range(0, len(df_emp), 100)]
+        df = parts[0]
+        for part in parts[1:]:
+            df = df.append(part)
+        values = df._data['salary']
+        assert isinstance(values, pdc.ChunkedArray)
+        assert len(values.chunks) == len(parts)
+        assert values.chunks[3] is parts[3]._data['salary']
+        assert df.shape == df_emp.shape
+        assert df.dtypes._data['Data Type'].tolist() == ['string', 'string', 'string', 'int']
+        assert_df_equals(df, df_emp)
+        assert_df_equals(df.sum(), df_emp.sum())
+        assert_df_equals(df[df['salary'] > 50000], df_emp[df_emp['salary'] > 50000])
+        assert_df_equals(df.sort_values('salary'), df_emp.sort_values('salary'))
+        assert_df_equals(pdc.concat([df, df_emp]), pdc.concat([df_emp, df_emp]))
+
+    def test_append_rows(self):
+        def append_rows(n):
+            rows = [pdc.DataFrame({'a': np.array([i])}) for i in range(n)]
+            start = time.perf_counter()
+            df = rows[0]
+            for row in rows[1:]:
+                df = df.append(row)
+            return time.perf_counter() - start, df, rows
+
+        small = min(append_rows(500)[0] for _ in range(3))
+        seconds, df, rows = append_rows(8000)
+        # 16 times the rows takes about 16 times as long, not 256
+        assert seconds < 64 * small
+        assert_array_equal(df._data['a'], np.arange(8000))
+        assert all(row._family is df._family for row in rows)
+
+    def test_shared_chunks(self):
+        a, b, c = [df_emp[i:i + 10, ['salary']] for i in (0, 10, 20)]
+        df_ab = a.append(b)
+        df_abc = df_ab.append(c)
+        df_abb = df_ab.append(b)
+        assert len(df_ab) == 20
+        assert_array_equal(df_abc._data['salary'], df_emp._data['salary'][:30])
+        assert_array_equal(df_abb._data['salary'][20:], df_emp._data['salary'][10:20])
+        assert len(df_ab._data['salary'].chunks) == 2
+
+    def test_consolidate_once(self):
+        values = pdc.ChunkedArray([np.arange(3), np.arange(3, 5)])
+        arr = values.to_numpy()
+        assert values.to_numpy() is arr
+        assert_array_equal(arr, np.arange(5))
+        values = values.append(np.arange(5, 7))
+        assert values.chunks[0] is arr
+        assert_array_equal(values[1:6], np.arange(1, 6))
+        assert values[6] == 6
+        assert values.nbytes == 7 * 8
+
+        with pytest.raises(TypeError):
+            values.append(np.arange(2.))
+        with pytest.raises(TypeError):
+            pdc.ChunkedArray([np.arange(2), np.arange(2.)])
+        with pytest.raises(ValueError):
+            pdc.ChunkedArray([])
+
+    def test_writes(self):
+        a = pdc.DataFrame({'x': np.arange(3)})
+        b = pdc.DataFrame({'x': np.arange(3, 6)})
+        # the first write makes `a` own a copy it may then write in place
+        a[0, 'x'] = 0
+        df = a.append(b)
+        a[0, 'x'] = 100
+        assert df._data['x'][0] == 0
+        df[1, 'x'] = 100
+        assert_array_equal(df._data['x'], [0, 100, 2, 3, 4, 5])
+        assert a._data['x'].tolist() == [100, 1, 2]
+        assert b._data['x'].tolist() == [3, 4, 5]
+
+    def test_other_kinds(self):
+        df = df_cat.append(df_cat)
+        assert isinstance(df._data['dept'], pdc.Categorical)
+        assert isinstance(df._data['salary'], pdc.ChunkedArray)
+        df = df_emp[['salary']].append(df_emp[['salary']] * 1.)
+        assert df._data['salary'].dtype == 'float64'
+        with pytest.raises(ValueError):
+            df_emp.append(df_emp[['dept']])
+        with pytest.raises(TypeError):
+            df_emp.append(1)
+
+
+class TestGroupBy:
+
+    def naive(self, df, keys, col, func):
+        # aggregates each group by filtering the rows of each key
+        groups = {}
+        rows = zip(*[df._data[key].tolist() for key in keys])
+        for i, group in enumerate(rows):
+            if None not in group:
+                groups.setdefault(group, []).append(i)
+        return {group: func(df._data[col][idx]) for group, idx in sorted(groups.items())}
+
+    @pytest.mark.parametrize('aggfunc', ['sum', 'mean', 'median', 'min', 'max', 'var', 'std',
+                                         'prod', 'first', 'last', 'argmax', 'ptp'])
+    @pytest.mark.parametrize('keys', ['dept', ['race', 'gender'], ['gender', 'dept', 'race']])
+    def test_agg(self, aggfunc, keys):
+        keys = [keys] if isinstance(keys, str) else keys
+        funcs = {'first': lambda arr: arr[0], 'last': lambda arr: arr[-1]}
+        func = funcs[aggfunc] if aggfunc in funcs else getattr(np, aggfunc)
+        answer = self.naive(df_emp, keys, 'salary', func)
+        for df in [df_emp, df_cat, df_buf]:
+            df_result = getattr(df.groupby(keys)['salary'], aggfunc, None)
+            df_result = df_result() if df_result else df.groupby(keys)['salary'].agg(aggfunc)
+            assert df_result.columns == keys + ['salary']
+            groups = list(zip(*[df_result._data[key].tolist() for key in keys]))
+            assert groups == list(answer)
+            assert_allclose(df_result._data['salary'], list(answer.values()))
+
+    def test_size_count(self):
+        df = pdc.DataFrame({'a': np.array(['x', None, 'y', 'x', 'y'], dtype='O'),
+                            'b': np.array([1., np.nan, 3., np.nan, 5.]),
+                            'c': np.array(['p', 'q', None, 'r', 's'], dtype='O')})
+        groups = df.groupby('a')
+        assert len(groups) == 2
+        df_result = groups.size()
+        assert df_result._data['a'].tolist() == ['x', 'y']
+        assert df_result._data['size'].tolist() == [2, 2]
+        df_result = groups.count()
+        assert df_result._data['b'].tolist() == [1, 2]
+        assert df_result._data['c'].tolist() == [2, 1]
+        assert_array_equal(groups.sum()._data['b'], [np.nan, 8])
+        assert_array_equal(groups.median()._data['b'], [np.nan, 4])
+        assert groups.max().columns == ['a', 'b']
+
+        df_result = df.groupby('b').size()
+        assert df_result._data['b'].tolist() == [1, 3, 5]
+        df_result = df.groupby(['a', 'c'])['b'].agg('first')
+        assert df_result._data['a'].tolist() == ['x', 'x', 'y']
+        assert df_result._data['c'].tolist() == ['p', 'r', 's']
+        assert_array_equal(df_result._data['b'], [1, np.nan, 5])
+
+    def test_dtypes(self):
+        df = pdc.DataFrame({'k': np.array([2, 1, 2, 1]),
+                            'i': np.array([1, 2, 3, 4], dtype='int8'),
+                            'b': np.array([True, True, False, True]),
+                            'f': np.array([1.5, 2, 3, 4], dtype='float32'),
+                            'big': np.array([2 ** 62, 1, 2 ** 62, 1]) // 2})
+        df_result = df.groupby('k').sum()
+        assert df_result._data['k'].tolist() == [1, 2]
+        assert df_result._data['i'].dtype == 'int64'
+        assert df_result._data['i'].tolist() == [6, 4]
+        assert df_result._data['b'].tolist() == [2, 1]
+        assert df_result._data['f'].dtype == 'float32'
+        assert df_result._data['big'].tolist() == [0, 2 ** 62]
+        for big in [2 ** 62, -2 ** 63 + 3]:
+            df_big = pdc.DataFrame({'k': np.zeros(4, dtype='int64'),
+                                    'a': np.array([big, 1, 1, 1])})
+            assert df_big.groupby('k').sum()._data['a'].tolist() == [big + 3]
+        df_result = df.groupby('k').mean()
+        assert df_result._data['i'].tolist() == [3, 2]
+        assert df_result._data['f'].dtype == 'float32'
+        assert df.groupby('k').any()._data['b'].tolist() == [True, True]
+        assert df.groupby('k').all()._data['b'].tolist() == [True, False]
+
+        hired = np.array(['2020-01-02', '2019-05-01', 'NaT', '2020-01-02'], dtype='M8[D]')
+        df = pdc.DataFrame({'hired': hired, 'a': np.arange(4)})
+        df_result = df.groupby('hired').sum()
+        assert_array_equal(df_result._data['hired'], hired[[1, 0]])
+        assert df_result._data['a'].tolist() == [1, 3]
+
+    @pytest.mark.parametrize('aggfunc', ['sum', 'min', 'size', 'argmax', 'mean', 'any'])
+    def test_pivot_table_dtypes(self, aggfunc):
+        df = df_emp.copy()
+        df['high'] = df_emp['salary'] > 60000
+        values = 'high' if aggfunc == 'any' else 'salary'
+        answer = self.naive(df, ['dept', 'race'], values, getattr(np, aggfunc))
+        df_result = df.pivot_table(rows='dept', columns='race', values=values, aggfunc=aggfunc)
+        depts = df_result._data['dept'].tolist()
+        assert df_result.columns[1:] == sorted({race for _, race in answer})
+        for race in df_result.columns[1:]:
+            # only a column with an empty cell is converted to float
+            expected = np.array([answer.get((dept, race), np.nan) for dept in depts])
+            assert df_result._data[race].dtype == expected.dtype
+            assert_array_equal(df_result._data[race], expected)
+        assert df_result._data['Asian'].dtype.kind == ('b' if aggfunc == 'any' else
+                                                       'f' if aggfunc == 'mean' else 'i')
+        assert df_result._data['Native American'].dtype.kind == 'f'
+
+    def test_agg_dict(self):
+        df_result = df_emp.groupby('gender').agg({'salary': 'max', 'dept': 'min'})
+        assert df_result.columns == ['gender', 'salary', 'dept']
+        assert df_result._data['dept'].tolist() == ['Health & Human Services'] * 2
+        with pytest.raises(TypeError):
+            df_emp.groupby('gender').agg({'dept': 'mean'})
+        assert df_emp.groupby('gender').mean().columns == ['gender', 'salary']
+
+    def test_errors(self):
+        with pytest.raises(KeyError):
+            df_emp.groupby('pay')
+        with pytest.raises(TypeError):
+            df_emp.groupby(1)
+        with pytest.raises(TypeError):
+            df_emp.groupby([])
+        with pytest.raises(KeyError):
+            df_emp.groupby('dept')['pay']
+        with pytest.raises(ValueError):
+            df_emp.groupby('dept').agg('nothing')
+        with pytest.raises(TypeError):
+            df_emp.groupby('dept').agg(np.sum)
+
+    def test_empty(self):
+        df = df_emp[df_emp['salary'] < 0]
+        df_result = df.groupby('dept').sum()
+        assert len(df_result) == 0
+        assert df.groupby('dept').size()._data['size'].tolist() == []